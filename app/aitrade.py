@@ -1,10 +1,155 @@
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from datetime import datetime, timedelta
-import ccxt
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import heapq
+import json
+import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+# Ortak gösterge motoru, mum deposu ve süreç havuzu (üst klasör)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import indicators
+from ohlcv_store import default_store, ccxt_fetcher, rows_to_frame, LOWER
+from rate_limit import FUTURE_KLINES_WEIGHT
+from scan_cache import TF_MS
+from scan_pool import pool_iter
+
+HISTORY_SOURCE = 'binance_future'   # depo kaynak adı (vadeli piyasa mumları)
+PAGE_LIMIT = 1000                   # fetch_ohlcv sayfa boyu
+HISTORY_WORKERS = 8                 # sembol başına eşzamanlı sayfa isteği
+
+
+def futures_exchange():
+    """Binance vadeli piyasa ccxt nesnesi (ccxt yalnızca veri çekerken gerekir)"""
+    import ccxt
+    
+    return ccxt.binance({
+        'enableRateLimit': False,   # kovayı biz yönetiyoruz (rate_limit)
+        'options': {'defaultType': 'future'}
+    })
+
+
+def page_windows(start, end, tf_ms, limit=PAGE_LIMIT):
+    """[start, end) aralığını `limit` barlık sayfa başlangıçlarına böler"""
+    first = start // tf_ms * tf_ms
+    return list(range(first, end, tf_ms * limit))
+
+
+def find_gaps(ts, tf_ms):
+    """Ardışık barlar arası boşluklar: [(önceki ts, sonraki ts), ...]"""
+    ts = np.asarray(ts, dtype=np.int64)
+    i = np.flatnonzero(np.diff(ts) != tf_ms)
+    return list(zip(ts[i].tolist(), ts[i + 1].tolist()))
+
+
+def gap_windows(gaps, tf_ms, limit=PAGE_LIMIT):
+    """
+    Boşlukları yeniden isteme sayfalarına toplar: bir önceki isteğin
+    `limit` barlık penceresine düşen boşluk ayrı istek almaz
+    """
+    starts = []
+    for a, _ in gaps:
+        if not starts or a + tf_ms >= starts[-1] + tf_ms * limit:
+            starts.append(a + tf_ms)
+    return starts
+
+
+def download_history(exchange, symbol, timeframe, start, end=None, workers=HISTORY_WORKERS):
+    """
+    [start, end) penceresini sayfalara böler ve sayfaları eşzamanlı çeker.
+    İstekler vadeli piyasa ağırlık kovasından geçer; kova dolunca
+    thread'ler bekler. Örtüşen sayfalardaki tekrar eden barlar atılır,
+    ara boşluklar bir kez yeniden istenir (aynı sayfaya düşenler tek
+    istekle; kalan boşluk borsa kaynaklıdır).
+    
+    Returns:
+        ts'ye göre sıralı, tekil OHLCV satırları (n × 6)
+    """
+    tf_ms = TF_MS.get(timeframe, TF_MS['4h'])
+    end = end or int(datetime.now().timestamp() * 1000)
+    page = ccxt_fetcher(exchange, symbol, timeframe, limit=PAGE_LIMIT,
+                        endpoint='binance_future', weight=FUTURE_KLINES_WEIGHT)
+    
+    def merge(pages):
+        rows = np.concatenate([np.asarray(p, dtype=float).reshape(-1, 6) for p in pages] + [np.empty((0, 6))])
+        rows = rows[np.argsort(rows[:, 0], kind='stable')]
+        keep = np.r_[rows[1:, 0] != rows[:-1, 0], True] if len(rows) else np.empty(0, dtype=bool)
+        return rows[keep]
+    
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        pages = list(ex.map(page, page_windows(start, end, tf_ms)))
+        rows = merge(pages)
+        gaps = find_gaps(rows[:, 0], tf_ms)
+        if gaps:
+            pages += list(ex.map(page, gap_windows(gaps, tf_ms)))
+            rows = merge(pages)
+    return rows
+
+
+def window_mean(x, width, lag):
+    """
+    Her i için x[i-lag : i-lag+width] ortalaması (pencere dizi dışına
+    taşıyorsa NaN). Satır satır .iloc[...].mean() ile aynı toplama sırası.
+    """
+    out = np.full(len(x), np.nan)
+    if len(x) >= width and len(x) > lag:
+        m = sliding_window_view(x, width).mean(axis=1)
+        out[lag:] = m[:len(x) - lag]
+    return out
+
+
+# İşlem kaydı (backtest çekirdeği yapılandırılmış dizi olarak tutar)
+TRADE_DTYPE = np.dtype([
+    ('entry_idx', 'i8'), ('exit_idx', 'i8'),
+    ('entry_price', 'f8'), ('exit_price', 'f8'), ('position_size', 'f8'),
+    ('stop_loss', 'f8'), ('take_profit', 'f8'),
+    ('pnl', 'f8'), ('pnl_percent', 'f8'),
+    ('exit_reason', 'i1'), ('signal_type', 'U32'), ('hold_days', 'i8'),
+])
+EXIT_REASONS = ('Stop Loss', 'Take Profit', 'Sell Signal', 'Trailing Stop')
+# Portföy işlemi: indeksler ortak zaman eksenine göre
+PORTFOLIO_DTYPE = np.dtype(TRADE_DTYPE.descr + [('symbol', 'U32')])
+
+
+def extrema_table(x, op):
+    """
+    Blok ekstremumları: table[k][i] = op(x[i : i + 2**k]).
+    first_hit ile bir eşiği ilk aşan bar O(log n)'de bulunur.
+    
+    op NaN'ı atlayan np.fmin / np.fmax olmalı: eski döngüde NaN bar hiçbir
+    karşılaştırmayı sağlamaz, np.minimum ise bloğun tamamını NaN yapıp
+    komşu barlardaki tetikleri gizlerdi.
+    """
+    levels = [np.asarray(x, dtype=float)]
+    w = 1
+    while 2 * w <= len(x):
+        prev = levels[-1]
+        levels.append(op(prev[:-w], prev[w:]))
+        w *= 2
+    return levels
+
+
+def first_hit(table, start, hit):
+    """start'tan itibaren hit(değer) sağlayan ilk indeks (yoksa len(x))"""
+    n = len(table[0])
+    pos = start
+    for k in range(len(table) - 1, -1, -1):
+        lvl = table[k]
+        if pos < len(lvl) and not hit(lvl[pos]):
+            pos += 1 << k
+    return min(pos, n)
+
+
+def next_index(idx, start, n):
+    """Sıralı indeks dizisinde start'tan büyük-eşit ilk değer (yoksa n)"""
+    k = np.searchsorted(idx, start)
+    return int(idx[k]) if k < len(idx) else n
+
+
 class HeikinAshiTrader:
     """
     Heikin-Ashi mum formasyonları ile trading botu - 3 Yıllık Backtest
@@ -16,63 +161,25 @@ class HeikinAshiTrader:
         self.timeframe = timeframe
         self.position = None
         self.trades = []
+        self.gaps = []
         
     def fetch_historical_data(self, years=3):
-        """3 yıllık gerçek veriyi Binance'den çek"""
+        """3 yıllık gerçek veriyi Binance'den çek (yerel depo üzerinden)"""
         print(f"\n📊 {self.symbol} için {years} yıllık veri çekiliyor...")
         
         try:
-            exchange = ccxt.binance({
-                'enableRateLimit': True,
-                'options': {'defaultType': 'future'}
-            })
-            
-            # Zaman aralığını hesapla
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=years*365)
-            
-            # Timeframe'e göre kaç bar gerekli
-            timeframe_minutes = {
-                '1h': 60, '4h': 240, '1d': 1440
-            }
-            minutes = timeframe_minutes.get(self.timeframe, 240)
-            total_bars = (years * 365 * 24 * 60) // minutes
-            
-            all_data = []
-            since = int(start_date.timestamp() * 1000)
-            
-            # Veriyi parça parça çek
-            while len(all_data) < total_bars:
-                try:
-                    ohlcv = exchange.fetch_ohlcv(
-                        self.symbol, 
-                        self.timeframe, 
-                        since=since, 
-                        limit=1000
-                    )
-                    
-                    if not ohlcv:
-                        break
-                        
-                    all_data.extend(ohlcv)
-                    since = ohlcv[-1][0] + 1
-                    
-                    print(f"✓ {len(all_data)} bar çekildi...", end='\r')
-                    
-                    if len(ohlcv) < 1000:
-                        break
-                        
-                except Exception as e:
-                    print(f"\n⚠️ Veri çekme hatası: {e}")
-                    break
+            rows = self.load_history(years)
+            if not len(rows):
+                raise ValueError('veri gelmedi')
             
             # DataFrame oluştur
-            df = pd.DataFrame(all_data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
+            df = rows_to_frame(rows, LOWER, 'timestamp')
             
-            print(f"\n✅ {len(df)} bar başarıyla çekildi!")
+            print(f"✅ {len(df)} bar başarıyla çekildi!")
             print(f"📅 Tarih aralığı: {df.index[0]} - {df.index[-1]}")
+            if self.gaps:
+                print(f"⚠️ {len(self.gaps)} boşluk var (borsada eksik bar), "
+                      f"ilki: {pd.to_datetime(self.gaps[0][0], unit='ms')}")
             
             return df
             
@@ -81,6 +188,30 @@ class HeikinAshiTrader:
             print("⚠️ Demo veri kullanılacak...")
             return self.create_demo_data(years)
     
+    def load_history(self, years=3, exchange=None, store=None):
+        """
+        Son `years` yılın mumlarını yerel depo üzerinden yükler.
+        Depo pencereyi kapsıyorsa yalnızca son saklanan bardan sonrası,
+        kapsamıyorsa bir kez tüm pencere çekilir (download_history ile,
+        sayfalar eşzamanlı). Kalan boşluklar self.gaps'e yazılır.
+        
+        Returns:
+            [ts_ms, open, high, low, close, volume] satırları (n × 6)
+        """
+        exchange = exchange or futures_exchange()
+        store = store or default_store()
+        start = int((datetime.now() - timedelta(days=years*365)).timestamp() * 1000)
+        
+        def fetch(since):
+            return download_history(exchange, self.symbol, self.timeframe,
+                                    start if since is None else since)
+        
+        rows = store.update(HISTORY_SOURCE, self.symbol, self.timeframe, fetch, start=start)
+        if len(rows):
+            rows = rows[rows[:, 0] >= start]
+        self.gaps = find_gaps(rows[:, 0], TF_MS.get(self.timeframe, TF_MS['4h']))
+        return rows
+    
     def create_demo_data(self, years=3):
         """API çalışmazsa demo veri oluştur"""
         print(f"\n🔧 {years} yıllık demo veri oluşturuluyor...")
@@ -124,29 +255,23 @@ class HeikinAshiTrader:
         """Heikin-Ashi mumlarını hesapla"""
         ha_df = df.copy()
         
-        # Heikin-Ashi formülleri
-        ha_df['ha_close'] = (df['open'] + df['high'] + df['low'] + df['close']) / 4
-        
-        ha_df['ha_open'] = 0.0
-        ha_df.iloc[0, ha_df.columns.get_loc('ha_open')] = (df['open'].iloc[0] + df['close'].iloc[0]) / 2
-        
-        for i in range(1, len(ha_df)):
-            ha_df.iloc[i, ha_df.columns.get_loc('ha_open')] = (
-                ha_df['ha_open'].iloc[i-1] + ha_df['ha_close'].iloc[i-1]
-            ) / 2
-        
-        ha_df['ha_high'] = ha_df[['high', 'ha_open', 'ha_close']].max(axis=1)
-        ha_df['ha_low'] = ha_df[['low', 'ha_open', 'ha_close']].min(axis=1)
+        # Heikin-Ashi formülleri (HA_Open özyinelemesi indicators çekirdeğinde)
+        ha_open, ha_close, ha_high, ha_low = indicators.heiken_ashi_arrays(
+            df['open'].values, df['high'].values, df['low'].values, df['close'].values)
+        ha_df['ha_close'] = ha_close
+        ha_df['ha_open'] = ha_open
+        ha_df['ha_high'] = ha_high
+        ha_df['ha_low'] = ha_low
         
         # Mum rengi
-        ha_df['ha_color'] = np.where(ha_df['ha_close'] > ha_df['ha_open'], 'green', 'red')
+        ha_df['ha_color'] = np.where(ha_close > ha_open, 'green', 'red')
         
         # Mum gövde büyüklüğü
-        ha_df['ha_body'] = abs(ha_df['ha_close'] - ha_df['ha_open'])
+        ha_df['ha_body'] = np.abs(ha_close - ha_open)
         
         # Üst ve alt fitil
-        ha_df['ha_upper_shadow'] = ha_df['ha_high'] - ha_df[['ha_open', 'ha_close']].max(axis=1)
-        ha_df['ha_lower_shadow'] = ha_df[['ha_open', 'ha_close']].min(axis=1) - ha_df['ha_low']
+        ha_df['ha_upper_shadow'] = ha_high - np.maximum(ha_open, ha_close)
+        ha_df['ha_lower_shadow'] = np.minimum(ha_open, ha_close) - ha_low
         
         return ha_df
     
@@ -154,23 +279,10 @@ class HeikinAshiTrader:
         """Trend gücünü hesapla"""
         df = df.copy()
         
-        # Ardışık yeşil/kırmızı mumları say
-        df['consecutive_green'] = 0
-        df['consecutive_red'] = 0
-        
-        green_count = 0
-        red_count = 0
-        
-        for i in range(len(df)):
-            if df['ha_color'].iloc[i] == 'green':
-                green_count += 1
-                red_count = 0
-            else:
-                red_count += 1
-                green_count = 0
-            
-            df.iloc[i, df.columns.get_loc('consecutive_green')] = green_count
-            df.iloc[i, df.columns.get_loc('consecutive_red')] = red_count
+        # Ardışık yeşil/kırmızı mumlar: renk serilerinin uzunluğu
+        green = df['ha_color'].values == 'green'
+        df['consecutive_green'] = indicators.run_length(green)
+        df['consecutive_red'] = indicators.run_length(~green)
         
         # Hareketli ortalama ile trend
         df['ha_ema_20'] = df['ha_close'].ewm(span=20, adjust=False).mean()
@@ -184,94 +296,82 @@ class HeikinAshiTrader:
     def detect_patterns(self, df):
         """Heikin-Ashi formasyonlarını tespit et"""
         df = df.copy()
-        df['pattern'] = ''
-        
-        for i in range(5, len(df)):
-            # Güçlü yükseliş trendi (3+ ardışık yeşil mum)
-            if df['consecutive_green'].iloc[i] >= 3 and df['trend'].iloc[i] == 'up':
-                # Düşük alt fitil = güçlü alıcı baskısı
-                avg_body = df['ha_body'].iloc[i-3:i+1].mean()
-                if df['ha_lower_shadow'].iloc[i] < avg_body * 0.3:
-                    df.iloc[i, df.columns.get_loc('pattern')] = 'Strong Uptrend'
-            
-            # Güçlü düşüş trendi (3+ ardışık kırmızı mum)
-            elif df['consecutive_red'].iloc[i] >= 3 and df['trend'].iloc[i] == 'down':
-                # Düşük üst fitil = güçlü satıcı baskısı
-                avg_body = df['ha_body'].iloc[i-3:i+1].mean()
-                if df['ha_upper_shadow'].iloc[i] < avg_body * 0.3:
-                    df.iloc[i, df.columns.get_loc('pattern')] = 'Strong Downtrend'
-            
-            # Dönüş sinyali: Kırmızıdan yeşile
-            elif (df['ha_color'].iloc[i] == 'green' and 
-                  df['consecutive_red'].iloc[i-1] >= 3):
-                # Büyük gövdeli yeşil mum
-                if df['ha_body'].iloc[i] > df['ha_body'].iloc[i-3:i].mean() * 1.5:
-                    df.iloc[i, df.columns.get_loc('pattern')] = 'Bullish Reversal'
-            
-            # Dönüş sinyali: Yeşilden kırmızıya
-            elif (df['ha_color'].iloc[i] == 'red' and 
-                  df['consecutive_green'].iloc[i-1] >= 3):
-                # Büyük gövdeli kırmızı mum
-                if df['ha_body'].iloc[i] > df['ha_body'].iloc[i-3:i].mean() * 1.5:
-                    df.iloc[i, df.columns.get_loc('pattern')] = 'Bearish Reversal'
-            
-            # Doji benzeri (kararsızlık)
-            elif df['ha_body'].iloc[i] < df['ha_body'].iloc[i-10:i].mean() * 0.3:
-                df.iloc[i, df.columns.get_loc('pattern')] = 'Indecision'
+        n = len(df)
+        
+        body = df['ha_body'].values
+        green = df['ha_color'].values == 'green'
+        up = df['trend'].values == 'up'
+        cg = df['consecutive_green'].values
+        cr = df['consecutive_red'].values
+        cg_prev = np.r_[0, cg[:-1]]
+        cr_prev = np.r_[0, cr[:-1]]
+        
+        avg4 = window_mean(body, 4, 3)     # body[i-3:i+1]
+        avg3 = window_mean(body, 3, 3)     # body[i-3:i]
+        avg10 = window_mean(body, 10, 10)  # body[i-10:i]
+        # i < 10: eski döngüdeki negatif başlangıçlı dilim aynen korunur
+        for i in range(5, min(10, n)):
+            avg10[i] = body[i-10:i].mean() if len(body[i-10:i]) else np.nan
+        
+        # if/elif zinciri: bir koşul dalına giren bar sonrakilere bakılmaz
+        with np.errstate(invalid='ignore'):
+            uptrend = (cg >= 3) & up
+            downtrend = ~uptrend & (cr >= 3) & ~up
+            bull_rev = ~uptrend & ~downtrend & green & (cr_prev >= 3)
+            bear_rev = ~uptrend & ~downtrend & ~bull_rev & ~green & (cg_prev >= 3)
+            rest = ~(uptrend | downtrend | bull_rev | bear_rev)
+            pattern = np.select(
+                [uptrend & (df['ha_lower_shadow'].values < avg4 * 0.3),
+                 downtrend & (df['ha_upper_shadow'].values < avg4 * 0.3),
+                 bull_rev & (body > avg3 * 1.5),
+                 bear_rev & (body > avg3 * 1.5),
+                 rest & (body < avg10 * 0.3)],
+                ['Strong Uptrend', 'Strong Downtrend', 'Bullish Reversal', 'Bearish Reversal', 'Indecision'],
+                default='').astype(object)
+        pattern[:5] = ''
+        df['pattern'] = pattern
         
         return df
     
     def generate_signals(self, df):
         """Alım satım sinyali üret"""
         df = df.copy()
-        df['signal'] = 0
-        df['signal_type'] = ''
         
-        for i in range(50, len(df)):
-            # ALIŞ SİNYALLERİ
-            
-            # 1. Güçlü yükseliş reversal
-            if df['pattern'].iloc[i] == 'Bullish Reversal':
-                if df['ha_close'].iloc[i] > df['ha_ema_20'].iloc[i]:
-                    df.iloc[i, df.columns.get_loc('signal')] = 1
-                    df.iloc[i, df.columns.get_loc('signal_type')] = 'Bullish Reversal + EMA'
-            
-            # 2. Güçlü yükseliş trendi devam
-            elif df['pattern'].iloc[i] == 'Strong Uptrend':
-                # Düzeltme sonrası devam
-                if (df['consecutive_green'].iloc[i] == 3 and 
-                    df['consecutive_red'].iloc[i-1] <= 2 and
-                    df['ha_close'].iloc[i] > df['ha_ema_50'].iloc[i]):
-                    df.iloc[i, df.columns.get_loc('signal')] = 1
-                    df.iloc[i, df.columns.get_loc('signal_type')] = 'Uptrend Continuation'
-            
-            # 3. Trend ve momentum birleşimi
-            elif (df['consecutive_green'].iloc[i] >= 2 and
-                  df['ha_close'].iloc[i] > df['ha_ema_20'].iloc[i] and
-                  df['ha_ema_20'].iloc[i] > df['ha_ema_50'].iloc[i] and
-                  df['ha_body'].iloc[i] > df['ha_body'].iloc[i-10:i].mean()):
-                df.iloc[i, df.columns.get_loc('signal')] = 1
-                df.iloc[i, df.columns.get_loc('signal_type')] = 'Strong Momentum'
-            
-            # SATIŞ SİNYALLERİ
-            
-            # 1. Düşüş reversal
-            if df['pattern'].iloc[i] == 'Bearish Reversal':
-                if df['ha_close'].iloc[i] < df['ha_ema_20'].iloc[i]:
-                    df.iloc[i, df.columns.get_loc('signal')] = -1
-                    df.iloc[i, df.columns.get_loc('signal_type')] = 'Bearish Reversal'
+        pattern = df['pattern'].values
+        hc = df['ha_close'].values
+        ema20 = df['ha_ema_20'].values
+        ema50 = df['ha_ema_50'].values
+        body = df['ha_body'].values
+        cg = df['consecutive_green'].values
+        cr = df['consecutive_red'].values
+        cr_prev = np.r_[0, cr[:-1]]
+        avg10 = window_mean(body, 10, 10)  # body[i-10:i]
+        
+        with np.errstate(invalid='ignore'):
+            # ALIŞ SİNYALLERİ (if/elif zinciri)
+            bull_rev = pattern == 'Bullish Reversal'
+            uptrend = ~bull_rev & (pattern == 'Strong Uptrend')
+            buy = np.select(
+                [bull_rev & (hc > ema20),
+                 uptrend & (cg == 3) & (cr_prev <= 2) & (hc > ema50),
+                 ~bull_rev & ~uptrend & (cg >= 2) & (hc > ema20) & (ema20 > ema50) & (body > avg10)],
+                ['Bullish Reversal + EMA', 'Uptrend Continuation', 'Strong Momentum'], default='')
             
-            # 2. Güçlü düşüş trendi
-            elif df['pattern'].iloc[i] == 'Strong Downtrend':
-                df.iloc[i, df.columns.get_loc('signal')] = -1
-                df.iloc[i, df.columns.get_loc('signal_type')] = 'Strong Downtrend'
-            
-            # 3. Trend kırılması
-            elif (df['consecutive_red'].iloc[i] >= 2 and
-                  df['ha_close'].iloc[i] < df['ha_ema_20'].iloc[i] and
-                  df['ha_ema_20'].iloc[i] < df['ha_ema_50'].iloc[i]):
-                df.iloc[i, df.columns.get_loc('signal')] = -1
-                df.iloc[i, df.columns.get_loc('signal_type')] = 'Trend Break'
+            # SATIŞ SİNYALLERİ (alışın üzerine yazar)
+            bear_rev = pattern == 'Bearish Reversal'
+            downtrend = ~bear_rev & (pattern == 'Strong Downtrend')
+            sell = np.select(
+                [bear_rev & (hc < ema20),
+                 downtrend,
+                 ~bear_rev & ~downtrend & (cr >= 2) & (hc < ema20) & (ema20 < ema50)],
+                ['Bearish Reversal', 'Strong Downtrend', 'Trend Break'], default='')
+        
+        signal = np.where(sell != '', -1, np.where(buy != '', 1, 0))
+        signal_type = np.where(sell != '', sell, buy).astype(object)
+        signal[:50] = 0
+        signal_type[:50] = ''
+        df['signal'] = signal
+        df['signal_type'] = signal_type
         
         return df
     
@@ -291,6 +391,104 @@ class HeikinAshiTrader:
         
         return position_size
     
+    def backtest_core(self, df, initial_balance=10000):
+        """
+        Olay güdümlü backtest çekirdeği (NumPy sütunları üzerinde)
+        
+        Barlar tek tek gezilmez: bir alış sinyalinden sonraki ilk çıkış
+        tetiği (SL / TP / satış sinyali / trailing) blok ekstremumları ve
+        searchsorted ile bulunur, oradan bir sonraki alış sinyaline atlanır.
+        Aynı barda birden çok tetik varsa öncelik eski döngüdeki sırayladır.
+        
+        Returns:
+            (işlemler: TRADE_DTYPE dizisi, bar bazlı equity dizisi,
+             son bakiye, açık pozisyon (giriş, fiyat, boyut, SL, TP, sinyal türü) ya da None)
+        """
+        close = df['close'].values.astype(float)
+        n = len(close)
+        ha_low = df['ha_low'].values
+        ha_body = df['ha_body'].values
+        signal = df['signal'].values
+        signal_type = df['signal_type'].values
+        green = df['ha_color'].values == 'green'
+        ns = df.index.values.astype('datetime64[ns]').astype(np.int64)
+        
+        low_min = extrema_table(df['low'].values, np.fmin)
+        high_max = extrema_table(df['high'].values, np.fmax)
+        buys = np.flatnonzero(signal == 1)
+        sells = np.flatnonzero(signal == -1)
+        trails = np.flatnonzero(df['consecutive_red'].values >= 3)
+        
+        trades = []
+        balance = initial_balance
+        position = None
+        t = 0
+        while t < n:
+            e = next_index(buys, t, n)
+            if e >= n:
+                break
+            entry = close[e]
+            # Stop loss: Son 20 barın HA en düşüğü
+            stop_loss = ha_low[max(0, e-20):e+1].min() * 0.98
+            size = self.calculate_position_size(entry, stop_loss, balance)
+            if size <= 0:
+                t = e + 1
+                continue
+            # Take profit: ATR bazlı dinamik hedef
+            atr = ha_body[e-14:e+1].mean() if len(ha_body[e-14:e+1]) else np.nan
+            take_profit = entry + (atr * 2.5)
+            
+            s = e + 1
+            hits = (first_hit(low_min, s, lambda v: v <= stop_loss),
+                    first_hit(high_max, s, lambda v: v >= take_profit),
+                    next_index(sells, s, n),
+                    next_index(trails, s, n) if green[e] else n)
+            x = min(hits)
+            if x >= n:
+                position = (e, entry, size, stop_loss, take_profit, signal_type[e])
+                break
+            reason = hits.index(x)
+            exit_price = (stop_loss, take_profit, close[x], close[x])[reason]
+            pnl = (exit_price - entry) * size
+            balance += pnl
+            trades.append((e, x, entry, exit_price, size, stop_loss, take_profit, pnl,
+                           (pnl / (entry * size)) * 100, reason, signal_type[e],
+                           (ns[x] - ns[e]) // 86_400_000_000_000))
+            t = x + 1
+        
+        trades = np.array(trades, dtype=TRADE_DTYPE)
+        
+        # Equity: kapanmış işlemlerin birikimli PnL'i + açık pozisyonun
+        # gerçekleşmemiş PnL'i (çıkış barı dahil, o bar çıkıştan önce ölçülür)
+        booked = np.zeros(n)
+        np.add.at(booked, trades['exit_idx'], trades['pnl'])
+        equity = np.cumsum(np.r_[float(initial_balance), booked])[:n]
+        starts = np.r_[trades['entry_idx'], [position[0]] if position else []].astype(np.int64) + 1
+        ends = np.r_[trades['exit_idx'] + 1, [n] if position else []].astype(np.int64)
+        entries = np.r_[trades['entry_price'], [position[1]] if position else []]
+        sizes = np.r_[trades['position_size'], [position[2]] if position else []]
+        lens = ends - starts
+        if lens.sum():
+            owner = np.repeat(np.arange(len(lens)), lens)
+            bars = np.arange(lens.sum()) - np.repeat(np.cumsum(lens) - lens, lens) + np.repeat(starts, lens)
+            equity[bars] = equity[bars] + (close[bars] - entries[owner]) * sizes[owner]
+        
+        return trades, equity, balance, position
+    
+    def trade_records(self, trades, index):
+        """Yapılandırılmış işlem dizisi → rapor fonksiyonlarının kullandığı dict listesi"""
+        return [{
+            'entry_date': index[t['entry_idx']],
+            'exit_date': index[t['exit_idx']],
+            'entry_price': t['entry_price'],
+            'exit_price': t['exit_price'],
+            'pnl': t['pnl'],
+            'pnl_percent': t['pnl_percent'],
+            'exit_reason': EXIT_REASONS[t['exit_reason']],
+            'signal_type': str(t['signal_type']),
+            'hold_days': int(t['hold_days'])
+        } for t in trades]
+    
     def backtest(self, df, initial_balance=10000):
         """Stratejiyi backtest et"""
         print("\n🔄 Heikin-Ashi hesaplamaları yapılıyor...")
@@ -301,141 +499,15 @@ class HeikinAshiTrader:
         
         print("📈 Backtest başlatılıyor...")
         
-        balance = initial_balance
-        position = None
-        trades = []
-        equity_curve = []
-        
-        for i in range(len(df)):
-            current_price = df['close'].iloc[i]
-            ha_close = df['ha_close'].iloc[i]
-            signal = df['signal'].iloc[i]
-            current_equity = balance
-            
-            # Açık pozisyon varsa equity güncelle
-            if position:
-                unrealized_pnl = (current_price - position['entry_price']) * position['position_size']
-                current_equity = balance + unrealized_pnl
-            
-            equity_curve.append({
-                'date': df.index[i],
-                'equity': current_equity
-            })
-            
-            # ALIŞ sinyali
-            if signal == 1 and position is None:
-                # Stop loss: Son 20 barın HA en düşüğü
-                stop_loss = df['ha_low'].iloc[max(0, i-20):i+1].min() * 0.98
-                
-                position_size = self.calculate_position_size(
-                    current_price, stop_loss, balance
-                )
-                
-                if position_size > 0:
-                    # Take profit: ATR bazlı dinamik hedef
-                    atr = df['ha_body'].iloc[i-14:i+1].mean()
-                    take_profit = current_price + (atr * 2.5)
-                    
-                    position = {
-                        'entry_price': current_price,
-                        'entry_date': df.index[i],
-                        'position_size': position_size,
-                        'stop_loss': stop_loss,
-                        'take_profit': take_profit,
-                        'signal_type': df['signal_type'].iloc[i],
-                        'entry_ha_color': df['ha_color'].iloc[i]
-                    }
-                
-            # Pozisyon çıkış kontrolü
-            elif position is not None:
-                # Stop loss
-                if df['low'].iloc[i] <= position['stop_loss']:
-                    exit_price = position['stop_loss']
-                    pnl = (exit_price - position['entry_price']) * position['position_size']
-                    balance += pnl
-                    
-                    trades.append({
-                        'entry_date': position['entry_date'],
-                        'exit_date': df.index[i],
-                        'entry_price': position['entry_price'],
-                        'exit_price': exit_price,
-                        'pnl': pnl,
-                        'pnl_percent': (pnl / (position['entry_price'] * position['position_size'])) * 100,
-                        'exit_reason': 'Stop Loss',
-                        'signal_type': position['signal_type'],
-                        'hold_days': (df.index[i] - position['entry_date']).days
-                    })
-                    position = None
-                    
-                # Take profit
-                elif df['high'].iloc[i] >= position['take_profit']:
-                    exit_price = position['take_profit']
-                    pnl = (exit_price - position['entry_price']) * position['position_size']
-                    balance += pnl
-                    
-                    trades.append({
-                        'entry_date': position['entry_date'],
-                        'exit_date': df.index[i],
-                        'entry_price': position['entry_price'],
-                        'exit_price': exit_price,
-                        'pnl': pnl,
-                        'pnl_percent': (pnl / (position['entry_price'] * position['position_size'])) * 100,
-                        'exit_reason': 'Take Profit',
-                        'signal_type': position['signal_type'],
-                        'hold_days': (df.index[i] - position['entry_date']).days
-                    })
-                    position = None
-                    
-                # Satış sinyali
-                elif signal == -1:
-                    exit_price = current_price
-                    pnl = (exit_price - position['entry_price']) * position['position_size']
-                    balance += pnl
-                    
-                    trades.append({
-                        'entry_date': position['entry_date'],
-                        'exit_date': df.index[i],
-                        'entry_price': position['entry_price'],
-                        'exit_price': exit_price,
-                        'pnl': pnl,
-                        'pnl_percent': (pnl / (position['entry_price'] * position['position_size'])) * 100,
-                        'exit_reason': 'Sell Signal',
-                        'signal_type': position['signal_type'],
-                        'hold_days': (df.index[i] - position['entry_date']).days
-                    })
-                    position = None
-                
-                # Trailing stop (3+ kırmızı mum)
-                elif (df['consecutive_red'].iloc[i] >= 3 and 
-                      position['entry_ha_color'] == 'green'):
-                    exit_price = current_price
-                    pnl = (exit_price - position['entry_price']) * position['position_size']
-                    balance += pnl
-                    
-                    trades.append({
-                        'entry_date': position['entry_date'],
-                        'exit_date': df.index[i],
-                        'entry_price': position['entry_price'],
-                        'exit_price': exit_price,
-                        'pnl': pnl,
-                        'pnl_percent': (pnl / (position['entry_price'] * position['position_size'])) * 100,
-                        'exit_reason': 'Trailing Stop',
-                        'signal_type': position['signal_type'],
-                        'hold_days': (df.index[i] - position['entry_date']).days
-                    })
-                    position = None
-            
-            # İlerleme göster
-            if i % 100 == 0:
-                progress = (i / len(df)) * 100
-                print(f"⏳ İlerleme: %{progress:.1f} - Bakiye: ${balance:,.2f}", end='\r')
+        trades, equity, balance, _ = self.backtest_core(df, initial_balance)
         
-        self.trades = trades
-        self.equity_curve = pd.DataFrame(equity_curve)
+        self.trade_array = trades
+        self.trades = self.trade_records(trades, df.index)
+        self.equity_curve = pd.DataFrame({'date': df.index, 'equity': equity})
         
-        print(f"\n✅ Backtest tamamlandı! Toplam {len(trades)} işlem yapıldı.")
+        print(f"✅ Backtest tamamlandı! Toplam {len(trades)} işlem yapıldı.")
         
-        return df, trades, balance
+        return df, self.trades, balance
     
     def calculate_metrics(self, initial_balance, final_balance, trades):
         """Detaylı performans metrikleri"""
@@ -537,6 +609,233 @@ class HeikinAshiTrader:
         print("="*80)
 
 
+
+def symbol_backtest(rows, risk_percent=2.0, timeframe='4h'):
+    """
+    İşçi süreç: OHLCV satırları → sinyal hattı + backtest çekirdeği.
+    İşlem pencereleri bakiyeden bağımsızdır; boyut portföyde belirlenir.
+    
+    Returns:
+        {'ts', 'close', 'trades', 'open'} ya da kısa seride None
+    """
+    if len(rows) <= 50:
+        return None
+    trader = HeikinAshiTrader(risk_percent=risk_percent, timeframe=timeframe)
+    df = rows_to_frame(rows, LOWER, 'timestamp')
+    df = trader.calculate_heikin_ashi(df)
+    df = trader.calculate_trend_strength(df)
+    df = trader.detect_patterns(df)
+    df = trader.generate_signals(df)
+    trades, _, _, position = trader.backtest_core(df, 1.0)
+    return {'ts': rows[:, 0].astype(np.int64), 'close': rows[:, 4].astype(float),
+            'trades': trades, 'open': position}
+
+
+def load_results(path):
+    """HeikinAshiPortfolio.save() çıktısını okur"""
+    with np.load(path) as z:
+        out = {k: z[k] for k in z.files}
+    out['metrics'] = json.loads(str(out['metrics']))
+    return out
+
+
+class HeikinAshiPortfolio:
+    """
+    Çok sembollü Heikin-Ashi backtest'i (ortak sermaye havuzu)
+    
+    Mumlar I/O thread'lerinde depo üzerinden yüklenir; sinyaller ve işlem
+    pencereleri sembol başına süreç havuzunda (scan_pool.pool_iter)
+    hesaplanır. Pencereler ortak zaman ekseninde giriş sırasıyla
+    birleştirilir: açık pozisyon sınırı dolmuşsa ya da boş sermaye
+    kalmamışsa sinyal atlanır. Boyut, gerçekleşen portföy bakiyesiyle
+    calculate_position_size'dan gelir.
+    
+    Atlanan işlemin penceresinde o sembolde yeni giriş aranmaz; sembol
+    dizisi tek başına backtest'tekiyle aynıdır.
+    """
+    
+    MAX_POSITIONS = 5       # aynı anda açık pozisyon sınırı
+    LOAD_WORKERS  = 8       # mum yükleme thread'leri
+    POOL_WORKERS  = None    # None → os.cpu_count()
+    
+    def __init__(self, symbols, initial_balance=10000, risk_percent=2.0, timeframe='4h',
+                 max_positions=None):
+        self.symbols = list(symbols)
+        self.initial_balance = initial_balance
+        self.risk_percent = risk_percent
+        self.timeframe = timeframe
+        self.max_positions = max_positions or self.MAX_POSITIONS
+        # Boyutlandırma ve rapor tek sembollü botla aynı
+        self.trader = HeikinAshiTrader(symbol=f'PORTFÖY ({len(self.symbols)} sembol)',
+                                       risk_percent=risk_percent, timeframe=timeframe)
+        self.errors = {}
+    
+    def load(self, years=3, store=None):
+        """Mumları thread'lerde yükler; (sembol, satırlar, hata) akışı"""
+        exchange = futures_exchange()
+        store = store or default_store()
+        
+        def one(sym):
+            trader = HeikinAshiTrader(symbol=sym, timeframe=self.timeframe)
+            return trader.load_history(years, exchange, store)
+        
+        with ThreadPoolExecutor(max_workers=self.LOAD_WORKERS) as ex:
+            futures = {ex.submit(one, sym): sym for sym in self.symbols}
+            for f in as_completed(futures):
+                err = f.exception()
+                yield futures[f], (None if err else f.result()), err
+    
+    def run(self, years=3, store=None, workers=None):
+        """Yükle → sembol backtest'leri (süreç havuzu) → portföy birleştirme"""
+        print(f"\n📊 {len(self.symbols)} sembol için {years} yıllık veri yükleniyor...")
+        runs = {}
+        for sym, res, err in pool_iter(self.load(years, store), fn=symbol_backtest,
+                                       workers=workers or self.POOL_WORKERS,
+                                       risk_percent=self.risk_percent, timeframe=self.timeframe):
+            if err is not None or res is None:
+                self.errors[sym] = str(err) if err is not None else 'yetersiz veri'
+                print(f"\n⚠️ {sym}: {self.errors[sym]}")
+                continue
+            runs[sym] = res
+            print(f"✓ {len(runs)}/{len(self.symbols)} sembol işlendi...", end='\r')
+        print()
+        return self.merge(runs)
+    
+    def merge(self, runs):
+        """
+        Sembol sonuçlarını ({sembol: symbol_backtest çıktısı}) tek
+        portföyde birleştirir; equity eğrisi ve metrikler hesaplanır.
+        
+        Returns:
+            (kapanmış işlem dict'leri, gerçekleşen son bakiye)
+        """
+        self.names = np.array(sorted(runs), dtype='U32')
+        self.ts = (np.unique(np.concatenate([runs[s]['ts'] for s in self.names]))
+                   if len(self.names) else np.empty(0, dtype=np.int64))
+        n = len(self.ts)
+        self.dates = pd.to_datetime(self.ts, unit='ms')
+        
+        # Ortak eksende ileri doldurulmuş kapanışlar (sembol × bar)
+        self.closes = np.full((len(self.names), n), np.nan)
+        cand = []
+        for j, sym in enumerate(self.names):
+            r = runs[sym]
+            pos = np.searchsorted(r['ts'], self.ts, side='right') - 1
+            self.closes[j] = np.where(pos >= 0, r['close'][pos.clip(0)], np.nan)
+            at = np.searchsorted(self.ts, r['ts'])
+            for t in r['trades']:
+                cand.append((int(at[t['entry_idx']]), j, int(at[t['exit_idx']]), t['entry_price'],
+                             t['exit_price'], t['stop_loss'], t['take_profit'], t['exit_reason'],
+                             t['signal_type'], t['hold_days']))
+            if r['open'] is not None:
+                e, entry, _, stop_loss, take_profit, signal_type = r['open']
+                cand.append((int(at[e]), j, n, entry, np.nan, stop_loss, take_profit, -1, signal_type, 0))
+        cand.sort(key=lambda c: (c[0], c[1]))
+        
+        # Giriş sırasıyla: önce o bara kadar kapananlar, sonra limit / sermaye
+        balance = self.initial_balance
+        committed = 0.0
+        book = []           # (çıkış, kabul sırası, pnl, tutar)
+        accepted = []
+        self.skipped = 0
+        
+        def release(until):
+            nonlocal balance, committed
+            while book and book[0][0] <= until:
+                _, _, pnl, notional = heapq.heappop(book)
+                balance += pnl
+                committed -= notional
+        
+        for c in cand:
+            e, j, x, entry, exit_price, stop_loss = c[:6]
+            release(e)
+            if len(book) >= self.max_positions:
+                self.skipped += 1
+                continue
+            size = self.trader.calculate_position_size(entry, stop_loss, balance)
+            size = min(size, max(balance - committed, 0) / entry)
+            if size <= 0:
+                self.skipped += 1
+                continue
+            pnl = (exit_price - entry) * size if x < n else 0.0
+            heapq.heappush(book, (x, len(accepted), pnl, entry * size))
+            accepted.append((e, x, entry, exit_price, size, stop_loss, c[6], pnl,
+                             (pnl / (entry * size)) * 100, c[7], c[8], c[9], self.names[j]))
+        release(n - 1)
+        
+        acc = np.array(accepted, dtype=PORTFOLIO_DTYPE)
+        closed = acc['exit_idx'] < n
+        self.trade_array = acc[closed]
+        self.open_positions = acc[~closed]
+        self.equity = self._equity(acc)
+        self.trades = self.trader.trade_records(self.trade_array, self.dates)
+        for rec, sym in zip(self.trades, self.trade_array['symbol']):
+            rec['symbol'] = str(sym)
+        self.equity_curve = pd.DataFrame({'date': self.dates, 'equity': self.equity})
+        self.balance = balance
+        
+        # Portföy ve sembol metrikleri (aynı calculate_metrics)
+        self.trader.equity_curve = self.equity_curve
+        self.metrics = self.trader.calculate_metrics(self.initial_balance, balance, self.trades)
+        self.symbol_metrics = {}
+        for sym in self.names:
+            m = HeikinAshiTrader(symbol=str(sym), risk_percent=self.risk_percent, timeframe=self.timeframe)
+            m.equity_curve = pd.DataFrame({'date': self.dates,
+                                           'equity': self._equity(acc[acc['symbol'] == sym])})
+            trades = [t for t in self.trades if t['symbol'] == sym]
+            final = self.initial_balance + sum(t['pnl'] for t in trades)
+            self.symbol_metrics[str(sym)] = m.calculate_metrics(self.initial_balance, final, trades)
+        
+        print(f"✅ Portföy backtest tamamlandı! {len(self.trades)} işlem, "
+              f"{self.skipped} sinyal limit/sermaye nedeniyle atlandı.")
+        return self.trades, balance
+    
+    def _equity(self, acc):
+        """
+        İşlemlerin bar bazlı equity'si: kapanan PnL'in birikimi + açık
+        pencerelerin gerçekleşmemiş PnL'i (backtest_core ile aynı kural)
+        """
+        n = len(self.ts)
+        closed = acc[acc['exit_idx'] < n]
+        booked = np.bincount(closed['exit_idx'], closed['pnl'], minlength=n)
+        equity = np.cumsum(np.r_[float(self.initial_balance), booked])[:n]
+        starts = acc['entry_idx'] + 1
+        lens = np.minimum(acc['exit_idx'] + 1, n) - starts
+        if lens.sum():
+            owner = np.repeat(np.arange(len(lens)), lens)
+            bars = np.arange(lens.sum()) - np.repeat(np.cumsum(lens) - lens, lens) + np.repeat(starts, lens)
+            rows = np.searchsorted(self.names, acc['symbol'])[owner]
+            unrealized = (self.closes[rows, bars] - acc['entry_price'][owner]) * acc['position_size'][owner]
+            equity = equity + np.bincount(bars, unrealized, minlength=n)
+        return equity
+    
+    def save(self, path):
+        """Sonuçları sıkıştırılmış .npz olarak yazar (load_results ile okunur)"""
+        metrics = {'portfolio': self.metrics, 'symbols': self.symbol_metrics,
+                   'skipped': self.skipped, 'errors': self.errors,
+                   'max_positions': self.max_positions, 'risk_percent': self.risk_percent,
+                   'timeframe': self.timeframe}
+        np.savez_compressed(path, ts=self.ts, equity=self.equity, trades=self.trade_array,
+                            open_positions=self.open_positions, symbols=self.names,
+                            metrics=np.array(json.dumps(metrics, default=lambda o: o.item())))
+        print(f"💾 Sonuçlar kaydedildi: {path}")
+    
+    def print_results(self):
+        """Portföy raporu + sembol özeti"""
+        self.trader.print_results(self.initial_balance, self.balance, self.trades)
+        
+        print(f"\n📋 SEMBOL BAZLI KATKI (maks. {self.max_positions} açık pozisyon, "
+              f"{self.skipped} sinyal atlandı):")
+        ranked = sorted(self.symbol_metrics.items(), key=lambda kv: kv[1]['total_pnl'], reverse=True)
+        for sym, m in ranked:
+            print(f"   {sym:<16} İşlem: {m['total_trades']:>4}  "
+                  f"Kazanma: %{m.get('win_rate', 0):5.1f}  "
+                  f"Kar/Zarar: ${m['total_pnl']:>12,.2f}  "
+                  f"Max DD: %{m.get('max_drawdown', 0):.2f}")
+        for sym, err in self.errors.items():
+            print(f"   {sym:<16} ⚠️ {err}")
+
+
 # ANA PROGRAM
 if __name__ == "__main__":
     print("="*80)
@@ -549,6 +848,20 @@ if __name__ == "__main__":
     RISK_PERCENT = 2.0
     INITIAL_BALANCE = 10000
     YEARS = 3
+    # Portföy modu: python aitrade.py BTC/USDT ETH/USDT SOL/USDT ...
+    PORTFOLIO = sys.argv[1:]
+    
+    if PORTFOLIO:
+        portfolio = HeikinAshiPortfolio(
+            PORTFOLIO,
+            initial_balance=INITIAL_BALANCE,
+            risk_percent=RISK_PERCENT,
+            timeframe=TIMEFRAME
+        )
+        portfolio.run(years=YEARS)
+        portfolio.print_results()
+        portfolio.save(f"portfolio_{TIMEFRAME}_{datetime.now():%Y%m%d_%H%M}.npz")
+        sys.exit(0)
     
     # Bot oluştur
     trader = HeikinAshiTrader(
@@ -6,8 +6,15 @@ Gerçek Binance verilerini kullanır
 import pandas as pd
 from datetime import datetime, timedelta
 import warnings
-import time
 import requests
+import os
+import sys
+
+# Ortak göstergeler depo kökünde (indicators.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import indicators
+from ohlcv_store import default_store
+from rate_limit import limiter, call, observe_response, KLINES_WEIGHT
 warnings.filterwarnings('ignore')
 
 # Binance işlem çiftleri - Belirtilen coinler
@@ -25,6 +32,7 @@ BINANCE_COINS = [
 def binance_klines_cek(symbol, interval='4h', limit=500):
     """
     Binance API'den kline (mum) verisi çeker
+    Mumlar yerel depoda tutulur; yalnızca son saklanan bardan sonrası indirilir
     
     Args:
         symbol: İşlem çifti (örn: BTCUSDT)
@@ -34,48 +42,36 @@ def binance_klines_cek(symbol, interval='4h', limit=500):
     Returns:
         DataFrame: OHLCV verisi
     """
-    try:
-        url = "https://api.binance.com/api/v3/klines"
+    url    = "https://api.binance.com/api/v3/klines"
+    bucket = limiter('binance')
+    
+    def fetch(since):
         params = {
             'symbol': symbol,
             'interval': interval,
             'limit': limit
         }
+        if since is not None:
+            params['startTime'] = since
         
-        response = requests.get(url, params=params, timeout=10)
+        def get():
+            response = requests.get(url, params=params, timeout=10)
+            observe_response(bucket, response)
+            response.raise_for_status()
+            return response
         
-        if response.status_code != 200:
-            return None
+        response = call(bucket, get, weight=KLINES_WEIGHT)
         
-        data = response.json()
+        # Sadece gerekli kolonları al: timestamp, open, high, low, close, volume
+        return [row[:6] for row in response.json()]
+    
+    try:
+        df = default_store().get_frame('binance', symbol, interval, fetch,
+                                       limit=limit, page_size=limit, index_name='timestamp')
         
-        if not data:
+        if df.empty:
             return None
         
-        # DataFrame'e çevir
-        df = pd.DataFrame(data, columns=[
-            'timestamp', 'open', 'high', 'low', 'close', 'volume',
-            'close_time', 'quote_volume', 'trades', 'taker_buy_base',
-            'taker_buy_quote', 'ignore'
-        ])
-        
-        # Sadece gerekli kolonları al
-        df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
-        
-        # Veri tiplerini düzelt
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        df['open'] = df['open'].astype(float)
-        df['high'] = df['high'].astype(float)
-        df['low'] = df['low'].astype(float)
-        df['close'] = df['close'].astype(float)
-        df['volume'] = df['volume'].astype(float)
-        
-        # Index'i timestamp yap
-        df.set_index('timestamp', inplace=True)
-        
-        # Kolon isimlerini büyük harfe çevir (standart format)
-        df.columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-        
         return df
         
     except Exception as e:
@@ -85,62 +81,14 @@ def heiken_ashi(df):
     """
     Heiken Ashi mumlarını hesaplar
     """
-    df = df.copy()
-    
-    df['HA_Close'] = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-    df['HA_Open'] = 0.0
-    df.loc[df.index[0], 'HA_Open'] = (df['Open'].iloc[0] + df['Close'].iloc[0]) / 2
-    
-    for i in range(1, len(df)):
-        df.loc[df.index[i], 'HA_Open'] = (df['HA_Open'].iloc[i-1] + df['HA_Close'].iloc[i-1]) / 2
-    
-    df['HA_High'] = df[['High', 'HA_Open', 'HA_Close']].max(axis=1)
-    df['HA_Low'] = df[['Low', 'HA_Open', 'HA_Close']].min(axis=1)
-    
-    return df
+    return indicators.heiken_ashi(df)
 
 def td_sequential_heiken_ashi(df):
     """
     Heiken Ashi mumları üzerinde TD Sequential hesaplama
     """
-    df = df.copy()
-    df = heiken_ashi(df)
-    
-    # Buy Setup
-    df['buy_setup'] = 0
-    buy_count = 0
-    
-    for i in range(4, len(df)):
-        if df['HA_Close'].iloc[i] < df['HA_Close'].iloc[i-4]:
-            buy_count += 1
-            df.loc[df.index[i], 'buy_setup'] = buy_count
-            if buy_count >= 9:
-                buy_count = 9
-        else:
-            buy_count = 0
-    
-    # Sell Setup
-    df['sell_setup'] = 0
-    sell_count = 0
-    
-    for i in range(4, len(df)):
-        if df['HA_Close'].iloc[i] > df['HA_Close'].iloc[i-4]:
-            sell_count += 1
-            df.loc[df.index[i], 'sell_setup'] = sell_count
-            if sell_count >= 9:
-                sell_count = 9
-        else:
-            sell_count = 0
-    
-    # Trend analizi
-    df['ha_trend'] = 'NÖTR'
-    for i in range(len(df)):
-        if df['HA_Close'].iloc[i] > df['HA_Open'].iloc[i]:
-            df.loc[df.index[i], 'ha_trend'] = 'YÜKSELİŞ'
-        elif df['HA_Close'].iloc[i] < df['HA_Open'].iloc[i]:
-            df.loc[df.index[i], 'ha_trend'] = 'DÜŞÜŞ'
-    
-    return df
+    # Eski sayaç 9'a sabitlenmeden önce yazılıyordu: 9'u aşan seriler 10 olarak kalır
+    return indicators.td_sequential_heiken_ashi(df, cap=10, labels=indicators.TREND_TR)
 
 def trend_gucu_hesapla(df):
     """
@@ -285,11 +233,6 @@ def tum_coinleri_tara():
                 diger_sinyaller.append(sonuc)
         else:
             basarisiz += 1
-        
-        # Binance API rate limit: 1200 request/min = ~20 req/sec
-        # Her 10 request'te kısa bekleme
-        if i % 10 == 0:
-            time.sleep(0.5)
     
     print("\n" + "=" * 100)
     print(f"✓ Tarama tamamlandı!")
@@ -12,6 +12,13 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import schedule
+import os
+import sys
+
+# Ortak göstergeler depo kökünde (indicators.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import indicators
+from rate_limit import limiter, call, observe_response, KLINES_WEIGHT
 
 warnings.filterwarnings('ignore')
 
@@ -45,7 +52,14 @@ def binance_veri_cek(symbol, interval='4h', limit=500):
     try:
         url = "https://api.binance.com/api/v3/klines"
         params = {'symbol': symbol, 'interval': interval, 'limit': limit}
-        response = requests.get(url, params=params, timeout=10)
+        bucket = limiter('binance')
+        
+        def get():
+            response = requests.get(url, params=params, timeout=10)
+            observe_response(bucket, response)
+            return response
+        
+        response = call(bucket, get, weight=KLINES_WEIGHT)
         
         if response.status_code != 200:
             return None
@@ -77,53 +91,12 @@ def binance_veri_cek(symbol, interval='4h', limit=500):
 
 def heiken_ashi(df):
     """Heiken Ashi hesapla"""
-    df = df.copy()
-    df['HA_Close'] = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-    df['HA_Open'] = 0.0
-    df.loc[df.index[0], 'HA_Open'] = (df['Open'].iloc[0] + df['Close'].iloc[0]) / 2
-    
-    for i in range(1, len(df)):
-        df.loc[df.index[i], 'HA_Open'] = (df['HA_Open'].iloc[i-1] + df['HA_Close'].iloc[i-1]) / 2
-    
-    df['HA_High'] = df[['High', 'HA_Open', 'HA_Close']].max(axis=1)
-    df['HA_Low'] = df[['Low', 'HA_Open', 'HA_Close']].min(axis=1)
-    
-    return df
+    return indicators.heiken_ashi(df)
 
 
 def td_sequential(df):
     """TD Sequential + Heiken Ashi"""
-    df = heiken_ashi(df)
-    
-    # Buy Setup
-    df['buy_setup'] = 0
-    buy_count = 0
-    for i in range(4, len(df)):
-        if df['HA_Close'].iloc[i] < df['HA_Close'].iloc[i-4]:
-            buy_count += 1
-            df.loc[df.index[i], 'buy_setup'] = min(buy_count, 9)
-        else:
-            buy_count = 0
-    
-    # Sell Setup
-    df['sell_setup'] = 0
-    sell_count = 0
-    for i in range(4, len(df)):
-        if df['HA_Close'].iloc[i] > df['HA_Close'].iloc[i-4]:
-            sell_count += 1
-            df.loc[df.index[i], 'sell_setup'] = min(sell_count, 9)
-        else:
-            sell_count = 0
-    
-    # Trend
-    df['ha_trend'] = 'NÖTR'
-    for i in range(len(df)):
-        if df['HA_Close'].iloc[i] > df['HA_Open'].iloc[i]:
-            df.loc[df.index[i], 'ha_trend'] = 'YÜKSELİŞ'
-        elif df['HA_Close'].iloc[i] < df['HA_Open'].iloc[i]:
-            df.loc[df.index[i], 'ha_trend'] = 'DÜŞÜŞ'
-    
-    return df
+    return indicators.td_sequential_heiken_ashi(df, cap=9, labels=indicators.TREND_TR)
 
 
 def trend_gucu(df):
@@ -327,9 +300,6 @@ def tara():
                 diger_list.append(sonuc)
         else:
             basarisiz += 1
-        
-        if i % 10 == 0:
-            time.sleep(0.5)
     
     print(f"\n✓ Tarama tamamlandı: {toplam - basarisiz} başarılı, {basarisiz} başarısız")
     
@@ -0,0 +1,99 @@
+"""
+Asenkron OHLCV çekme hattı (Binance 500 sembol taraması)
+
+Ağ aşaması : tek bir asyncio döngüsü, ccxt.async_support ile yüzlerce
+             eşzamanlı fetch_ohlcv; her istek Binance ağırlık kovasından
+             (dakikada 1200) pay alır, 429/418'de kova geri çekilir.
+CPU aşaması: gelen mumlar ayrı bir thread havuzunda işlenir (depoya
+             yazma, HA/TD9, backtest), böylece ağ ve hesaplama örtüşür.
+
+Tarama süresi thread sayısıyla değil borsanın ağırlık bütçesiyle sınırlanır.
+"""
+
+import asyncio
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from rate_limit import binance_bucket, call_async, observe_ccxt, KLINES_WEIGHT, EXCHANGE_INFO_WEIGHT
+
+try:
+    import ccxt.async_support as ccxt_async
+    ASYNC_OK = True
+except ImportError:
+    ASYNC_OK = False
+
+
+async def _fetch_symbol(exchange, bucket, sem, symbol, timeframe, limit, since):
+    """Tek sembolün eksik mumlarını (gerekirse sayfalayarak) çeker"""
+    rows = []
+    async with sem:
+        while True:
+            kwargs = {'limit': limit} if since is None else {'since': since, 'limit': limit}
+            page = await call_async(bucket, exchange.fetch_ohlcv, symbol, timeframe,
+                                    weight=KLINES_WEIGHT, **kwargs)
+            observe_ccxt(bucket, exchange)
+            rows.extend(page)
+            if since is None or len(page) < limit or page[-1][0] <= since:
+                return rows
+            since = page[-1][0]
+
+
+async def _fetch_all(symbols, deliver, timeframe, limit, store, source, bucket, concurrency):
+    exchange = ccxt_async.binance({'enableRateLimit': False})   # kovayı biz yönetiyoruz
+    sem      = asyncio.Semaphore(concurrency)
+    try:
+        await call_async(bucket, exchange.load_markets, weight=EXCHANGE_INFO_WEIGHT)
+
+        async def one(sym):
+            try:
+                since = store.last_ts(source, sym, timeframe) if store else None
+                rows  = await _fetch_symbol(exchange, bucket, sem, sym, timeframe, limit, since)
+                deliver(sym, rows, None)
+            except Exception as e:
+                deliver(sym, None, e)
+
+        await asyncio.gather(*(one(s) for s in symbols))
+    finally:
+        await exchange.close()
+
+
+def scan_iter(symbols, process, timeframe='1h', limit=1000, store=None, source='binance',
+              bucket=None, concurrency=50, cpu_workers=4):
+    """
+    Sembolleri asenkron çeker, her biri için process(symbol, rows) çalıştırır.
+
+    Yields:
+        (symbol, sonuç, hata) — tamamlanma sırasıyla, her sembol için bir kez
+    """
+    symbols = list(symbols)
+    bucket  = bucket or binance_bucket()
+    out     = queue.Queue()
+    cpu     = ThreadPoolExecutor(max_workers=cpu_workers)
+    sent    = set()
+
+    def deliver(sym, rows, err):
+        sent.add(sym)
+        if err is not None:
+            out.put((sym, None, err))
+            return
+        fut = cpu.submit(process, sym, rows)
+        fut.add_done_callback(
+            lambda f: out.put((sym, None, f.exception()) if f.exception() else (sym, f.result(), None)))
+
+    def runner():
+        try:
+            asyncio.run(_fetch_all(symbols, deliver, timeframe, limit, store, source,
+                                   bucket, concurrency))
+        except Exception as e:
+            # Bağlantı/market yükleme hatası: kalan semboller hata olarak döner
+            for sym in symbols:
+                if sym not in sent:
+                    deliver(sym, None, e)
+
+    threading.Thread(target=runner, daemon=True).start()
+    try:
+        for _ in range(len(symbols)):
+            yield out.get()
+    finally:
+        cpu.shutdown(wait=False)
@@ -0,0 +1,197 @@
+"""
+TD9 TP/SL backtest çekirdeği (NumPy)
+
+Scanner.backtest ve Advanced500Scanner.backtest_td9 içindeki iç içe
+döngünün dizi tabanlı karşılığı: tüm setup==9 barları için ileri
+pencerede TP / SL seviyesinin ilk kesildiği bar tek seferde bulunur.
+Sonuç eski döngüyle bire bir aynıdır: (winrate, toplam, kazanç).
+
+td9_sweep / sweep_store aynı sinyal barları ve ileri ekstremumlar
+üzerinden bütün bir (tp, sl, fwd) ızgarasını tek geçişte değerlendirir.
+"""
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def signal_indices(closes, setups, fwd, level=9):
+    """Backtest'e giren sinyal barları: 4 <= i < n-fwd-1, setup==level, close>0"""
+    closes = np.asarray(closes, dtype=float)
+    setups = np.asarray(setups)
+    n = len(closes)
+    if n - fwd - 1 <= 4:
+        return np.empty(0, dtype=np.int64)
+    i = np.arange(4, n - fwd - 1)
+    return i[(setups[4:n - fwd - 1] == level) & (closes[4:n - fwd - 1] > 0)]
+
+
+def forward_windows(arr, idx, fwd):
+    """Her sinyal için sonraki `fwd` barlık pencere (k × fwd, kopyasız görünüm)"""
+    return sliding_window_view(np.asarray(arr, dtype=float), fwd)[idx + 1]
+
+
+def first_true(mask):
+    """Satır bazında ilk True'nun sütunu; hiç yoksa sütun sayısı"""
+    w = mask.shape[1]
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), w)
+
+
+def td9_backtest(closes, highs, lows, setups, sig_type='buy', tp=0.20, sl=0.05, fwd=20):
+    """
+    TD9 sinyallerinin TP/SL başarı oranı
+
+    Aynı barda hem TP hem SL kesilirse TP sayılır (eski döngüde TP önce
+    kontrol ediliyordu). Pencerede ikisi de kesilmezse fwd bar sonraki
+    kapanış girişle karşılaştırılır.
+
+    Returns:
+        (winrate %, toplam sinyal, kazanan)
+    """
+    closes = np.asarray(closes, dtype=float)
+    idx = signal_indices(closes, setups, fwd)
+    total = len(idx)
+    if total == 0:
+        return 0.0, 0, 0
+
+    entry = closes[idx]
+    H = forward_windows(highs, idx, fwd)
+    L = forward_windows(lows, idx, fwd)
+    if sig_type == 'buy':
+        tp_first = first_true(H >= (entry * (1 + tp))[:, None])
+        sl_first = first_true(L <= (entry * (1 - sl))[:, None])
+        drift_win = closes[idx + fwd] > entry
+    else:
+        tp_first = first_true(L <= (entry * (1 - tp))[:, None])
+        sl_first = first_true(H >= (entry * (1 + sl))[:, None])
+        drift_win = closes[idx + fwd] < entry
+
+    hit = (tp_first < fwd) | (sl_first < fwd)
+    win = np.where(hit, tp_first <= sl_first, drift_win)
+    wins = int(np.count_nonzero(win))
+    return float(wins / total * 100), int(total), wins
+
+
+# ============================================================================
+# PARAMETRE TARAMASI (TP × SL × FWD)
+# ============================================================================
+SweepResult = namedtuple('SweepResult', 'symbols tps sls fwds winrate total wins')
+
+
+def td9_sweep(closes, highs, lows, setups, sig_type='buy', tps=(0.20,), sls=(0.05,), fwds=(20,)):
+    """
+    Tek sembol için tüm (tp, sl, fwd) ızgarası tek geçişte
+
+    Sinyal barları ve ileri pencereler en uzun fwd için bir kez çıkarılır;
+    pencere boyunca kümülatif max(high) / min(low) üzerinden her TP/SL
+    seviyesinin ilk kesildiği bar sayılarak bulunur.
+
+    Returns:
+        winrate (T, S, F), total (F,), wins (T, S, F)
+    """
+    closes = np.asarray(closes, dtype=float)
+    tps, sls, fwds = (np.asarray(x, dtype=float) for x in (tps, sls, fwds))
+    fwds = fwds.astype(np.int64)
+    T, S, F = len(tps), len(sls), len(fwds)
+    winrate = np.zeros((T, S, F))
+    wins    = np.zeros((T, S, F), dtype=np.int64)
+    total   = np.zeros(F, dtype=np.int64)
+
+    idx = signal_indices(closes, setups, int(fwds.min()))
+    if len(idx) == 0:
+        return winrate, total, wins
+
+    fmax = int(fwds.max())
+    pad  = np.full(fmax, np.nan)
+    H = forward_windows(np.concatenate([np.asarray(highs, dtype=float), pad]), idx, fmax)
+    L = forward_windows(np.concatenate([np.asarray(lows, dtype=float), pad]), idx, fmax)
+    cum_hi = np.fmax.accumulate(H, axis=1)
+    cum_lo = np.fmin.accumulate(L, axis=1)
+
+    entry = closes[idx]
+    if sig_type == 'buy':
+        tp_lv, sl_lv = entry[:, None] * (1 + tps), entry[:, None] * (1 - sls)     # (k, T), (k, S)
+        tp_first = (~(cum_hi[:, None, :] >= tp_lv[:, :, None])).sum(axis=2)
+        sl_first = (~(cum_lo[:, None, :] <= sl_lv[:, :, None])).sum(axis=2)
+    else:
+        tp_lv, sl_lv = entry[:, None] * (1 - tps), entry[:, None] * (1 + sls)
+        tp_first = (~(cum_lo[:, None, :] <= tp_lv[:, :, None])).sum(axis=2)
+        sl_first = (~(cum_hi[:, None, :] >= sl_lv[:, :, None])).sum(axis=2)
+
+    n = len(closes)
+    tp_first = tp_first[:, :, None]     # (k, T, 1)
+    sl_first = sl_first[:, None, :]     # (k, 1, S)
+    for f, fwd in enumerate(fwds):
+        valid = idx < n - fwd - 1
+        k = int(np.count_nonzero(valid))
+        total[f] = k
+        if k == 0:
+            continue
+        tf, sf = tp_first[valid], sl_first[valid]
+        fin = closes[idx[valid] + fwd]
+        drift = (fin > entry[valid]) if sig_type == 'buy' else (fin < entry[valid])
+        hit = (tf < fwd) | (sf < fwd)
+        win = np.where(hit, tf <= sf, drift[:, None, None])
+        wins[:, :, f]    = win.sum(axis=0)
+        winrate[:, :, f] = wins[:, :, f] / k * 100
+    return winrate, total, wins
+
+
+def _sweep_worker(args):
+    """Süreç havuzu işçisi: mumları depodan okur, TD9 setup'larını hesaplar, tarar"""
+    from indicators import heiken_ashi_arrays, td_setup_counts
+    from ohlcv_store import OHLCVStore
+
+    root, source, symbol, timeframe, bars, cap, sig_type, tps, sls, fwds = args
+    rows = OHLCVStore(root).load(source, symbol, timeframe)[-bars:]
+    if len(rows) < 50:
+        return None
+    o, h, l, c = rows[:, 1], rows[:, 2], rows[:, 3], rows[:, 4]
+    _, ha_c, _, _ = heiken_ashi_arrays(o, h, l, c)
+    buy, sell = td_setup_counts(ha_c, cap=cap)
+    return td9_sweep(c, h, l, buy if sig_type == 'buy' else sell, sig_type, tps, sls, fwds)
+
+
+def sweep_store(symbols, tps, sls, fwds, sig_type='buy', source='binance', timeframe='1h',
+                bars=1000, cap=9, store=None, workers=None):
+    """
+    Depodaki (önbellek) mumlar üzerinden tüm semboller × ızgara taraması
+    Ağ kullanmaz; semboller süreç havuzuna dağıtılır.
+
+    Returns:
+        SweepResult: winrate / wins (N, T, S, F), total (N, F);
+        verisi olmayan sembollerde total = 0
+    """
+    from ohlcv_store import default_store
+
+    store   = store or default_store()
+    symbols = list(symbols)
+    tps, sls, fwds = list(tps), list(sls), list(fwds)
+    N, T, S, F = len(symbols), len(tps), len(sls), len(fwds)
+    winrate = np.zeros((N, T, S, F), dtype=np.float32)
+    wins    = np.zeros((N, T, S, F), dtype=np.int32)
+    total   = np.zeros((N, F), dtype=np.int32)
+
+    jobs = [(store.root, source, s, timeframe, bars, cap, sig_type, tps, sls, fwds) for s in symbols]
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        for i, res in enumerate(ex.map(_sweep_worker, jobs, chunksize=16)):
+            if res is None:
+                continue
+            winrate[i], total[i], wins[i] = res
+    return SweepResult(symbols, tps, sls, fwds, winrate, total, wins)
+
+
+def sweep_summary(result, top=10):
+    """Tüm semboller üzerinden toplam kazanç / toplam sinyal ile en iyi parametreler"""
+    signals = result.total.sum(axis=0)                        # (F,)
+    agg_wr  = np.divide(result.wins.sum(axis=0) * 100.0, signals,
+                        out=np.zeros(result.wins.shape[1:]), where=signals > 0)
+    order = np.argsort(agg_wr, axis=None)[::-1][:top]
+    rows = []
+    for flat in order:
+        t, s, f = np.unravel_index(flat, agg_wr.shape)
+        rows.append({'tp': result.tps[t], 'sl': result.sls[s], 'fwd': int(result.fwds[f]),
+                     'wr': round(float(agg_wr[t, s, f]), 2), 'signals': int(signals[f])})
+    return rows
@@ -0,0 +1,49 @@
+"""
+HeikinAshiTrader sinyal hattı vs eski iloc döngüleri — aşama başına süre
+
+    python benchmarks/bench_aitrade.py [bar sayısı]
+
+Varsayılan 3 yıllık 1h veri (26.280 bar); eski hat bu boyda yarım dakikadan
+uzun sürer. Sonuçlar assert_frame_equal(check_exact=True) ile karşılaştırılır.
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'app'), os.path.join(ROOT, 'tests')]
+
+import pandas as pd
+
+import legacy
+from aitrade import HeikinAshiTrader
+from test_aitrade import candles
+
+
+def stages(fns, df):
+    times = []
+    for fn in fns:
+        t = time.perf_counter()
+        df = fn(df)
+        times.append(time.perf_counter() - t)
+    return times, df
+
+
+def main(bars=3 * 365 * 24):
+    df = candles(bars, 42)
+    trader = HeikinAshiTrader()
+    names = ['calculate_heikin_ashi', 'calculate_trend_strength', 'detect_patterns', 'generate_signals']
+    t_old, old = stages([legacy.aitrade_heikin_ashi, legacy.aitrade_trend_strength,
+                         legacy.aitrade_patterns, legacy.aitrade_signals], df)
+    t_new, new = stages([getattr(trader, name) for name in names], df)
+    pd.testing.assert_frame_equal(new, old, check_exact=True)
+    print(f"{bars} bar, {(new['signal'] != 0).sum()} sinyal, sonuçlar aynı")
+    for name, a, b in zip(names, t_old, t_new):
+        print(f"{name:<25}: {a * 1000:9.1f} ms → {b * 1000:7.1f} ms  ({a / b:6.0f}x)")
+    print(f"{'toplam':<25}: {sum(t_old) * 1000:9.1f} ms → {sum(t_new) * 1000:7.1f} ms  "
+          f"({sum(t_old) / sum(t_new):6.0f}x)")
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,50 @@
+"""
+indicators.py çekirdekleri vs eski betik döngüleri — 1.000 bar başına ms
+
+    python benchmarks/bench_indicators.py [bar sayısı]
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'tests')]
+
+import indicators
+import legacy
+from test_indicators import ohlc
+
+
+def per_1000(fn, bars, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best * 1000 / bars * 1000
+
+
+def main(bars=2000):
+    df = ohlc(bars, seed=1)
+    o, h, l, c = (df[k].values for k in ('Open', 'High', 'Low', 'Close'))
+    rows = [
+        ('heiken_ashi (df.loc döngüsü)',
+         lambda: legacy.heiken_ashi(df), lambda: indicators.heiken_ashi(df)),
+        ('td_sequential_heiken_ashi (cap=10)',
+         lambda: legacy.td_sequential_clamp_after(df),
+         lambda: indicators.td_sequential_heiken_ashi(df, cap=10)),
+        ('HA + TD9 liste döngüsü (web / doktor)',
+         lambda: legacy.ha_td9_lists(o, h, l, c),
+         lambda: indicators.td_setup_counts(indicators.heiken_ashi_arrays(o, h, l, c)[1])),
+    ]
+    print(f"{bars} bar, ms / 1.000 bar (en iyi tekrar)")
+    print(f"{'çekirdek':<40}{'eski':>12}{'yeni':>12}{'hızlanma':>12}")
+    for name, old, new in rows:
+        t_new = per_1000(new, bars, 20)
+        t_old = per_1000(old, bars, 2)
+        print(f"{name:<40}{t_old:>12.3f}{t_new:>12.3f}{t_old / t_new:>11.0f}x")
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,38 @@
+"""
+td9_backtest vs eski TP/SL döngüsü — 500 sentetik sembol (1000 bar, iki yön)
+
+    python benchmarks/bench_td9.py [sembol sayısı] [bar sayısı]
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'tests')]
+
+import legacy
+from backtest import td9_backtest
+from test_backtest import series
+
+
+def run(fn, universe):
+    t = time.perf_counter()
+    out = [fn(c, h, l, s, side) for c, h, l, buy, sell in universe
+           for s, side in ((buy, 'buy'), (sell, 'sell'))]
+    return time.perf_counter() - t, out
+
+
+def main(symbols=500, bars=1000):
+    universe = [series(bars, seed) for seed in range(symbols)]
+    t_old, old = run(legacy.td9_loop, universe)
+    t_new, new = run(td9_backtest, universe)
+    assert old == new, 'sonuçlar farklı'
+    signals = sum(r[1] for r in new)
+    print(f"{symbols} sembol × {bars} bar, {signals} sinyal (iki yön), sonuçlar aynı")
+    print(f"eski döngü  : {t_old * 1000:8.1f} ms")
+    print(f"td9_backtest: {t_new * 1000:8.1f} ms  ({t_old / t_new:.1f}x)")
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:]))
@@ -12,61 +12,236 @@ DÜZELTMELER:
 """
 
 import threading, time, json, queue, webbrowser
+from collections import deque
 from datetime import datetime
+from itertools import chain, islice
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from flask import Flask, Response, render_template_string, request
+from trade_stats import RunningStats
+from journal import Journal
+from price_feed import make_feed, PriceRefresher
 
 try:
-    import ccxt, pandas as pd
+    import ccxt, numpy as np, pandas as pd
+    from indicators import heiken_ashi_arrays, td_setup_counts, TDState
+    from ohlcv_store import default_store, ccxt_fetcher
+    from backtest import td9_backtest, sweep_store, sweep_summary
+    from scan_pool import summarize, pool_iter
+    from scan_cache import ScanCache, reprice
+    import levels
     DEPS_OK = True
 except ImportError:
     DEPS_OK = False
 
+try:
+    import async_fetch
+    ASYNC_OK = async_fetch.ASYNC_OK
+except ImportError:
+    ASYNC_OK = False
+
+# ============================================================================
+# LOG HALKASI
+# ============================================================================
+class LogRing:
+    """
+    Sabit kapasiteli halka tampon: O(1) ekleme, imleç (cursor) ile okuma.
+    İmleç, şimdiye kadar eklenen satır sayısıdır; since(c) c'den sonraki
+    satırları (tampondan taşanlar hariç) ve yeni imleci döndürür.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.buf      = [None] * capacity
+        self.n        = 0
+        self._lock    = threading.Lock()
+
+    def append(self, entry):
+        with self._lock:
+            self.buf[self.n % self.capacity] = entry
+            self.n += 1
+            return self.n
+
+    def since(self, cursor):
+        """(cursor sonrası satırlar, yeni imleç); geçersiz imleçte tüm tampon"""
+        with self._lock:
+            first = max(0, self.n - self.capacity)
+            if cursor is None or not first <= cursor <= self.n:
+                cursor = first
+            return [self.buf[i % self.capacity] for i in range(cursor, self.n)], self.n
+
+    def tail(self, k):
+        """(son k satır, imleç) — eskiden yeniye"""
+        return self.since(max(0, self.n - min(k, self.capacity)))
+
+    def read(self, cursor=None, k=None):
+        """/state için {'cursor', 'entries'}: cursor verilirse sonrası, yoksa son k satır"""
+        entries, cursor = self.since(cursor) if k is None else self.tail(k)
+        return {'cursor': cursor, 'entries': entries}
+
+    def __len__(self):
+        return min(self.n, self.capacity)
+
+
 # ============================================================================
 # PAPER TRADING
 # ============================================================================
 class PaperTrading:
-    def __init__(self, balance=50000):
+    """
+    Kağıt hesap. `positions` yalnızca açık pozisyonları tutar, kapananlar
+    `closed` listesine taşınır. `by_sym` sembol → açık anahtarlar indeksi,
+    `bands` sembol → (alt, üst) tetik eşikleri: fiyat bandın içindeyse
+    TP/SL kontrolü atlanır. Değerleme açık pozisyon sayısıyla orantılı.
+    İstatistikler kapanışta `tstats` üzerinde artımlı güncellenir.
+
+    Her durum değişikliği bir olaydır (open / close) ve _apply() ile
+    uygulanır; `journal` verilirse olaylar günlüğe yazılır ve açılışta
+    aynı yoldan yeniden oynatılır. Fiyat değerlemesi (cur / pnl) olay
+    değildir: günlüğe yazılmaz, açılıştan sonraki ilk fiyatla yeniden
+    hesaplanır.
+    """
+    STATS_WINDOWS = (50,)
+
+    def __init__(self, balance=50000, windows=STATS_WINDOWS, journal=None, name='web'):
         self.balance   = balance
         self.initial   = balance
         self.positions = {}
         self.closed    = []
+        self.by_sym    = {}
+        self.bands     = {}
+        self.tstats    = RunningStats(balance, windows)
+        self.journal   = journal
+        self.name      = name
         self._lock     = threading.Lock()
+        self._snap_closed = []          # eski biçimli görüntüden devralınan kapalı işlemler
+        if journal is not None:
+            self._restore()
+
+    # ── Açık pozisyon indeksi ──
+    def _reband(self, sym):
+        """Sembolün açık pozisyonlarından tetik bandını yeniden kurar (lock içinde)"""
+        keys = self.by_sym.get(sym)
+        if not keys:
+            self.by_sym.pop(sym, None)
+            self.bands.pop(sym, None)
+            return
+        lo, hi = float('-inf'), float('inf')
+        for key in keys:
+            p = self.positions[key]
+            # long: fiyat <= sl ya da >= tp; short: fiyat <= tp ya da >= sl
+            low, high = (p['sl'], p['tp']) if p['direction'] == 'long' else (p['tp'], p['sl'])
+            lo, hi = max(lo, low), min(hi, high)
+        self.bands[sym] = (lo, hi)
+
+    def is_open(self, key):
+        return key in self.positions
 
+    def open_count(self):
+        return len(self.positions)
+
+    def open_symbols(self):
+        with self._lock:
+            return list(self.by_sym)
+
+    def open_positions(self):
+        """Açık pozisyonların anlık kopyası: [(anahtar, pozisyon), ...]"""
+        with self._lock:
+            return list(self.positions.items())
+
+    # ── Olaylar ve günlük ──
+    def _apply(self, kind, e):
+        """Olayı bellekteki duruma uygular (canlı yol ve yeniden oynatma, lock içinde)"""
+        if kind == 'open':
+            key, p = e['key'], e['pos']
+            self.positions[key] = p
+            self.by_sym.setdefault(p['sym'], set()).add(key)
+            self._reband(p['sym'])
+        elif kind == 'update':          # eski günlüklerdeki değerleme olayları
+            self._mark(e['sym'], e['price'])
+        elif kind == 'close':
+            rec = e['rec']
+            self.positions.pop(e['key'], None)
+            self.by_sym.get(rec['sym'], set()).discard(e['key'])
+            self._reband(rec['sym'])
+            self.closed.append(rec)
+            self.tstats.add(rec['pnl'], rec['pnl_pct'], rec.get('hold', 0), rec['size'], rec['sym'])
+        if 'balance' in e:
+            self.balance = e['balance']
+
+    def _mark(self, sym, price):
+        """Sembolün açık pozisyonlarını fiyata göre değerler"""
+        for key in self.by_sym.get(sym, ()):
+            p = self.positions[key]
+            pnl = (price - p['entry']) * p['qty'] if p['direction'] == 'long' else (p['entry'] - price) * p['qty']
+            p['cur']     = price
+            p['pnl']     = pnl
+            p['pnl_pct'] = pnl / p['size'] * 100
+
+    def _event(self, kind, e):
+        """Olayı uygular, günlüğe ekler; sırası gelince anlık görüntü yazar (lock içinde)"""
+        self._apply(kind, e)
+        if self.journal is not None and self.journal.append(self.name, kind, e):
+            self.journal.snapshot(self.name, self._state())
+
+    def _state(self):
+        """Anlık görüntü: bakiye + açık pozisyonlar (kapalılar 'close' olaylarında kalır)"""
+        return {'balance': self.balance, 'positions': self.positions, 'closed': self._snap_closed}
+
+    def _restore(self):
+        """Günlükteki kapanış geçmişi + son anlık görüntü + sonraki olaylar"""
+        state, history, events = self.journal.load(self.name)
+        with self._lock:
+            if state:
+                # Eski biçimli görüntülerin kapalı listesi olduğu gibi taşınır (artık büyümez)
+                self._snap_closed = state.get('closed', [])
+                for rec in self._snap_closed:
+                    self._apply('close', {'key': None, 'rec': rec})
+            for kind, e in history:
+                if kind == 'close':
+                    self._apply('close', {'key': None, 'rec': e['rec']})
+            if state:
+                for key, p in state['positions'].items():
+                    self._apply('open', {'key': key, 'pos': p})
+                self.balance = state['balance']
+            for kind, e in events:
+                self._apply(kind, e)
+
+    # ── İşlemler ──
     def open_trade(self, sym, price, size=500, winrate=0, direction='long'):
         with self._lock:
             key = f"{sym}_{direction}"
-            if key in self.positions and self.positions[key]['status'] == 'open':
+            if key in self.positions:
                 return False, f"Zaten açık {direction}"
             if self.balance < size:
                 return False, f"Bakiye yetersiz ({self.balance:.0f})"
             qty = size / price
             tp  = price * 1.20 if direction == 'long' else price * 0.80
             sl  = price * 0.95 if direction == 'long' else price * 1.05
-            self.positions[key] = {
+            self._event('open', {'key': key, 'balance': self.balance - size, 'pos': {
                 'sym': sym, 'direction': direction,
                 'entry': price, 'qty': qty, 'size': size,
                 'tp': tp, 'sl': sl,
                 'cur': price, 'pnl': 0.0, 'pnl_pct': 0.0,
                 'winrate': winrate, 'status': 'open',
-                'time': datetime.now().strftime('%H:%M:%S')
-            }
-            self.balance -= size
+                'time': datetime.now().strftime('%H:%M:%S'), 'opened': time.time()
+            }})
             dir_label = 'LONG' if direction == 'long' else 'SHORT'
             return True, f"{dir_label} {sym} @ {price:.6f} [{size:.0f} USDT | WR:{winrate:.1f}%]"
 
     def update_price(self, sym, price):
         closed = []
-        for d in ('long', 'short'):
-            key = f"{sym}_{d}"
-            with self._lock:
-                if key not in self.positions or self.positions[key]['status'] != 'open':
+        with self._lock:
+            keys = self.by_sym.get(sym)
+            if not keys:
+                return closed
+            self._mark(sym, price)
+            lo, hi = self.bands[sym]
+            if lo < price < hi:
+                return closed
+            for d in ('long', 'short'):
+                key = f"{sym}_{d}"
+                p = self.positions.get(key)
+                if p is None:
                     continue
-                p = self.positions[key]
-                p['cur'] = price
-                pnl = (price - p['entry']) * p['qty'] if d == 'long' else (p['entry'] - price) * p['qty']
-                p['pnl']     = pnl
-                p['pnl_pct'] = pnl / p['size'] * 100
                 reason = None
                 if d == 'long':
                     if price <= p['sl']:  reason = 'STOP LOSS'
@@ -75,19 +250,60 @@ class PaperTrading:
                     if price >= p['sl']:  reason = 'STOP LOSS'
                     elif price <= p['tp']: reason = 'TAKE PROFIT'
                 if reason:
-                    ev = price * p['qty'] if d == 'long' else p['size'] + pnl
-                    self.balance += max(ev, 0)
-                    p['status'] = 'closed'
-                    rec = {**p, 'exit': price, 'reason': reason,
-                           'close_time': datetime.now().strftime('%H:%M:%S')}
-                    self.closed.append(rec)
-                    closed.append(rec)
+                    closed.append(self._close(key, price, reason))
+        return closed
+
+    def update_bars(self, bars):
+        """
+        Mum içi TP/SL: bars {sym: (open, high, low, close)} — bir grup 1m
+        kline ya da tik birikimi. İlgili tüm açık pozisyonlar tek vektörel
+        geçişte high/low'a karşı denenir; dolum tetik seviyesinden (bar
+        seviyenin ötesinde açıldıysa açılıştan) yazılır. Aynı barda TP ve
+        SL birlikte kesilirse TP sayılır (td9_backtest ile aynı kural).
+        Kalanlar kapanışla değerlenir.
+
+        Returns:
+            kapanan kayıtlar
+        """
+        closed = []
+        with self._lock:
+            keys = [k for sym in bars if sym in self.by_sym for k in self.by_sym[sym]]
+            if not keys:
+                return closed
+            P = [self.positions[k] for k in keys]
+            o, h, l, c = np.array([bars[p['sym']] for p in P], dtype=float).T
+            is_long = np.array([p['direction'] == 'long' for p in P])
+            tp = np.array([p['tp'] for p in P])
+            sl = np.array([p['sl'] for p in P])
+            tp_hit  = np.where(is_long, h >= tp, l <= tp)
+            sl_hit  = np.where(is_long, l <= sl, h >= sl)
+            tp_fill = np.where(is_long, np.maximum(tp, o), np.minimum(tp, o))
+            sl_fill = np.where(is_long, np.minimum(sl, o), np.maximum(sl, o))
+
+            for sym in {p['sym'] for p in P}:
+                self._mark(sym, float(bars[sym][3]))
+            for i in np.flatnonzero(tp_hit | sl_hit):
+                if tp_hit[i]:
+                    closed.append(self._close(keys[i], float(tp_fill[i]), 'TAKE PROFIT'))
+                else:
+                    closed.append(self._close(keys[i], float(sl_fill[i]), 'STOP LOSS'))
         return closed
 
+    def _close(self, key, price, reason):
+        """Pozisyonu `price`'tan kapatır, kaydı döner (lock içinde)"""
+        p   = self.positions[key]
+        pnl = (price - p['entry']) * p['qty'] if p['direction'] == 'long' else (p['entry'] - price) * p['qty']
+        ev  = price * p['qty'] if p['direction'] == 'long' else p['size'] + pnl
+        rec = {**p, 'cur': price, 'pnl': pnl, 'pnl_pct': pnl / p['size'] * 100,
+               'status': 'closed', 'exit': price, 'reason': reason,
+               'close_time': datetime.now().strftime('%H:%M:%S'),
+               'hold': time.time() - p['opened']}
+        self._event('close', {'key': key, 'rec': rec, 'balance': self.balance + max(ev, 0)})
+        return rec
+
     def portfolio_value(self, prices):
         total = self.balance
-        for key, p in self.positions.items():
-            if p['status'] != 'open': continue
+        for key, p in self.open_positions():
             pr = prices.get(p['sym'], p['entry'])
             if p['direction'] == 'long':
                 total += p['qty'] * pr
@@ -95,21 +311,13 @@ class PaperTrading:
                 total += p['size'] + (p['entry'] - pr) * p['qty']
         return total
 
-    def stats(self):
-        if not self.closed:
-            return {'total': 0, 'wins': 0, 'losses': 0, 'wr': 0, 'pnl': 0, 'kf': 0}
-        wins     = [t for t in self.closed if t['pnl'] > 0]
-        losses   = [t for t in self.closed if t['pnl'] <= 0]
-        win_pnl  = sum(t['pnl'] for t in wins)
-        loss_pnl = sum(abs(t['pnl']) for t in losses)
-        return {
-            'total':   len(self.closed),
-            'wins':    len(wins),
-            'losses':  len(losses),
-            'wr':      len(wins) / len(self.closed) * 100,
-            'pnl':     sum(t['pnl'] for t in self.closed),
-            'kf':      win_pnl / loss_pnl if loss_pnl else 0,
-        }
+    def stats(self, window=None):
+        """Koşan toplamlardan özet (window: son N işlem, STATS_WINDOWS'tan biri)"""
+        with self._lock:
+            s = self.tstats.summary(window)
+        # Başabaş kapanışlar kaybeden sayılır
+        s['losses'] = s['total'] - s['wins']
+        return s
 
 # ============================================================================
 # SCANNER
@@ -121,25 +329,76 @@ class Scanner:
     TRADE_SIZE = 500
     MAX_POS    = 15
     MAX_NEW    = 5
+    ASYNC_FETCH = True                    # ccxt.async_support varsa asenkron çekme hattı
+    PROCESS_POOL = False                  # True → analiz paylaşılan süreç havuzunda; havuz işçileri
+                                          # durumsuz, artımlı TDState yalnızca varsayılan thread/async yolunda
+    POOL_WORKERS = None                   # None → os.cpu_count()
+    DELTA_KEEP   = 5000                   # /state?since= için saklanan son satır deltası
+    LOG_FLUSH_SEC = 0.1                   # log satırları SSE'ye en geç bu aralıkla toplu gider
+    LOG_BATCH     = 100                   # bu kadar satır birikince beklemeden gönderilir
+    JOURNAL       = True                  # hesap + son tarama SQLite günlüğünde (yeniden başlatmada korunur)
+    PRICE_FEED    = 'kline'               # 'kline' (açık sembollerin 1m mumları, mum içi TP/SL) | 'stream'
+                                          # (miniTicker ws) | 'poll' (toplu yoklama) | None (30 sn); ws yoksa yoklama
+    FEED_POLL_SEC = 5                     # toplu fetch_tickers yoklama aralığı
+    POS_PUSH_SEC  = 2                     # kapanma yokken pozisyon (anlık PnL) SSE'si en sık bu aralıkla
+    SCAN_CACHE    = 2048                  # son kapanmış mumu değişmeyen sembollerin özet önbelleği (0 → kapalı)
 
     def __init__(self):
-        self.pt          = PaperTrading()
+        self.journal     = Journal() if self.JOURNAL else None
+        self.pt          = PaperTrading(journal=self.journal)
         self.exchange    = None
+        self.refresher   = PriceRefresher()   # açık sembollerin toplu fiyat isteği
         self.symbols     = None
         self.buy_sigs    = {}
         self.sell_sigs   = {}
-        self.all_results = []
+        self.rows        = {}             # 'SYM:BUY' / 'SYM:SELL' → sinyal satırı
+        self.seq         = 0              # son satır deltasının sıra numarası
+        self.deltas      = deque(maxlen=self.DELTA_KEEP)
+        self._rows_lock  = threading.Lock()
+        self.td_states   = {}             # sembol → artımlı HA/TD9 durumu
+        self.scan_cache  = ScanCache('1h', self.SCAN_CACHE) if DEPS_OK and self.SCAN_CACHE else None
+        self.store       = default_store() if DEPS_OK else None
         self.prices      = {}
+        self.feed        = None           # canlı fiyat akışı (price_feed)
+        self._pos_push   = 0              # son 'positions' push zamanı
         self.is_scanning = False
         self.is_running  = False
         self.force_scan  = False          # ← YENİ: HEMEN TARA bayrağı
         self._scan_lock  = threading.Lock()
         self.scan_count  = 0
         self.last_scan   = 0
-        self.logs        = []
-        self.scan_logs   = []
+        self.logs        = LogRing(500)
+        self.scan_logs   = LogRing(2000)
+        self._log_sent   = {'log': 0, 'scanlog': 0}   # SSE'ye gönderilen son imleçler
+        self._log_wake   = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._flusher    = None
         self.clients     = []
         self._lock       = threading.Lock()
+        if self.journal is not None:
+            self.restore_scan()
+
+    # ─── Günlük ──────────────────────────────────────────────────────
+    def save_scan(self):
+        """Son tarama sonuçları; yeniden başlatmada hemen tam tarama gerekmesin"""
+        if self.journal is None: return
+        self.journal.put(f'{self.pt.name}.scan', {
+            'scan_count': self.scan_count, 'last_scan': self.last_scan,
+            'buy': list(self.buy_sigs.values()), 'sell': list(self.sell_sigs.values()),
+            'prices': dict(self.prices)})
+
+    def restore_scan(self):
+        d = self.journal.get(f'{self.pt.name}.scan')
+        if not d: return
+        self.scan_count = d['scan_count']
+        self.last_scan  = d['last_scan']
+        self.prices.update(d['prices'])
+        for r in d['buy']:
+            self.buy_sigs[r['sym']] = r
+            self.set_row(r, 'BUY')
+        for r in d['sell']:
+            self.sell_sigs[r['sym']] = r
+            self.set_row(r, 'SELL')
 
     # ─── SSE ─────────────────────────────────────────────────────────
     def push(self, event, data):
@@ -151,17 +410,72 @@ class Scanner:
                 except: dead.append(q)
             for q in dead: self.clients.remove(q)
 
+    # ─── Satır deltaları (Sinyaller + Backtest sekmeleri) ────────────
+    def _emit(self, op, key=None, row=None):
+        """Satır tablosuna tek delta uygular, sıra numarası verir ve yayınlar.
+        op: add | update | remove | reset (tarama başı, tüm satırlar silinir)"""
+        with self._rows_lock:
+            if op == 'reset':
+                self.rows.clear()
+            elif op == 'remove':
+                self.rows.pop(key, None)
+            else:
+                self.rows[key] = row
+            self.seq += 1
+            d = {'seq': self.seq, 'op': op, 'key': key, 'row': row}
+            self.deltas.append(d)
+            self.push('row', d)
+
+    def set_row(self, r, kind):
+        """Sembol + yön (BUY/SELL) anahtarlı satırı ekler ya da günceller"""
+        key = f"{r['sym']}:{kind}"
+        self._emit('update' if key in self.rows else 'add', key, {**r, '_row_type': kind})
+
+    def rows_since(self, since=None):
+        """since sonrası deltalar; tampon yetmiyorsa (ya da since yoksa) tüm satırlar"""
+        with self._rows_lock:
+            first = self.seq - len(self.deltas)          # tampondaki ilk deltanın bir öncesi
+            if since is not None and first <= since <= self.seq:
+                return {'seq': self.seq, 'deltas': list(islice(self.deltas, since - first, None))}
+            return {'seq': self.seq, 'rows': list(self.rows.values())}
+
+    # ─── Log ─────────────────────────────────────────────────────────
     def add_log(self, msg, kind='normal'):
-        entry = {'t': datetime.now().strftime('%H:%M:%S'), 'msg': msg, 'kind': kind}
-        self.logs = self.logs[-500:]
-        self.logs.append(entry)
-        self.push('log', entry)
+        self._log('log', self.logs, msg, kind)
 
     def add_scan_log(self, msg, kind='normal'):
+        self._log('scanlog', self.scan_logs, msg, kind)
+
+    def _log(self, event, ring, msg, kind):
+        """Halkaya ekler; SSE gönderimi toplu (LOG_FLUSH_SEC / LOG_BATCH)"""
         entry = {'t': datetime.now().strftime('%H:%M:%S'), 'msg': msg, 'kind': kind}
-        self.scan_logs = self.scan_logs[-2000:]
-        self.scan_logs.append(entry)
-        self.push('scanlog', entry)
+        n = ring.append(entry)
+        if n - self._log_sent[event] >= self.LOG_BATCH:
+            self.flush_logs()
+            return
+        if self._flusher is None:
+            with self._flush_lock:
+                if self._flusher is None:
+                    self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+                    self._flusher.start()
+        self._log_wake.set()
+
+    def _flush_loop(self):
+        while True:
+            self._log_wake.wait()
+            time.sleep(self.LOG_FLUSH_SEC)
+            self._log_wake.clear()
+            self.flush_logs()
+
+    def flush_logs(self):
+        """Gönderilmemiş log satırlarını olay başına tek mesajda yayınlar:
+        {'cursor': imleç, 'entries': [...]} — imleç son satırdan sonraki konum"""
+        with self._flush_lock:
+            for event, ring in (('log', self.logs), ('scanlog', self.scan_logs)):
+                entries, cursor = ring.since(self._log_sent[event])
+                if entries:
+                    self._log_sent[event] = cursor
+                    self.push(event, {'cursor': cursor, 'entries': entries})
 
     # ─── Bağlantı ────────────────────────────────────────────────────
     def connect(self):
@@ -201,161 +515,182 @@ class Scanner:
 
     # ─── Algoritma ───────────────────────────────────────────────────
     def heiken_ashi(self, df):
-        ha_c = (df['open'] + df['high'] + df['low'] + df['close']) / 4
-        ha_o = [(df['open'].iloc[0] + df['close'].iloc[0]) / 2]
-        for i in range(1, len(df)):
-            ha_o.append((ha_o[-1] + ha_c.iloc[i - 1]) / 2)
+        ha_o, ha_c, _, _ = heiken_ashi_arrays(df['open'].values, df['high'].values,
+                                              df['low'].values, df['close'].values)
         df = df.copy()
-        df['ha_c'] = ha_c.values
+        df['ha_c'] = ha_c
         df['ha_o'] = ha_o
         return df
 
     def td_sequential(self, df):
         df  = self.heiken_ashi(df)
-        ha  = df['ha_c'].values
-        n   = len(ha)
-        buy = [0] * n
-        sell= [0] * n
-        bc = sc = 0
-        for i in range(n):
-            bc = min(bc + 1, 9) if i >= 4 and ha[i] < ha[i - 4] else 0
-            sc = min(sc + 1, 9) if i >= 4 and ha[i] > ha[i - 4] else 0
-            buy[i] = bc; sell[i] = sc
-        df['buy9']  = buy
-        df['sell9'] = sell
+        df['buy9'], df['sell9'] = td_setup_counts(df['ha_c'].values, cap=9)
         return df
 
     def backtest(self, df, sig_type, tp=0.20, sl=0.05, fwd=20):
-        col    = 'buy9' if sig_type == 'buy' else 'sell9'
-        closes = df['close'].values
-        highs  = df['high'].values
-        lows   = df['low'].values
-        setups = df[col].values
-        n      = len(df)
-        total = wins = 0
-        for i in range(4, n - fwd - 1):
-            if int(setups[i]) != 9: continue
-            entry = closes[i]
-            if entry <= 0: continue
-            tp_p = entry * (1 + tp) if sig_type == 'buy' else entry * (1 - tp)
-            sl_p = entry * (1 - sl) if sig_type == 'buy' else entry * (1 + sl)
-            total += 1; outcome = None
-            for j in range(i + 1, min(i + fwd + 1, n)):
-                h, l = highs[j], lows[j]
-                if sig_type == 'buy':
-                    if h >= tp_p: outcome = 'win';  break
-                    if l <= sl_p: outcome = 'loss'; break
-                else:
-                    if l <= tp_p: outcome = 'win';  break
-                    if h >= sl_p: outcome = 'loss'; break
-            if outcome == 'win': wins += 1
-            elif outcome is None:
-                fin = closes[min(i + fwd, n - 1)]
-                if sig_type == 'buy'  and fin > entry: wins += 1
-                if sig_type == 'sell' and fin < entry: wins += 1
-        return float(wins / total * 100 if total else 0.0), int(total), int(wins)
+        col = 'buy9' if sig_type == 'buy' else 'sell9'
+        return td9_backtest(df['close'].values, df['high'].values, df['low'].values,
+                            df[col].values, sig_type, tp, sl, fwd)
 
     def find_support(self, df, lb=100, tol=0.015):
-        lows = df['low'].values[-lb:]
-        n    = len(lows)
-        pivs = [lows[i] for i in range(2, n - 2)
-                if lows[i] < lows[i-1] and lows[i] < lows[i-2]
-                and lows[i] < lows[i+1] and lows[i] < lows[i+2]]
-        if not pivs:
-            sup = float(min(lows)); tc = 1
-        else:
-            best = pivs[0]; btc = 1
-            for ref in pivs:
-                tc = sum(1 for l in pivs if abs(l - ref) / ref <= tol)
-                if tc > btc: btc = tc; best = ref
-            sup = best; tc = btc
-        price = float(df['close'].iloc[-1])
+        sup, tc = levels.support(df['low'].values, lb, tol)
+        price   = float(df['close'].iloc[-1])
         return float(sup), int(tc), float((price - sup) / sup * 100)
 
     def find_resistance(self, df, lb=100, tol=0.015):
-        highs = df['high'].values[-lb:]
-        n     = len(highs)
-        pivs  = [highs[i] for i in range(2, n - 2)
-                 if highs[i] > highs[i-1] and highs[i] > highs[i-2]
-                 and highs[i] > highs[i+1] and highs[i] > highs[i+2]]
-        if not pivs:
-            res = float(max(highs)); tc = 1
-        else:
-            best = pivs[0]; btc = 1
-            for ref in pivs:
-                tc = sum(1 for h in pivs if abs(h - ref) / ref <= tol)
-                if tc > btc: btc = tc; best = ref
-            res = best; tc = btc
-        price = float(df['close'].iloc[-1])
+        res, tc = levels.resistance(df['high'].values, lb, tol)
+        price   = float(df['close'].iloc[-1])
         return float(res), int(tc), float((res - price) / price * 100)
 
-    def scan_one(self, symbol):
+    def load_rows(self, symbol, fetched=None):
+        """Son 1000 mum (n × 6). Mumlar yerel depodan gelir; ağdan sadece son
+        bardan sonrası çekilir. `fetched` verilirse (asenkron hat) ağa gidilmez,
+        satırlar depoya eklenir."""
+        if fetched is None:
+            rows = self.store.update('binance', symbol, '1h',
+                                     ccxt_fetcher(self.exchange, symbol, '1h'), page_size=1000)
+        else:
+            rows = self.store.ingest('binance', symbol, '1h', fetched)
+        return rows[-1000:]
+
+    def load_state(self, symbol, fetched=None):
+        """
+        Sembolün TD9 durumunu yalnızca yeni mumlarla günceller.
+        Artımlı durumun sahibi thread / asenkron yoldur (scan_one);
+        PROCESS_POOL modunda işçiler durumsuzdur ve td_states güncellenmez.
+        """
+        st = self.td_states.get(symbol)
+        if st is None:
+            st = self.td_states[symbol] = TDState(cap=9, maxlen=1000)
+        rows = self.load_rows(symbol, fetched)
+        if len(st) >= 2:
+            # Son kapanmış bar örtüşme kontrolü için tekrar verilir
+            new = rows[rows[:, 0] >= st.ts[-2]]
+            if len(new) < len(rows) and st.update(new):
+                return st
+        st.reset()
+        st.update(rows)
+        return st
+
+    def scan_one(self, symbol, fetched=None):
         try:
-            ohlcv = self.exchange.fetch_ohlcv(symbol, '1h', limit=1000)
-            if not ohlcv or len(ohlcv) < 50: return None
-            df = pd.DataFrame(ohlcv, columns=['timestamp','open','high','low','close','volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
-            df = self.td_sequential(df)
-
-            price   = float(df['close'].iloc[-1])
-            buy9    = int(df['buy9'].iloc[-1])
-            sell9   = int(df['sell9'].iloc[-1])
-            ha_bull = float(df['ha_c'].iloc[-1]) > float(df['ha_o'].iloc[-1])
-
-            bwr = btot = bwins = swr = stot = swins = 0
-            if buy9  == 9: bwr, btot, bwins = self.backtest(df, 'buy')
-            if sell9 == 9: swr, stot, swins = self.backtest(df, 'sell')
-
-            sup,  stc,  sdist = self.find_support(df)
-            res,  rtc,  rdist = self.find_resistance(df)
-
-            bwr_ok  = bool(bwr  >= self.WR_THRESH)
-            swr_ok  = bool(swr  >= self.WR_THRESH)
-            supp_ok = bool(0.0 < sdist <= self.SUPP_MAX)
-            res_ok  = bool(0.0 < rdist <= self.SUPP_MAX)
-
-            return {
-                'sym': symbol.split('/')[0], 'full': symbol,
-                'price': float(price), 'ha_bull': bool(ha_bull),
-                'buy9': int(buy9),   'sell9': int(sell9),
-                'bwr': float(bwr),   'btot': int(btot),  'bwins': int(bwins), 'bwr_ok': bwr_ok,
-                'swr': float(swr),   'stot': int(stot),  'swins': int(swins), 'swr_ok': swr_ok,
-                'sup': float(sup),   'stc': int(stc),    'sdist': float(sdist), 'supp_ok': supp_ok,
-                'res': float(res),   'rtc': int(rtc),    'rdist': float(rdist), 'res_ok': res_ok,
-                'buy_passed':  bool(buy9 == 9 and bwr_ok and supp_ok),
-                'sell_passed': bool(sell9 == 9 and swr_ok and res_ok),
-                'days': float(round(len(df) / 24, 1)),
-            }
+            st = self.load_state(symbol, fetched)
+            if len(st) < 50: return None
+            o, h, l, c = st.ohlcv[:, :4].T
+            return self.cache_result(symbol, summarize(st.ts, o, h, l, c, st.ha_o, st.ha_c,
+                                                       st.buy, st.sell))
         except: return None
 
+    def cache_result(self, symbol, s):
+        """Özeti önbelleğe yazar, sinyal satırını döndürür"""
+        if self.scan_cache is not None:
+            self.scan_cache.put(symbol, s)
+        return self.make_result(symbol, s)
+
+    def cached_results(self, symbols):
+        """
+        Son kapanmış mumu değişmemiş semboller: saklı özet + tek toplu istekle
+        güncel fiyat. Fiyatı alınamayan semboller yeniden taranır.
+
+        Returns:
+            ([(sembol, satır, None), ...], taranacak semboller)
+        """
+        if self.scan_cache is None:
+            return [], symbols
+        cached = {}
+        for sym in symbols:
+            s = self.scan_cache.get(sym)
+            if s is not None:
+                cached[sym] = s
+        if not cached:
+            return [], symbols
+        prices = self.refresher.refresh(self.exchange, [sym.split('/')[0] for sym in cached],
+                                        fallback=False)
+        hits = []
+        for sym, s in cached.items():
+            px = prices.get(sym.split('/')[0])
+            if px:
+                hits.append((sym, self.make_result(sym, reprice(s, px)), None))
+        done = {h[0] for h in hits}
+        return hits, [sym for sym in symbols if sym not in done]
+
+    def make_result(self, symbol, s):
+        """scan_pool özeti → sinyal satırı (eşikler burada uygulanır)"""
+        bwr_ok  = bool(s['bwr']  >= self.WR_THRESH)
+        swr_ok  = bool(s['swr']  >= self.WR_THRESH)
+        supp_ok = bool(0.0 < s['sdist'] <= self.SUPP_MAX)
+        res_ok  = bool(0.0 < s['rdist'] <= self.SUPP_MAX)
+        buy9, sell9 = s['buy9'], s['sell9']
+        return {
+            'sym': symbol.split('/')[0], 'full': symbol,
+            'price': float(s['price']), 'ha_bull': bool(s['ha_c'] > s['ha_o']),
+            'buy9': int(buy9),        'sell9': int(sell9),
+            'bwr': float(s['bwr']),   'btot': int(s['btot']), 'bwins': int(s['bwins']), 'bwr_ok': bwr_ok,
+            'swr': float(s['swr']),   'stot': int(s['stot']), 'swins': int(s['swins']), 'swr_ok': swr_ok,
+            'sup': float(s['sup']),   'stc': int(s['stc']),   'sdist': float(s['sdist']), 'supp_ok': supp_ok,
+            'res': float(s['res']),   'rtc': int(s['rtc']),   'rdist': float(s['rdist']), 'res_ok': res_ok,
+            'buy_passed':  bool(buy9 == 9 and bwr_ok and supp_ok),
+            'sell_passed': bool(sell9 == 9 and swr_ok and res_ok),
+            'days': float(round(s['n'] / 24, 1)),
+        }
+
     # ─── Fiyat & TP/SL ───────────────────────────────────────────────
     def fetch_live_prices(self):
-        syms = set(p['sym'] for p in self.pt.positions.values() if p['status'] == 'open')
-        if not syms or not self.exchange: return
-        for sym in syms:
-            try:
-                t = self.exchange.fetch_ticker(f"{sym}/USDT")
-                self.prices[sym] = float(t['last'])
-            except: pass
-
-    def check_tpsl(self):
-        syms = set(p['sym'] for p in self.pt.positions.values() if p['status'] == 'open')
-        any_closed = False
+        """Açık sembollerin fiyatları tek toplu istekle (hata olursa sembol başına)"""
+        self.prices.update(self.fetch_open_tickers())
+
+    def fetch_open_tickers(self):
+        return self.refresher.refresh(self.exchange, self.pt.open_symbols())
+
+    def start_feed(self):
+        """Canlı fiyat akışını başlatır (PRICE_FEED=None → eski 30 sn yoklama)"""
+        if self.feed is not None or not self.PRICE_FEED: return
+        self.feed = make_feed(self.PRICE_FEED, self.on_prices,
+                              fetch=self.fetch_open_tickers, interval=self.FEED_POLL_SEC,
+                              on_bars=self.on_bars, symbols=self.pt.open_symbols)
+        if self.feed is None: return
+        self.feed.start()
+        self.add_log(f'Canlı fiyat akışı: {self.feed.name}')
+
+    def stop_feed(self):
+        if self.feed is not None:
+            self.feed.stop()
+            self.feed = None
+
+    def on_prices(self, prices):
+        """Akıştan gelen fiyatlar: açık pozisyonlar anında TP/SL kontrolünden geçer"""
+        self.prices.update(prices)
+        syms = [s for s in self.pt.open_symbols() if s in prices]
+        if syms:
+            self.check_tpsl(syms)
+
+    def on_bars(self, bars):
+        """Kline akışından OHLC grupları: mum içi TP/SL tek vektörel geçişte"""
+        self.prices.update({s: b[3] for s, b in bars.items()})
+        self.report_closed(self.pt.update_bars(bars))
+
+    def check_tpsl(self, syms=None):
+        syms = self.pt.open_symbols() if syms is None else syms
+        closed = []
         for sym in syms:
             if sym not in self.prices: continue
-            closed = self.pt.update_price(sym, self.prices[sym])
-            for c in closed:
-                any_closed = True
-                icon = '💰' if c['pnl'] > 0 else '🔴'
-                dir_l = c['direction'].upper()
-                self.add_log(
-                    f"{icon} {dir_l} KAPANDI: {c['sym']} | {c['reason']} | "
-                    f"{c['pnl_pct']:+.2f}% | {c['size']:.0f} USDT",
-                    'signal' if c['pnl'] > 0 else 'short')
-        self.push('positions', self.positions_data())
-        # ── DÜZELTME: kapanma varsa kapalı işlemler de hemen güncellenir ──
-        if any_closed:
+            closed += self.pt.update_price(sym, self.prices[sym])
+        self.report_closed(closed)
+
+    def report_closed(self, closed):
+        for c in closed:
+            icon = '💰' if c['pnl'] > 0 else '🔴'
+            dir_l = c['direction'].upper()
+            self.add_log(
+                f"{icon} {dir_l} KAPANDI: {c['sym']} | {c['reason']} | "
+                f"{c['pnl_pct']:+.2f}% | {c['size']:.0f} USDT",
+                'signal' if c['pnl'] > 0 else 'short')
+        # Kapanma varsa üç sekme hemen; yoksa anlık PnL POS_PUSH_SEC'de bir
+        now = time.time()
+        if closed or now - self._pos_push >= self.POS_PUSH_SEC:
+            self._pos_push = now
+            self.push('positions', self.positions_data())
+        if closed:
             self.push('stats',  self.stats_data())
             self.push('closed', self.closed_data())
 
@@ -379,13 +714,32 @@ class Scanner:
             self._scan_lock.release()
             self.push('status', {'text': 'Sistem hazır — sonraki tarama bekleniyor', 'scanning': False})
 
+    def _thread_results(self, symbols, fn=None):
+        """Eski yol: 15 thread ile senkron fetch + hesap (fn verilirse yalnızca fn)"""
+        with ThreadPoolExecutor(max_workers=15) as ex:
+            futs = {ex.submit(fn or self.scan_one, s): s for s in symbols}
+            for fut in as_completed(futs):
+                try:
+                    yield futs[fut], fut.result(timeout=20), None
+                except Exception as e:
+                    yield futs[fut], None, e
+
+    def _pool_results(self, symbols):
+        """Süreç havuzu modu: çekme I/O aşamasında, analiz tüm çekirdeklerde"""
+        if self.ASYNC_FETCH and ASYNC_OK:
+            loaded = async_fetch.scan_iter(symbols, self.load_rows, '1h', 1000, store=self.store)
+        else:
+            loaded = self._thread_results(symbols, self.load_rows)
+        for sym, s, err in pool_iter(loaded, workers=self.POOL_WORKERS):
+            yield sym, (self.cache_result(sym, s) if s else None), err
+
     def _do_scan(self):
         # is_scanning=True zaten run_loop'ta thread başlamadan set edildi
         # force_scan sıfırla
         self.scan_count += 1
         self.buy_sigs.clear()
         self.sell_sigs.clear()
-        self.all_results = []
+        self._emit('reset')
         sc = self.scan_count
 
         self.push('status', {'text': f'Tarama #{sc} başladı...', 'scanning': True})
@@ -396,55 +750,64 @@ class Scanner:
         total   = len(symbols)
         done    = failed = 0
 
-        with ThreadPoolExecutor(max_workers=15) as ex:
-            futs = {ex.submit(self.scan_one, s): s for s in symbols}
-            for fut in as_completed(futs):
-                sym = futs[fut]
-                done += 1
-                try:
-                    r = fut.result(timeout=20)
-                    if r:
-                        self.prices[r['sym']] = r['price']
-                        tags = []
-
-                        if r['buy9'] == 9:
-                            self.buy_sigs[r['sym']] = r
-                            self.all_results.append({**r, '_row_type': 'BUY'})
-                            wr_s    = f"WR:{r['bwr']:.0f}% ({r['bwins']}/{r['btot']})"
-                            d_s     = f"DEST:{r['sdist']:+.1f}%"
-                            verdict = 'LONG✓' if r['buy_passed'] else ('WR↓' if not r['bwr_ok'] else 'DEST↑')
-                            tags.append(f"BUY9 {wr_s} {d_s} [{verdict}]")
-
-                        if r['sell9'] == 9:
-                            self.sell_sigs[r['sym']] = r
-                            self.all_results.append({**r, '_row_type': 'SELL'})
-                            wr_s    = f"WR:{r['swr']:.0f}% ({r['swins']}/{r['stot']})"
-                            d_s     = f"RES:{r['rdist']:+.1f}%"
-                            verdict = 'SHORT✓' if r['sell_passed'] else ('WR↓' if not r['swr_ok'] else 'RES↑')
-                            tags.append(f"SELL9 {wr_s} {d_s} [{verdict}]")
-
-                        kind    = 'signal' if any('✓' in t for t in tags) else \
-                                  'short'  if tags else 'normal'
-                        tag_str = '  '.join(tags) if tags else ''
-                        ha      = '▲' if r['ha_bull'] else '▽'
-                        self.add_scan_log(
-                            f"[{done:>3}/{total}] {r['sym']:<10} ${r['price']:>14.6f}  {ha}  {tag_str}", kind)
-                    else:
-                        failed += 1
-                        self.add_scan_log(f"[{done:>3}/{total}] {sym.split('/')[0]:<10} -- VERİ YOK", 'err')
-                except Exception as e:
+        hits, symbols = self.cached_results(symbols)
+        if hits:
+            self.add_scan_log(f'Önbellek: {len(hits)} sembolde yeni mum yok, yalnızca fiyat yenilendi', 'header')
+        if self.ASYNC_FETCH and ASYNC_OK:
+            self.add_scan_log('Asenkron çekme hattı (ağırlık kovası: 1200/dk)', 'header')
+        if not symbols:
+            results = ()
+        elif self.PROCESS_POOL:
+            self.add_scan_log('Analiz süreç havuzunda (tüm çekirdekler)', 'header')
+            results = self._pool_results(symbols)
+        elif self.ASYNC_FETCH and ASYNC_OK:
+            results = async_fetch.scan_iter(symbols, self.scan_one, '1h', 1000, store=self.store)
+        else:
+            results = self._thread_results(symbols)
+
+        for sym, r, err in chain(hits, results):
+            done += 1
+            try:
+                if err is not None:
+                    raise err
+                if r:
+                    self.prices[r['sym']] = r['price']
+                    tags = []
+
+                    if r['buy9'] == 9:
+                        self.buy_sigs[r['sym']] = r
+                        self.set_row(r, 'BUY')
+                        wr_s    = f"WR:{r['bwr']:.0f}% ({r['bwins']}/{r['btot']})"
+                        d_s     = f"DEST:{r['sdist']:+.1f}%"
+                        verdict = 'LONG✓' if r['buy_passed'] else ('WR↓' if not r['bwr_ok'] else 'DEST↑')
+                        tags.append(f"BUY9 {wr_s} {d_s} [{verdict}]")
+
+                    if r['sell9'] == 9:
+                        self.sell_sigs[r['sym']] = r
+                        self.set_row(r, 'SELL')
+                        wr_s    = f"WR:{r['swr']:.0f}% ({r['swins']}/{r['stot']})"
+                        d_s     = f"RES:{r['rdist']:+.1f}%"
+                        verdict = 'SHORT✓' if r['sell_passed'] else ('WR↓' if not r['swr_ok'] else 'RES↑')
+                        tags.append(f"SELL9 {wr_s} {d_s} [{verdict}]")
+
+                    kind    = 'signal' if any('✓' in t for t in tags) else \
+                              'short'  if tags else 'normal'
+                    tag_str = '  '.join(tags) if tags else ''
+                    ha      = '▲' if r['ha_bull'] else '▽'
+                    self.add_scan_log(
+                        f"[{done:>3}/{total}] {r['sym']:<10} ${r['price']:>14.6f}  {ha}  {tag_str}", kind)
+                else:
                     failed += 1
-                    self.add_scan_log(f"[{done:>3}/{total}] {sym.split('/')[0]:<10} -- HATA", 'err')
-
-                if done % 25 == 0:
-                    self.push('progress', {'pct': done / total * 100})
-                    self.push('status', {
-                        'text': f'{done}/{total} tarandı | B:{len(self.buy_sigs)} S:{len(self.sell_sigs)}',
-                        'scanning': True})
-                    # ── Tarama sırasında da backtest + sinyal sekmesini güncelle ──
-                    if self.all_results:
-                        self.push('backtest', self.backtest_data())
-                        self.push('signals',  self.signals_data())
+                    self.add_scan_log(f"[{done:>3}/{total}] {sym.split('/')[0]:<10} -- VERİ YOK", 'err')
+            except Exception as e:
+                failed += 1
+                self.add_scan_log(f"[{done:>3}/{total}] {sym.split('/')[0]:<10} -- HATA", 'err')
+
+            if done % 25 == 0:
+                self.push('progress', {'pct': done / total * 100})
+                self.push('status', {
+                    'text': f'{done}/{total} tarandı | B:{len(self.buy_sigs)} S:{len(self.sell_sigs)}',
+                    'scanning': True})
 
         # Kaliteli sinyaller
         q_buys  = sorted([r for r in self.buy_sigs.values()  if r['buy_passed']],
@@ -460,48 +823,50 @@ class Scanner:
         # İşlem aç
         opened = 0
         for r in q_buys[:self.MAX_NEW]:
-            oc = sum(1 for p in self.pt.positions.values() if p['status'] == 'open')
-            if oc >= self.MAX_POS: break
+            if self.pt.open_count() >= self.MAX_POS: break
             ok, msg = self.pt.open_trade(r['sym'], r['price'], self.TRADE_SIZE, r['bwr'], 'long')
             r['trade_result'] = 'LONG_OK' if ok else f'ERR:{msg}'
+            self.set_row(r, 'BUY')
             self.add_log(f"{'✅ LONG AÇILDI' if ok else '❌ AÇILAMADI'}: {msg}",
                          'signal' if ok else 'err')
             if ok: opened += 1
 
         for r in q_sells[:self.MAX_NEW]:
-            oc = sum(1 for p in self.pt.positions.values() if p['status'] == 'open')
-            if oc >= self.MAX_POS: break
+            if self.pt.open_count() >= self.MAX_POS: break
             ok, msg = self.pt.open_trade(r['sym'], r['price'], self.TRADE_SIZE, r['swr'], 'short')
             r['trade_result'] = 'SHORT_OK' if ok else f'ERR:{msg}'
+            self.set_row(r, 'SELL')
             self.add_log(f"{'✅ SHORT AÇILDI' if ok else '❌ AÇILAMADI'}: {msg}",
                          'short' if ok else 'err')
             if ok: opened += 1
 
-        # ── DÜZELTME: Tüm sekmelere veri gönder ──
-        self.push('signals',   self.signals_data())
-        self.push('backtest',  self.backtest_data())
+        # ── DÜZELTME: Tüm sekmelere veri gönder (sinyal/backtest satırları delta ile gitti) ──
         self.push('positions', self.positions_data())
         self.push('stats',     self.stats_data())
         self.push('closed',    self.closed_data())
         self.push('progress',  {'pct': 100})
         self.push('status',    {'text': f'Tarama #{sc} bitti | {opened} işlem açıldı', 'scanning': False})
         self.last_scan   = time.time()
+        self.save_scan()
         # is_scanning=False ve force_scan=False -> run_scan finally bloğu halleder
 
-    # ─── Data helpers ────────────────────────────────────────────────
-    def backtest_data(self):
-        """Her satır bağımsız: bir coin'in BUY ve SELL sinyalleri ayrı satır."""
-        return {'results': self.all_results}
+    # ─── Parametre taraması ──────────────────────────────────────────
+    SWEEP_TPS  = (0.03, 0.05, 0.08, 0.10, 0.15, 0.20)
+    SWEEP_SLS  = (0.02, 0.03, 0.05, 0.08)
+    SWEEP_FWDS = (10, 20, 40)
 
-    def signals_data(self):
-        buys  = sorted(self.buy_sigs.values(),  key=lambda x: x['bwr'], reverse=True)
-        sells = sorted(self.sell_sigs.values(), key=lambda x: x['swr'], reverse=True)
-        return {'buys': list(buys), 'sells': list(sells)}
+    def sweep_data(self, sig_type='buy', tps=None, sls=None, fwds=None, top=10):
+        """Depodaki mumlarla tüm semboller × (tp, sl, fwd) ızgarası; ağ kullanmaz"""
+        res = sweep_store(self.symbols or self._fallback(),
+                          tps or self.SWEEP_TPS, sls or self.SWEEP_SLS, fwds or self.SWEEP_FWDS,
+                          sig_type=sig_type, store=self.store)
+        return {'type': sig_type, 'symbols': int((res.total.sum(axis=1) > 0).sum()),
+                'best': sweep_summary(res, top)}
 
+    # ─── Data helpers ────────────────────────────────────────────────
     def positions_data(self):
         rows = []
-        for key, p in self.pt.positions.items():
-            if p['status'] != 'open': continue
+        for key, p in self.pt.open_positions():
             price = self.prices.get(p['sym'], p['entry'])
             if p['direction'] == 'long':
                 pnl = (price - p['entry']) * p['qty']
@@ -524,8 +889,11 @@ class Scanner:
 
     def stats_data(self):
         s = self.pt.stats()
+        for w in self.pt.tstats.windows:
+            s[f'last{w}'] = self.pt.stats(w)
         return {**s, 'balance': self.pt.balance, 'initial': self.pt.initial,
                 'portfolio': self.pt.portfolio_value(self.prices),
+                'price_ms': self.refresher.metrics(),
                 'closed': list(reversed(self.pt.closed[-30:]))}
 
     # ─── Sürekli döngü ───────────────────────────────────────────────
@@ -536,8 +904,8 @@ class Scanner:
             try:
                 now = time.time()
 
-                # Canlı fiyat (her 30s)
-                if now - last_price >= 30:
+                # Canlı fiyat (her 30s; akış canlıysa TP/SL zaten anında)
+                if now - last_price >= 30 and not (self.feed and self.feed.alive()):
                     try:
                         self.fetch_live_prices()
                         self.check_tpsl()
@@ -582,6 +950,7 @@ class Scanner:
         if not DEPS_OK:  return False
         if not self.connect(): return False
         threading.Thread(target=self.run_loop, daemon=True).start()
+        self.start_feed()
         return True
 
     def set_interval(self, minutes):
@@ -853,10 +1222,10 @@ function connectSSE(){
   sse.addEventListener('status',    e => onStatus(JSON.parse(e.data)));
   sse.addEventListener('progress',  e => { $('pfill').style.width=(JSON.parse(e.data).pct||0)+'%'; });
   sse.addEventListener('countdown', e => onCountdown(JSON.parse(e.data)));
-  sse.addEventListener('log',       e => addLog(JSON.parse(e.data)));
-  sse.addEventListener('scanlog',   e => addScanLog(JSON.parse(e.data)));
-  sse.addEventListener('signals',   e => renderSignals(JSON.parse(e.data)));
-  sse.addEventListener('backtest',  e => renderBacktest(JSON.parse(e.data)));
+  sse.addEventListener('log',       e => onLogs('log',     JSON.parse(e.data)));
+  sse.addEventListener('scanlog',   e => onLogs('scanlog', JSON.parse(e.data)));
+  sse.addEventListener('row',       e => onRow(JSON.parse(e.data)));
+  sse.addEventListener('open',      () => resync());
   sse.addEventListener('positions', e => renderPositions(JSON.parse(e.data)));
   sse.addEventListener('stats',     e => renderStats(JSON.parse(e.data)));
   // ── DÜZELTME: closed olayını dinle ──
@@ -899,20 +1268,34 @@ function onCountdown(d){
 }
 
 // ── LOG ──────────────────────────────────────────────────────────
-function addLog(e){
-  const box=$('logbox'), div=document.createElement('div');
-  div.className='log-'+e.kind;
-  div.innerHTML=`<span class="log-t">${e.t}</span>${esc(e.msg)}`;
-  box.appendChild(div);
-  if(box.children.length>600) box.removeChild(box.firstChild);
-  box.scrollTop=box.scrollHeight;
+// Sunucu satırları toplu yollar: {cursor, entries}; cursor son satırdan
+// sonraki konum. Eksik aralıkta /state?log=&scanlog= ile tamamlanır.
+const LOGS = {
+  log:     {cur:0, box:'logbox',     max:600},
+  scanlog: {cur:0, box:'scanlogbox', max:2000},
+};
+function onLogs(name, d, req){
+  // req: /state yanıtında istenen imleç (SSE olayında undefined)
+  if(!d) return;
+  const L=LOGS[name], ents=d.entries||[], start=d.cursor-ents.length;
+  if(req!==undefined){
+    if(d.cursor<req){ $(L.box).innerHTML=''; L.cur=start; }   // sunucu yeniden başlamış
+    else if(start>L.cur) L.cur=start;                         // halkadan taşan satırlar kayıp
+  } else if(start>L.cur){ resync(); return; }
+  if(d.cursor<=L.cur) return;
+  appendLogs(L, ents.slice(L.cur-start));
+  L.cur=d.cursor;
 }
-function addScanLog(e){
-  const box=$('scanlogbox'), div=document.createElement('div');
-  div.className='log-'+e.kind;
-  div.innerHTML=`<span class="log-t">${e.t}</span>${esc(e.msg)}`;
-  box.appendChild(div);
-  if(box.children.length>2000) box.removeChild(box.firstChild);
+function appendLogs(L, ents){
+  const box=$(L.box), frag=document.createDocumentFragment();
+  ents.forEach(e=>{
+    const div=document.createElement('div');
+    div.className='log-'+e.kind;
+    div.innerHTML=`<span class="log-t">${e.t}</span>${esc(e.msg)}`;
+    frag.appendChild(div);
+  });
+  box.appendChild(frag);
+  while(box.children.length>L.max) box.removeChild(box.firstChild);
   box.scrollTop=box.scrollHeight;
 }
 function esc(s){ return String(s).replace(/&/g,'&amp;').replace(/</g,'&lt;').replace(/>/g,'&gt;'); }
@@ -958,6 +1341,53 @@ function renderPositions(d){
   }).join('');
 }
 
+// ── SATIR DELTALARI (sinyal + backtest) ──────────────────────────
+// Sunucu her satır değişikliğini sıra numaralı delta olarak yollar;
+// numara atlanırsa (kopma, yeniden bağlanma) /state?since= ile eşitlenir.
+const ROWS = new Map();
+let SEQ = 0, resyncing = false, renderQueued = false;
+function applyDelta(d){
+  if(d.op==='reset')       ROWS.clear();
+  else if(d.op==='remove') ROWS.delete(d.key);
+  else                     ROWS.set(d.key, d.row);
+  SEQ = d.seq;
+}
+function applyRows(d){
+  if(d.rows){
+    ROWS.clear();
+    d.rows.forEach(r => ROWS.set(r.sym+':'+r._row_type, r));
+    SEQ = d.seq;
+  } else {
+    (d.deltas||[]).forEach(x => { if(x.seq===SEQ+1) applyDelta(x); });
+  }
+  queueRender();
+}
+function onRow(d){
+  if(resyncing || d.seq<=SEQ) return;
+  if(d.seq!==SEQ+1){ resync(); return; }
+  applyDelta(d); queueRender();
+}
+function resync(){
+  if(resyncing) return;
+  resyncing = true;
+  const lc=LOGS.log.cur, sc=LOGS.scanlog.cur;
+  fetch(`/state?since=${SEQ}&log=${lc}&scanlog=${sc}`).then(r=>r.json())
+    .then(d => { resyncing=false; applyRows(d); onLogs('log', d.log, lc); onLogs('scanlog', d.scanlog, sc); })
+    .catch(() => { resyncing=false; });
+}
+function queueRender(){
+  if(renderQueued) return;
+  renderQueued = true;
+  setTimeout(() => {
+    renderQueued = false;
+    const all   = [...ROWS.values()];
+    const buys  = all.filter(r => r._row_type==='BUY').sort((a,b) => b.bwr-a.bwr);
+    const sells = all.filter(r => r._row_type==='SELL').sort((a,b) => b.swr-a.swr);
+    renderSignals({buys, sells});
+    renderBacktest({results: all});
+  }, 100);
+}
+
 // ── SIGNALS ──────────────────────────────────────────────────────
 function renderSignals(d){
   const buys=d.buys||[], sells=d.sells||[];
@@ -1117,7 +1547,13 @@ function renderStats(d){
     {v:FMT(d.wr,1)+'%',       l:'Gerçek WR',      cl:(d.wr||0)>=50?'g':'r'},
     {v:(d.pnl>=0?'+':'')+FMT(d.pnl,2)+'$', l:'Net PnL', cl:(d.pnl||0)>=0?'g':'r'},
     {v:FMT(d.kf,2),            l:'Kazanç Faktörü', cl:(d.kf||0)>=1?'g':'r'},
+    {v:'-'+FMT(d.max_dd,2)+'$', l:'Maks. Düşüş',   cl:'r'},
+    {v:FMT((d.avg_hold||0)/3600,1)+'sa', l:'Ort. Süre', cl:''},
   ];
+  if(d.last50&&d.last50.total) cards.push(
+    {v:FMT(d.last50.wr,1)+'%', l:'Son 50 WR', cl:d.last50.wr>=50?'g':'r'});
+  if(d.price_ms&&d.price_ms.calls) cards.push(
+    {v:FMT(d.price_ms.avg_ms,0)+'ms', l:'Fiyat Yenileme', cl:d.price_ms.error?'r':''});
   $('sgrid').innerHTML=cards.map(c=>
     `<div class="scard"><div class="scard-v ${c.cl}">${c.v}</div><div class="scard-l">${c.l}</div></div>`
   ).join('');
@@ -1137,13 +1573,12 @@ function renderStats(d){
 connectSSE();
 fetch('/state').then(r=>r.json()).then(d=>{
   if(d.positions) renderPositions(d.positions);
-  if(d.signals)   renderSignals(d.signals);
-  if(d.backtest)  renderBacktest(d.backtest);
+  if(d.rows)      applyRows(d);
   if(d.stats)     renderStats(d.stats);
   if(d.closed_data) renderClosed(d.closed_data);
   if(d.running){ $('btn-start').disabled=true; $('btn-stop').disabled=false; $('btn-scan').disabled=false; }
-  (d.logs||[]).forEach(e=>addLog(e));
-  (d.scan_logs||[]).forEach(e=>addScanLog(e));
+  onLogs('log', d.log, 0);
+  onLogs('scanlog', d.scanlog, 0);
 });
 </script>
 </body>
@@ -1153,7 +1588,9 @@ fetch('/state').then(r=>r.json()).then(d=>{
 # FLASK APP
 # ============================================================================
 app     = Flask(__name__)
-scanner = Scanner()
+# Süreç havuzu işçileri (forkserver / spawn) bu dosyayı __mp_main__ olarak
+# yeniden yükler; tarayıcı (günlük, hesap) yalnızca ana süreçte kurulur
+scanner = Scanner() if __name__ != '__mp_main__' else None
 
 @app.route('/')
 def index():
@@ -1191,6 +1628,7 @@ def start():
 @app.route('/stop')
 def stop():
     scanner.is_running = False
+    scanner.stop_feed()
     scanner.push('status', {'text': 'Durduruldu', 'scanning': False})
     return {'ok': True}
 
@@ -1215,17 +1653,43 @@ def config():
     return {'ok': True, 'interval': scanner.SCAN_EVERY // 60,
             'wr': scanner.WR_THRESH, 'dist': scanner.SUPP_MAX}
 
+@app.route('/sweep')
+def sweep():
+    """?type=buy|sell&tp=0.05,0.1&sl=0.03,0.05&fwd=10,20&top=10"""
+    if not DEPS_OK:
+        return {'ok': False, 'msg': 'ccxt veya pandas yüklü değil'}
+    def grid(name, cast):
+        v = request.args.get(name)
+        return [cast(x) for x in v.split(',') if x] if v else None
+    try:
+        data = scanner.sweep_data(request.args.get('type', 'buy'),
+                                  grid('tp', float), grid('sl', float), grid('fwd', int),
+                                  int(request.args.get('top', 10)))
+    except ValueError:
+        return {'ok': False, 'msg': 'Geçersiz parametre'}
+    return {'ok': True, **data}
+
 @app.route('/state')
 def state():
+    """?since=<seq>&log=<imleç>&scanlog=<imleç>: yalnızca verilen sıra
+    numarası / log imleçlerinden sonrası (tampon yetmezse tüm satırlar);
+    parametresiz tam durum"""
+    since   = request.args.get('since',   type=int)
+    log_c   = request.args.get('log',     type=int)
+    scan_c  = request.args.get('scanlog', type=int)
+    if since is not None or log_c is not None or scan_c is not None:
+        out = scanner.rows_since(since) if since is not None else {}
+        if log_c is not None:  out['log']     = scanner.logs.read(log_c)
+        if scan_c is not None: out['scanlog'] = scanner.scan_logs.read(scan_c)
+        return out
     return {
         'running':     scanner.is_running,
+        **scanner.rows_since(),
         'positions':   scanner.positions_data(),
-        'signals':     scanner.signals_data(),
-        'backtest':    scanner.backtest_data(),
         'stats':       scanner.stats_data(),
         'closed_data': scanner.closed_data(),
-        'logs':        scanner.logs[-200:],
-        'scan_logs':   scanner.scan_logs[-500:],
+        'log':         scanner.logs.read(k=200),
+        'scanlog':     scanner.scan_logs.read(k=500),
     }
 
 # ============================================================================
@@ -15,10 +15,12 @@ import numpy as np
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 import warnings
+from ohlcv_store import yf_history, yf_bulk_history
+from levels import multi_swing_points
 warnings.filterwarnings('ignore')
 
 class BullishRectangleScanner:
-    def __init__(self, min_periods=15, max_periods=60, tolerance=0.025):
+    def __init__(self, min_periods=15, max_periods=60, tolerance=0.025, windows=(5,)):
         """
         Parameters:
         -----------
@@ -28,10 +30,14 @@ class BullishRectangleScanner:
             Maximum dikdörtgen süresi (gün)
         tolerance : float
             Fiyat seviyelerindeki tolerans yüzdesi (0.025 = %2.5)
+        windows : tuple
+            Swing noktası pencereleri (bar); birden fazlaysa en yüksek
+            bullish skorlu rectangle seçilir
         """
         self.min_periods = min_periods
         self.max_periods = max_periods
         self.tolerance = tolerance
+        self.windows = tuple(windows)
         
     def get_bist_stocks(self):
         """BIST 100 ve diğer önemli hisseler"""
@@ -146,36 +152,24 @@ class BullishRectangleScanner:
         """Hisse verilerini indir"""
         try:
             stock = yf.Ticker(symbol)
-            df = stock.history(period=period)
+            df = yf_history(stock, period=period)
             if df.empty:
                 return None
             return df
         except Exception as e:
             return None
     
-    def find_swing_points(self, df, window=5):
-        """Swing high ve swing low noktalarını bul"""
-        highs = df['High'].values
-        lows = df['Low'].values
-        
-        swing_highs = []
-        swing_lows = []
-        
-        for i in range(window, len(df) - window):
-            if all(highs[i] >= highs[i-window:i]) and all(highs[i] >= highs[i+1:i+window+1]):
-                swing_highs.append((i, highs[i], df.index[i]))
-            
-            if all(lows[i] <= lows[i-window:i]) and all(lows[i] <= lows[i+1:i+window+1]):
-                swing_lows.append((i, lows[i], df.index[i]))
-        
-        return swing_highs, swing_lows
+    def download_data_bulk(self, symbols, period='6mo'):
+        """Çok hisseyi toplu indir: {sembol: DataFrame}, verisi olmayanlar hariç"""
+        veriler = yf_bulk_history(symbols, period=period)
+        return {s: df for s, df in veriler.items() if not df.empty}
     
-    def check_recent_activity(self, swing_points, days_threshold=10):
+    def check_recent_activity(self, df, swing_idx, days_threshold=10):
         """Son X gün içinde test olmuş mu kontrol et"""
-        if not swing_points:
+        if len(swing_idx) == 0:
             return False
         
-        latest_swing_date = swing_points[-1][2]
+        latest_swing_date = df.index[swing_idx[-1]]
         
         if latest_swing_date.tz is not None:
             from datetime import timezone
@@ -258,13 +252,27 @@ class BullishRectangleScanner:
             return None
         
         recent_df = df.tail(self.max_periods).copy()
-        swing_highs, swing_lows = self.find_swing_points(recent_df)
-        
+        highs = recent_df['High'].values
+        lows = recent_df['Low'].values
+        
+        # Tüm pencereler tek geçişte; en yüksek skorlu pattern kazanır
+        best = None
+        for window, (swing_highs, swing_lows) in multi_swing_points(highs, lows, self.windows).items():
+            pattern_data = self._rectangle_from_swings(recent_df, swing_highs, swing_lows)
+            if pattern_data is None:
+                continue
+            pattern_data['swing_window'] = window
+            if best is None or pattern_data['bullish_score'] > best['bullish_score']:
+                best = pattern_data
+        return best
+    
+    def _rectangle_from_swings(self, recent_df, swing_highs, swing_lows):
+        """Swing indekslerinden rectangle doğrulaması ve bullish skor"""
         if len(swing_highs) < 2 or len(swing_lows) < 2:
             return None
         
-        high_levels = [h[1] for h in swing_highs]
-        low_levels = [l[1] for l in swing_lows]
+        high_levels = recent_df['High'].values[swing_highs]
+        low_levels = recent_df['Low'].values[swing_lows]
         
         resistance = np.mean(high_levels)
         support = np.mean(low_levels)
@@ -272,8 +280,8 @@ class BullishRectangleScanner:
         resistance_tolerance = resistance * self.tolerance
         support_tolerance = support * self.tolerance
         
-        valid_highs = sum(1 for h in high_levels if abs(h - resistance) <= resistance_tolerance)
-        valid_lows = sum(1 for l in low_levels if abs(l - support) <= support_tolerance)
+        valid_highs = np.count_nonzero(np.abs(high_levels - resistance) <= resistance_tolerance)
+        valid_lows = np.count_nonzero(np.abs(low_levels - support) <= support_tolerance)
         
         if valid_highs / len(high_levels) < 0.6 or valid_lows / len(low_levels) < 0.6:
             return None
@@ -284,9 +292,9 @@ class BullishRectangleScanner:
         if rect_height_pct < 3:
             return None
         
-        first_swing = min(swing_highs[0][0], swing_lows[0][0])
-        last_swing = max(swing_highs[-1][0], swing_lows[-1][0])
-        duration = last_swing - first_swing
+        first_swing = min(swing_highs[0], swing_lows[0])
+        last_swing = max(swing_highs[-1], swing_lows[-1])
+        duration = int(last_swing - first_swing)
         
         if duration < self.min_periods:
             return None
@@ -303,8 +311,8 @@ class BullishRectangleScanner:
         if current_price < support * 0.97 or current_price > resistance * 1.03:
             return None
         
-        recent_high_test = self.check_recent_activity(swing_highs, days_threshold=10)
-        recent_low_test = self.check_recent_activity(swing_lows, days_threshold=10)
+        recent_high_test = self.check_recent_activity(recent_df, swing_highs, days_threshold=10)
+        recent_low_test = self.check_recent_activity(recent_df, swing_lows, days_threshold=10)
         
         if not (recent_high_test or recent_low_test):
             return None
@@ -363,10 +371,13 @@ class BullishRectangleScanner:
         print(f"{'='*90}\n")
         print(f"Taranacak hisse sayısı: {len(stocks)} (BIST 100 + Diğer Önemli Hisseler)\n")
         
+        # Tüm hisselerin verisi toplu indirilir (yf.download, gruplar halinde)
+        veriler = self.download_data_bulk(stocks)
+        
         for i, symbol in enumerate(stocks, 1):
             print(f"[{i}/{len(stocks)}] {symbol:12} taranıyor...", end=' ')
             
-            df = self.download_data(symbol)
+            df = veriler.get(symbol)
             if df is None or len(df) < self.min_periods:
                 print("❌")
                 continue
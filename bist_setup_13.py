@@ -11,9 +11,10 @@ import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 import warnings
-import time
 import threading
 from collections import defaultdict
+import indicators
+from ohlcv_store import yf_history, yf_bulk_history
 
 warnings.filterwarnings('ignore')
 
@@ -144,61 +145,13 @@ class BISTStockScanner:
     @staticmethod
     def heiken_ashi(df):
         """Heiken Ashi mumlarını hesaplar"""
-        df = df.copy()
-        
-        df['HA_Close'] = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-        df['HA_Open'] = 0.0
-        df.loc[df.index[0], 'HA_Open'] = (df['Open'].iloc[0] + df['Close'].iloc[0]) / 2
-        
-        for i in range(1, len(df)):
-            df.loc[df.index[i], 'HA_Open'] = (df['HA_Open'].iloc[i-1] + df['HA_Close'].iloc[i-1]) / 2
-        
-        df['HA_High'] = df[['High', 'HA_Open', 'HA_Close']].max(axis=1)
-        df['HA_Low'] = df[['Low', 'HA_Open', 'HA_Close']].min(axis=1)
-        
-        return df
+        return indicators.heiken_ashi(df)
     
     @staticmethod
     def td_sequential_heiken_ashi(df):
         """Heiken Ashi mumları üzerinde TD Sequential hesaplama"""
-        df = df.copy()
-        df = BISTStockScanner.heiken_ashi(df)
-        
-        # Buy Setup
-        df['buy_setup'] = 0
-        buy_count = 0
-        
-        for i in range(4, len(df)):
-            if df['HA_Close'].iloc[i] < df['HA_Close'].iloc[i-4]:
-                buy_count += 1
-                df.loc[df.index[i], 'buy_setup'] = buy_count
-                if buy_count >= 9:
-                    buy_count = 9
-            else:
-                buy_count = 0
-        
-        # Sell Setup
-        df['sell_setup'] = 0
-        sell_count = 0
-        
-        for i in range(4, len(df)):
-            if df['HA_Close'].iloc[i] > df['HA_Close'].iloc[i-4]:
-                sell_count += 1
-                df.loc[df.index[i], 'sell_setup'] = sell_count
-                if sell_count >= 9:
-                    sell_count = 9
-            else:
-                sell_count = 0
-        
-        # Trend analizi
-        df['ha_trend'] = 'NÖTR'
-        for i in range(len(df)):
-            if df['HA_Close'].iloc[i] > df['HA_Open'].iloc[i]:
-                df.loc[df.index[i], 'ha_trend'] = 'YÜKSELİŞ'
-            elif df['HA_Close'].iloc[i] < df['HA_Open'].iloc[i]:
-                df.loc[df.index[i], 'ha_trend'] = 'DÜŞÜŞ'
-        
-        return df
+        # Eski sayaç 9'a sabitlenmeden önce yazılıyordu: 9'u aşan seriler 10 olarak kalır
+        return indicators.td_sequential_heiken_ashi(df, cap=10, labels=indicators.TREND_TR)
     
     @staticmethod
     def trend_gucu_hesapla(df):
@@ -737,6 +690,10 @@ class BISTScannerGUI:
         other_signals_list = []
         failed = 0
         
+        # Tüm hisselerin verisi toplu indirilir (yf.download, gruplar halinde)
+        self.log("Veriler toplu indiriliyor...", "INFO")
+        veriler = yf_bulk_history(hisseler, period=self.period_var.get(), interval=self.interval_var.get())
+        
         for i, sembol in enumerate(hisseler, 1):
             if not self.is_scanning:
                 break
@@ -746,7 +703,8 @@ class BISTScannerGUI:
             self.root.after(0, self.update_progress, i, total, progress)
             
             try:
-                result = self.scan_single_stock(sembol, self.period_var.get(), self.interval_var.get())
+                result = self.scan_single_stock(sembol, self.period_var.get(), self.interval_var.get(),
+                                                df=veriler[sembol])
                 
                 if result:
                     if result['buy_setup_9']:
@@ -764,10 +722,6 @@ class BISTScannerGUI:
             except Exception as e:
                 failed += 1
                 self.log(f"{sembol} hatası: {str(e)}", "ERROR")
-            
-            # Rate limit
-            if i % 10 == 0:
-                time.sleep(0.5)
         
         # Tarama tamamlandı
         self.scan_results = {
@@ -782,11 +736,12 @@ class BISTScannerGUI:
         if self.detailed_analysis_var.get() and buy_setup_9_list:
             self.root.after(0, self.perform_detailed_analysis, buy_setup_9_list)
     
-    def scan_single_stock(self, sembol, period, interval):
-        """Tek bir hisseyi tara"""
+    def scan_single_stock(self, sembol, period, interval, df=None):
+        """Tek bir hisseyi tara (df verilirse indirme yapılmaz)"""
         try:
-            hisse = yf.Ticker(sembol)
-            df = hisse.history(period=period, interval=interval)
+            if df is None:
+                hisse = yf.Ticker(sembol)
+                df = yf_history(hisse, period=period, interval=interval)
             
             if df.empty or len(df) < 10:
                 return None
@@ -824,6 +779,7 @@ class BISTScannerGUI:
     def perform_detailed_analysis(self, buy_list):
         """Detaylı başarı analizi yap"""
         self.log("Detaylı başarı analizi başlatıldı...", "INFO")
+        veriler = yf_bulk_history([stock['sembol'] + '.IS' for stock in buy_list], period="2y", interval="1wk")
         
         for i, stock in enumerate(buy_list, 1):
             if not self.is_scanning:
@@ -832,8 +788,7 @@ class BISTScannerGUI:
             self.log(f"Analiz: {stock['sembol']} [{i}/{len(buy_list)}]", "INFO")
             
             try:
-                hisse = yf.Ticker(stock['sembol'] + '.IS')
-                df = hisse.history(period="2y", interval="1wk")
+                df = veriler[stock['sembol'] + '.IS']
                 
                 if df.empty or len(df) < 50:
                     continue
@@ -861,9 +816,6 @@ class BISTScannerGUI:
                 
             except Exception as e:
                 self.log(f"Analiz hatası {stock['sembol']}: {str(e)}", "ERROR")
-            
-            if i % 5 == 0:
-                time.sleep(0.3)
         
         self.log("Detaylı analiz tamamlandı", "SUCCESS")
     
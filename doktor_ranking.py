@@ -14,29 +14,206 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext
 import threading
 import ccxt
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain
 import queue
 
+from indicators import heiken_ashi_arrays, td_setup_counts
+from ohlcv_store import default_store, ccxt_fetcher
+from async_fetch import scan_iter, ASYNC_OK
+from backtest import td9_backtest
+from scan_pool import analyze_rows, pool_iter
+from scan_cache import ScanCache, reprice
+from trade_stats import RunningStats
+from journal import Journal
+from price_feed import make_feed, PriceRefresher
+import levels
+
 # ============================================================================
 # PAPER TRADING
 # ============================================================================
 
 class AdvancedPaperTradingAccount:
-    def __init__(self, initial_balance=50000):
+    """
+    Kağıt hesap. `positions` yalnızca açık pozisyonları tutar, kapananlar
+    `closed_trades` listesine taşınır. `by_sym` sembol → açık anahtarlar,
+    `bands` sembol → (alt, üst) TP/SL tetik eşikleri. İstatistikler
+    kapanışta `tstats` üzerinde artımlı güncellenir.
+
+    Durum değişiklikleri open / update / close olaylarıdır ve _apply()
+    ile uygulanır; `journal` verilirse günlüğe yazılır ve açılışta yeniden
+    oynatılır. Fiyat değerlemesi (current_price / pnl) günlüğe yazılmaz;
+    yalnızca değişen uç fiyatlar (highest / lowest) MARK_JOURNAL_SEC'de
+    en fazla bir 'update' olayında toplanır.
+    """
+    STATS_WINDOWS = (50,)
+    MARK_JOURNAL_SEC = 5        # uç fiyat olaylarının en sık günlüğe yazılma aralığı
+
+    def __init__(self, initial_balance=50000, windows=STATS_WINDOWS, journal=None, name='doktor'):
         self.balance = initial_balance
         self.initial_balance = initial_balance
         self.positions = {}
         self.closed_trades = []
         self.trade_history = []
+        self.by_sym = {}
+        self.bands = {}
+        self.tstats = RunningStats(initial_balance, windows)
+        self.journal = journal
+        self.name = name
         self._lock = threading.Lock()
+        self._snap_closed  = []     # eski biçimli görüntüden devralınan listeler
+        self._snap_history = []
+        self._marks_dirty = set()   # uç fiyatı son 'update' olayından beri değişen anahtarlar
+        self._marked = 0.0
+        if journal is not None:
+            self._restore()
+
+    # ── Açık pozisyon indeksi ──
+    def _reband(self, sembol):
+        """Sembolün açık pozisyonlarından tetik bandını yeniden kurar (lock içinde)"""
+        keys = self.by_sym.get(sembol)
+        if not keys:
+            self.by_sym.pop(sembol, None)
+            self.bands.pop(sembol, None)
+            return
+        lo, hi = float('-inf'), float('inf')
+        for key in keys:
+            pos = self.positions[key]
+            if pos['direction'] == 'long':
+                low, high = pos['stop_loss'], pos['take_profit']
+            else:
+                low, high = pos['take_profit'], pos['stop_loss']
+            lo, hi = max(lo, low), min(hi, high)
+        self.bands[sembol] = (lo, hi)
+
+    def is_open(self, key):
+        return key in self.positions
+
+    def open_count(self):
+        return len(self.positions)
 
+    def open_symbols(self):
+        with self._lock:
+            return list(self.by_sym)
+
+    def open_positions(self):
+        """Açık pozisyonların anlık kopyası: {anahtar: pozisyon}"""
+        with self._lock:
+            return dict(self.positions)
+
+    # ── Olaylar ve günlük ──
+    def _apply(self, kind, e):
+        """Olayı bellekteki duruma uygular (canlı yol ve yeniden oynatma, lock içinde)"""
+        if kind == 'open':
+            key, pos = e['key'], e['pos']
+            self.positions[key] = pos
+            self.by_sym.setdefault(pos['sembol'], set()).add(key)
+            self._reband(pos['sembol'])
+        elif kind == 'update':
+            if 'marks' in e:
+                for key, (high, low) in e['marks'].items():
+                    pos = self.positions.get(key)
+                    if pos is not None:
+                        pos['highest_price'] = max(pos['highest_price'], high)
+                        pos['lowest_price']  = min(pos['lowest_price'],  low)
+            else:                   # eski günlüklerdeki tik başına değerleme
+                self._mark(e['sembol'], e['price'], e.get('high'), e.get('low'))
+        elif kind == 'close':
+            rec = e['rec']
+            pos = self.positions.pop(rec['key'], None)
+            if pos is not None:
+                pos['status'] = 'closed'
+            self.by_sym.get(rec['sembol'], set()).discard(rec['key'])
+            self._reband(rec['sembol'])
+            self.closed_trades.append(rec)
+            self.tstats.add(rec['pnl'], rec['pnl_percent'], rec['duration_seconds'],
+                            rec['usdt_size'], rec['sembol'])
+        if 'hist' in e:
+            self.trade_history.append(e['hist'])
+        if 'balance' in e:
+            self.balance = e['balance']
+
+    def _mark(self, sembol, current_price, high=None, low=None):
+        """
+        Sembolün açık pozisyonlarını fiyata göre değerler (high/low: mum
+        uçları); uç fiyatı değişen anahtarlar sonraki 'update' olayına kalır
+        """
+        high = current_price if high is None else high
+        low  = current_price if low is None else low
+        for key in self.by_sym.get(sembol, ()):
+            pos = self.positions[key]
+            if high > pos['highest_price'] or low < pos['lowest_price']:
+                self._marks_dirty.add(key)
+            if pos['direction'] == 'long':
+                pnl_value = (current_price - pos['entry_price']) * pos['quantity']
+            else:
+                pnl_value = (pos['entry_price'] - current_price) * pos['quantity']
+            pos['current_price'] = current_price
+            pos['pnl']           = pnl_value
+            pos['pnl_percent']   = pnl_value / pos['usdt_size'] * 100
+            pos['highest_price'] = max(pos['highest_price'], high)
+            pos['lowest_price']  = min(pos['lowest_price'],  low)
+
+    def _journal_marks(self):
+        """Biriken uç fiyatları MARK_JOURNAL_SEC'de en fazla bir olayla yazar (lock içinde)"""
+        if not self._marks_dirty:
+            return
+        now = time.time()
+        if self.journal is None:
+            self._marks_dirty.clear()
+        elif now - self._marked >= self.MARK_JOURNAL_SEC:
+            marks = {k: [self.positions[k]['highest_price'], self.positions[k]['lowest_price']]
+                     for k in self._marks_dirty if k in self.positions}
+            self._marks_dirty.clear()
+            self._marked = now
+            if marks:
+                self._event('update', {'marks': marks})
+
+    def _event(self, kind, e):
+        """Olayı uygular, günlüğe ekler; sırası gelince anlık görüntü yazar (lock içinde)"""
+        self._apply(kind, e)
+        if self.journal is not None and self.journal.append(self.name, kind, e):
+            # Görüntü bakiye + açık pozisyonlar; kapalı işlemler ve işlem geçmişi
+            # silinmeyen open / close olaylarından okunur
+            self.journal.snapshot(self.name, {
+                'balance':       self.balance,
+                'positions':     self.positions,
+                'closed_trades': self._snap_closed,
+                'trade_history': self._snap_history,
+            }, keep=('open', 'close'))
+
+    def _restore(self):
+        """Günlükteki open / close geçmişi + son anlık görüntü + sonraki olaylar"""
+        state, history, events = self.journal.load(self.name)
+        with self._lock:
+            if state:
+                # Eski biçimli görüntülerin listeleri olduğu gibi taşınır (artık büyümez)
+                self._snap_closed  = state.get('closed_trades', [])
+                self._snap_history = state.get('trade_history', [])
+                for rec in self._snap_closed:
+                    self._apply('close', {'rec': rec})
+                self.trade_history = list(self._snap_history)
+            for kind, e in history:
+                if kind == 'close':
+                    self._apply('close', {'rec': e['rec'], 'hist': e['hist']})
+                elif 'hist' in e:
+                    self.trade_history.append(e['hist'])
+            if state:
+                for key, pos in state['positions'].items():
+                    self._apply('open', {'key': key, 'pos': pos})
+                self.balance = state['balance']
+            for kind, e in events:
+                self._apply(kind, e)
+
+    # ── İşlemler ──
     def open_trade(self, sembol, entry_price, usdt_size=500, winrate=0, direction='long'):
         with self._lock:
             key = f"{sembol}_{direction}"
-            if key in self.positions and self.positions[key]['status'] == 'open':
+            if key in self.positions:
                 return False, f"Açık {direction} var"
             if self.balance < usdt_size:
                 return False, f"Bakiye yok ({self.balance:.2f})"
@@ -50,52 +227,51 @@ class AdvancedPaperTradingAccount:
                 take_profit = entry_price * 0.80   # -%20
                 stop_loss   = entry_price * 1.05   # +%5
 
-            self.positions[key] = {
-                'sembol':        sembol,
-                'direction':     direction,
-                'entry_price':   entry_price,
-                'entry_time':    datetime.now(),
-                'quantity':      quantity,
-                'usdt_size':     usdt_size,
-                'status':        'open',
-                'current_price': entry_price,
-                'pnl':           0.0,
-                'pnl_percent':   0.0,
-                'stop_loss':     stop_loss,
-                'take_profit':   take_profit,
-                'highest_price': entry_price,
-                'lowest_price':  entry_price,
-                'winrate':       winrate,
-            }
-
-            self.balance -= usdt_size
-            self.trade_history.append({
-                'type': 'OPEN', 'direction': direction,
-                'sembol': sembol, 'price': entry_price, 'time': datetime.now()
+            self._event('open', {
+                'key': key,
+                'pos': {
+                    'sembol':        sembol,
+                    'direction':     direction,
+                    'entry_price':   entry_price,
+                    'entry_time':    datetime.now(),
+                    'quantity':      quantity,
+                    'usdt_size':     usdt_size,
+                    'status':        'open',
+                    'current_price': entry_price,
+                    'pnl':           0.0,
+                    'pnl_percent':   0.0,
+                    'stop_loss':     stop_loss,
+                    'take_profit':   take_profit,
+                    'highest_price': entry_price,
+                    'lowest_price':  entry_price,
+                    'winrate':       winrate,
+                },
+                'balance': self.balance - usdt_size,
+                'hist': {
+                    'type': 'OPEN', 'direction': direction,
+                    'sembol': sembol, 'price': entry_price, 'time': datetime.now()
+                },
             })
             dir_sym = 'LONG' if direction == 'long' else 'SHORT'
             return True, f"{dir_sym} {sembol}: {quantity:.6f} adet @ {entry_price:.6f}  [{usdt_size:.0f} USDT | WR:{winrate:.1f}%]"
 
     def update_price(self, sembol, current_price):
         closed_list = []
-        for direction in ('long', 'short'):
-            key = f"{sembol}_{direction}"
-            with self._lock:
-                if key not in self.positions or self.positions[key]['status'] != 'open':
-                    continue
-                pos = self.positions[key]
-                pos['current_price'] = current_price
-
-                if direction == 'long':
-                    pnl_value = (current_price - pos['entry_price']) * pos['quantity']
-                else:
-                    pnl_value = (pos['entry_price'] - current_price) * pos['quantity']
-
-                pos['pnl']           = pnl_value
-                pos['pnl_percent']   = pnl_value / pos['usdt_size'] * 100
-                pos['highest_price'] = max(pos['highest_price'], current_price)
-                pos['lowest_price']  = min(pos['lowest_price'],  current_price)
+        with self._lock:
+            keys = self.by_sym.get(sembol)
+            if not keys:
+                return None
+            self._mark(sembol, current_price)
+            self._journal_marks()
+            lo, hi = self.bands[sembol]
+            if lo < current_price < hi:
+                return None
 
+            for direction in ('long', 'short'):
+                key = f"{sembol}_{direction}"
+                pos = self.positions.get(key)
+                if pos is None:
+                    continue
                 if direction == 'long':
                     if current_price <= pos['stop_loss']:
                         r = self._close_trade_locked(key, current_price, "STOP LOSS")
@@ -113,11 +289,50 @@ class AdvancedPaperTradingAccount:
 
         return closed_list if closed_list else None
 
+    def update_bars(self, bars):
+        """
+        Mum içi TP/SL: bars {sembol: (open, high, low, close)} — bir grup 1m
+        kline ya da tik birikimi. İlgili tüm açık pozisyonlar tek vektörel
+        geçişte high/low'a karşı denenir; dolum tetik seviyesinden (bar
+        seviyenin ötesinde açıldıysa açılıştan) yazılır. Aynı barda TP ve
+        SL birlikte kesilirse TP sayılır (td9_backtest ile aynı kural).
+
+        Returns:
+            kapanan kayıtlar ya da None (update_price gibi)
+        """
+        closed_list = []
+        with self._lock:
+            keys = [k for sym in bars if sym in self.by_sym for k in self.by_sym[sym]]
+            if not keys:
+                return None
+            P = [self.positions[k] for k in keys]
+            o, h, l, c = np.array([bars[p['sembol']] for p in P], dtype=float).T
+            is_long = np.array([p['direction'] == 'long' for p in P])
+            tp = np.array([p['take_profit'] for p in P])
+            sl = np.array([p['stop_loss'] for p in P])
+            tp_hit  = np.where(is_long, h >= tp, l <= tp)
+            sl_hit  = np.where(is_long, l <= sl, h >= sl)
+            tp_fill = np.where(is_long, np.maximum(tp, o), np.minimum(tp, o))
+            sl_fill = np.where(is_long, np.minimum(sl, o), np.maximum(sl, o))
+
+            for sym in {p['sembol'] for p in P}:
+                _, bh, bl, bc = (float(x) for x in bars[sym])
+                self._mark(sym, bc, bh, bl)
+            self._journal_marks()
+            for i in np.flatnonzero(tp_hit | sl_hit):
+                if tp_hit[i]:
+                    r = self._close_trade_locked(keys[i], float(tp_fill[i]), "TAKE PROFIT")
+                else:
+                    r = self._close_trade_locked(keys[i], float(sl_fill[i]), "STOP LOSS")
+                if r: closed_list.append(r)
+
+        return closed_list if closed_list else None
+
     def _close_trade_locked(self, key, exit_price, reason="MANUAL"):
         """Lock dışarıdan alınmış halde çağrılır."""
-        if key not in self.positions or self.positions[key]['status'] != 'open':
+        pos = self.positions.get(key)
+        if pos is None:
             return None
-        pos       = self.positions[key]
         direction = pos['direction']
         sembol    = pos['sembol']
 
@@ -150,12 +365,13 @@ class AdvancedPaperTradingAccount:
             'winrate':          pos.get('winrate', 0),
             'exit_time':        datetime.now(),
         }
-        self.closed_trades.append(closed)
-        self.balance    += max(exit_value, 0)
-        pos['status']    = 'closed'
-        self.trade_history.append({
-            'type': 'CLOSE', 'direction': direction, 'sembol': sembol,
-            'reason': reason, 'price': exit_price, 'pnl': pnl_pct, 'time': datetime.now()
+        self._event('close', {
+            'rec':     closed,
+            'balance': self.balance + max(exit_value, 0),
+            'hist': {
+                'type': 'CLOSE', 'direction': direction, 'sembol': sembol,
+                'reason': reason, 'price': exit_price, 'pnl': pnl_pct, 'time': datetime.now()
+            },
         })
         return closed
 
@@ -165,9 +381,7 @@ class AdvancedPaperTradingAccount:
 
     def get_portfolio_value(self, prices_dict):
         total = self.balance
-        for key, pos in self.positions.items():
-            if pos['status'] != 'open':
-                continue
+        for key, pos in self.open_positions().items():
             sym   = pos['sembol']
             price = prices_dict.get(sym, pos['entry_price'])
             if pos['direction'] == 'long':
@@ -177,28 +391,29 @@ class AdvancedPaperTradingAccount:
                 total += pos['usdt_size'] + pnl
         return total
 
-    def get_stats(self):
-        trades = self.closed_trades
-        if not trades:
-            return {'toplam_islem': 0, 'basarili_islem': 0, 'basarisiz_islem': 0,
-                    'win_rate': 0, 'ort_kazanc': 0, 'toplam_pnl': 0, 'kazanc_faktoru': 0}
-        total     = len(trades)
-        winning   = sum(1 for t in trades if t['pnl'] > 0)
-        losing    = sum(1 for t in trades if t['pnl'] < 0)
-        total_pnl = sum(t['pnl']        for t in trades)
-        avg_ret   = sum(t['pnl_percent'] for t in trades) / total
-        win_pnl   = sum(t['pnl']         for t in trades if t['pnl'] > 0)
-        loss_pnl  = sum(abs(t['pnl'])    for t in trades if t['pnl'] < 0)
+    def get_stats(self, window=None):
+        """Koşan toplamlardan özet (window: son N işlem, STATS_WINDOWS'tan biri)"""
+        with self._lock:
+            s = self.tstats.summary(window)
         return {
-            'toplam_islem':    total,
-            'basarili_islem':  winning,
-            'basarisiz_islem': losing,
-            'win_rate':        winning / total * 100,
-            'ort_kazanc':      avg_ret,
-            'toplam_pnl':      total_pnl,
-            'kazanc_faktoru':  win_pnl / loss_pnl if loss_pnl > 0 else 0,
+            'toplam_islem':    s['total'],
+            'basarili_islem':  s['wins'],
+            'basarisiz_islem': s['losses'],
+            'win_rate':        s['wr'],
+            'ort_kazanc':      s['avg_pct'],
+            'toplam_pnl':      s['pnl'],
+            'kazanc_faktoru':  s['kf'],
+            'ort_sure':        s['avg_hold'],
+            'max_dusus':       s.get('max_dd', 0),
+            'max_dusus_pct':   s.get('max_dd_pct', 0),
         }
 
+    def coin_stats(self):
+        """Sembol bazlı koşan toplamlar: {sembol: {'pnl','count','wins','usdt'}}"""
+        with self._lock:
+            return {c: {'pnl': t.pnl, 'count': t.n, 'wins': t.wins, 'usdt': t.volume}
+                    for c, t in self.tstats.by_sym.items()}
+
 
 # ============================================================================
 # SCANNER
@@ -208,6 +423,14 @@ class Advanced500Scanner:
     WINRATE_THRESHOLD  = 50.0
     SUPPORT_MAX_DIST   = 5.0
     SCAN_INTERVAL_SEC  = 30 * 60
+    ASYNC_FETCH        = True      # ccxt.async_support varsa asenkron çekme hattı
+    PROCESS_POOL       = False     # True → analiz paylaşılan süreç havuzunda (scan_pool, forkserver)
+    POOL_WORKERS       = None      # None → os.cpu_count()
+    JOURNAL            = True      # hesap + son tarama SQLite günlüğünde (yeniden başlatmada korunur)
+    PRICE_FEED         = 'kline'   # 'kline' (açık sembollerin 1m mumları, mum içi TP/SL) | 'stream'
+                                   # (miniTicker ws) | 'poll' (toplu yoklama) | None (30 sn); ws yoksa yoklama
+    FEED_POLL_SEC      = 5         # toplu fetch_tickers yoklama aralığı
+    SCAN_CACHE         = 2048      # son kapanmış mumu değişmeyen sembollerin özet önbelleği (0 → kapalı)
 
     def __init__(self):
         try:
@@ -215,10 +438,13 @@ class Advanced500Scanner:
         except Exception:
             self.exchange = None
 
-        self.paper_trading   = AdvancedPaperTradingAccount(50000)
+        self.journal         = Journal() if self.JOURNAL else None
+        self.paper_trading   = AdvancedPaperTradingAccount(50000, journal=self.journal)
         self.buy_signals     = {}
         self.sell_signals    = {}
         self.current_prices  = {}
+        self.refresher       = PriceRefresher()   # açık sembollerin toplu fiyat isteği
+        self.feed            = None               # canlı fiyat akışı (price_feed)
         self.is_running      = False
         self.is_scanning     = False
         self._scan_lock      = threading.Lock()   # ← YENİ: çift tarama engeli
@@ -227,6 +453,36 @@ class Advanced500Scanner:
         self.total_signals   = 0
         self._valid_symbols  = None
         self._last_scan_time = 0
+        self.store           = default_store()    # yerel OHLCV deposu
+        self.scan_cache      = ScanCache('1h', self.SCAN_CACHE) if self.SCAN_CACHE else None
+        if self.journal is not None:
+            self.restore_scan()
+
+    # ── Günlük ─────────────────────────────────────────────────────
+    def save_scan(self):
+        """Son tarama sonuçları; yeniden başlatmada hemen tam tarama gerekmesin"""
+        if self.journal is None:
+            return
+        self.journal.put(f'{self.paper_trading.name}.scan', {
+            'scan_count':    self.scan_count,
+            'total_signals': self.total_signals,
+            'last_scan':     self._last_scan_time,
+            'buy':           self.buy_signals,
+            'sell':          self.sell_signals,
+            'prices':        dict(self.current_prices),
+        })
+
+    def restore_scan(self):
+        d = self.journal.get(f'{self.paper_trading.name}.scan')
+        if not d:
+            return
+        self.scan_count      = d['scan_count']
+        self.total_signals   = d['total_signals']
+        self._last_scan_time = d['last_scan']
+        self.buy_signals.update(d['buy'])
+        self.sell_signals.update(d['sell'])
+        self.current_prices.update(d['prices'])
+        self.update_queue.put(('refresh_all', True))
 
     # ── Semboller ──────────────────────────────────────────────────
     def get_valid_symbols(self):
@@ -292,109 +548,29 @@ class Advanced500Scanner:
     # ── Heiken Ashi ────────────────────────────────────────────────
     def heiken_ashi(self, df):
         df = df.copy()
-        df['HA_Close'] = (df['open'] + df['high'] + df['low'] + df['close']) / 4
-        ha_open = [(df['open'].iloc[0] + df['close'].iloc[0]) / 2]
-        for i in range(1, len(df)):
-            ha_open.append((ha_open[-1] + df['HA_Close'].iloc[i-1]) / 2)
-        df['HA_Open'] = ha_open
-        df['HA_High'] = df[['high', 'HA_Open', 'HA_Close']].max(axis=1)
-        df['HA_Low']  = df[['low',  'HA_Open', 'HA_Close']].min(axis=1)
+        ha_o, ha_c, ha_h, ha_l = heiken_ashi_arrays(df['open'].values, df['high'].values,
+                                                    df['low'].values, df['close'].values)
+        df['HA_Close'] = ha_c
+        df['HA_Open']  = ha_o
+        df['HA_High']  = ha_h
+        df['HA_Low']   = ha_l
         return df
 
     # ── TD Sequential ──────────────────────────────────────────────
     def td_sequential(self, df):
-        df  = df.copy()
         df  = self.heiken_ashi(df)
-        ha  = df['HA_Close'].values
-        n   = len(ha)
-
-        buy_setup  = [0] * n
-        sell_setup = [0] * n
-        bc = sc = 0
-        for i in range(n):
-            if i >= 4 and ha[i] < ha[i-4]:
-                bc = min(bc + 1, 9)
-            else:
-                bc = 0
-            buy_setup[i] = bc
-
-            if i >= 4 and ha[i] > ha[i-4]:
-                sc = min(sc + 1, 9)
-            else:
-                sc = 0
-            sell_setup[i] = sc
-
-        df['buy_setup']  = buy_setup
-        df['sell_setup'] = sell_setup
+        df['buy_setup'], df['sell_setup'] = td_setup_counts(df['HA_Close'].values, cap=9)
         return df
 
     # ── Backtest ───────────────────────────────────────────────────
     def backtest_td9(self, df, signal_type='buy', tp_pct=0.20, sl_pct=0.05, forward_bars=20):
         setup_col = 'buy_setup' if signal_type == 'buy' else 'sell_setup'
-        closes = df['close'].values
-        highs  = df['high'].values
-        lows   = df['low'].values
-        n      = len(df)
-        setups = df[setup_col].values
-
-        total = wins = 0
-
-        for i in range(4, n - forward_bars - 1):
-            if int(setups[i]) != 9:
-                continue
-            entry = closes[i]
-            if entry <= 0:
-                continue
-
-            tp = entry * (1 + tp_pct) if signal_type == 'buy' else entry * (1 - tp_pct)
-            sl = entry * (1 - sl_pct) if signal_type == 'buy' else entry * (1 + sl_pct)
-
-            total  += 1
-            outcome = None
-
-            for j in range(i + 1, min(i + forward_bars + 1, n)):
-                h, l = highs[j], lows[j]
-                if signal_type == 'buy':
-                    if h >= tp: outcome = 'win';  break
-                    if l <= sl: outcome = 'loss'; break
-                else:
-                    if l <= tp: outcome = 'win';  break
-                    if h >= sl: outcome = 'loss'; break
-
-            if outcome == 'win':
-                wins += 1
-            elif outcome is None:
-                fin = closes[min(i + forward_bars, n - 1)]
-                if signal_type == 'buy'  and fin > entry: wins += 1
-                if signal_type == 'sell' and fin < entry: wins += 1
-
-        wr = (wins / total * 100) if total > 0 else 0.0
-        return wr, total, wins
+        return td9_backtest(df['close'].values, df['high'].values, df['low'].values,
+                            df[setup_col].values, signal_type, tp_pct, sl_pct, forward_bars)
 
     # ── Destek Seviyesi ───────────────────────────────────────────
     def find_support_level(self, df, lookback=50, tolerance=0.015):
-        lows = df['low'].values[-lookback:]
-        n    = len(lows)
-
-        pivot_lows = []
-        for i in range(2, n - 2):
-            if lows[i] < lows[i-1] and lows[i] < lows[i-2] and \
-               lows[i] < lows[i+1] and lows[i] < lows[i+2]:
-                pivot_lows.append(lows[i])
-
-        if not pivot_lows:
-            support     = float(min(lows))
-            touch_count = 1
-        else:
-            best_support  = pivot_lows[0]
-            best_touches  = 1
-            for ref in pivot_lows:
-                touches = sum(1 for l in pivot_lows if abs(l - ref) / ref <= tolerance)
-                if touches > best_touches:
-                    best_touches = touches
-                    best_support = ref
-            support     = best_support
-            touch_count = best_touches
+        support, touch_count = levels.support(df['low'].values, lookback, tolerance)
 
         current_price = float(df['close'].iloc[-1])
         dist_pct      = (current_price - support) / support * 100
@@ -402,118 +578,125 @@ class Advanced500Scanner:
 
     # ── Direnç Seviyesi ───────────────────────────────────────────
     def find_resistance_level(self, df, lookback=50, tolerance=0.015):
-        highs = df['high'].values[-lookback:]
-        n     = len(highs)
-
-        pivot_highs = []
-        for i in range(2, n - 2):
-            if highs[i] > highs[i-1] and highs[i] > highs[i-2] and \
-               highs[i] > highs[i+1] and highs[i] > highs[i+2]:
-                pivot_highs.append(highs[i])
-
-        if not pivot_highs:
-            resistance  = float(max(highs))
-            touch_count = 1
-        else:
-            best_res     = pivot_highs[0]
-            best_touches = 1
-            for ref in pivot_highs:
-                touches = sum(1 for h in pivot_highs if abs(h - ref) / ref <= tolerance)
-                if touches > best_touches:
-                    best_touches = touches
-                    best_res     = ref
-            resistance  = best_res
-            touch_count = best_touches
+        resistance, touch_count = levels.resistance(df['high'].values, lookback, tolerance)
 
         current_price = float(df['close'].iloc[-1])
         dist_pct      = (resistance - current_price) / current_price * 100
         return resistance, touch_count, dist_pct
 
-    def scan_crypto(self, sembol):
+    def load_rows(self, sembol, fetched=None):
+        """Son 1000 mum (n × 6); yerel depodan, yalnızca son saklanan bardan sonrası indirilir"""
+        if fetched is None:
+            rows = self.store.update('binance', sembol, '1h', ccxt_fetcher(self.exchange, sembol, '1h'),
+                                     page_size=1000)
+        else:
+            rows = self.store.ingest('binance', sembol, '1h', fetched)
+        return rows[-1000:]
+
+    def scan_crypto(self, sembol, fetched=None):
         if not self.exchange:
             return None
         try:
-            ohlcv = self.exchange.fetch_ohlcv(sembol, '1h', limit=1000)
-            if not ohlcv or len(ohlcv) < 50:
-                return None
-
-            df = pd.DataFrame(ohlcv, columns=['timestamp','open','high','low','close','volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
-            df = self.td_sequential(df)
-
-            son_buy   = int(df['buy_setup'].iloc[-1])
-            son_sell  = int(df['sell_setup'].iloc[-1])
-            son_price = float(df['close'].iloc[-1])
-            ha_close  = float(df['HA_Close'].iloc[-1])
-            ha_open   = float(df['HA_Open'].iloc[-1])
-
-            total_bars = len(df)
-            days_back  = round(total_bars / 24, 1)
-            date_from  = df.index[0].strftime('%Y-%m-%d')
-            date_to    = df.index[-1].strftime('%Y-%m-%d')
-
-            buy_wr = buy_tot = buy_wins = 0
-            sell_wr = sell_tot = sell_wins = 0
-
-            if son_buy == 9:
-                buy_wr, buy_tot, buy_wins = self.backtest_td9(df, 'buy')
-            if son_sell == 9:
-                sell_wr, sell_tot, sell_wins = self.backtest_td9(df, 'sell')
-
-            support_price,    support_touches,    support_dist_pct    = self.find_support_level(df,    lookback=100)
-            resistance_price, resistance_touches, resistance_dist_pct = self.find_resistance_level(df, lookback=100)
-
-            wr_ok_buy  = buy_wr  >= self.WINRATE_THRESHOLD
-            wr_ok_sell = sell_wr >= self.WINRATE_THRESHOLD
-            supp_ok    = 0.0 < support_dist_pct    <= self.SUPPORT_MAX_DIST
-            res_ok     = 0.0 < resistance_dist_pct <= self.SUPPORT_MAX_DIST
-            buy_passed  = wr_ok_buy  and supp_ok
-            sell_passed = wr_ok_sell and res_ok
-
-            if support_dist_pct < 0:
-                supp_status = f'DESTEK KIRILMIŞ ({support_dist_pct:+.1f}%)'
-            elif support_dist_pct <= self.SUPPORT_MAX_DIST:
-                supp_status = f'DESTEĞE YAKIN (+{support_dist_pct:.1f}%)'
-            else:
-                supp_status = f'DESTEK UZAK (+{support_dist_pct:.1f}%)'
-
-            if resistance_dist_pct < 0:
-                res_status = f'DİRENÇ KIRILMIŞ ({resistance_dist_pct:+.1f}%)'
-            elif resistance_dist_pct <= self.SUPPORT_MAX_DIST:
-                res_status = f'DİRENCE YAKIN (+{resistance_dist_pct:.1f}%)'
-            else:
-                res_status = f'DİRENÇ UZAK (+{resistance_dist_pct:.1f}%)'
-
-            return {
-                'sembol': sembol.split('/')[0],
-                'full_symbol': sembol,
-                'price': son_price,
-                'buy_setup': son_buy,   'sell_setup': son_sell,
-                'buy_9': son_buy == 9,  'sell_9': son_sell == 9,
-                'ha_color': 'HAY' if ha_close > ha_open else 'AY',
-                'buy_winrate': buy_wr, 'buy_total_signals': buy_tot, 'buy_wins': buy_wins,
-                'buy_wr_ok':  wr_ok_buy,
-                'sell_winrate': sell_wr, 'sell_total_signals': sell_tot, 'sell_wins': sell_wins,
-                'sell_wr_ok': wr_ok_sell,
-                'support_price':    round(support_price, 8),
-                'support_touches':  support_touches,
-                'support_dist_pct': round(support_dist_pct, 2),
-                'support_ok':       supp_ok,
-                'support_status':   supp_status,
-                'resistance_price':    round(resistance_price, 8),
-                'resistance_touches':  resistance_touches,
-                'resistance_dist_pct': round(resistance_dist_pct, 2),
-                'resistance_ok':       res_ok,
-                'resistance_status':   res_status,
-                'buy_passed':  buy_passed,
-                'sell_passed': sell_passed,
-                'total_bars': total_bars, 'days_back': days_back,
-                'date_from':  date_from,  'date_to':   date_to,
-            }
+            s = analyze_rows(self.load_rows(sembol, fetched))
+            return self.cache_result(sembol, s) if s else None
         except Exception:
             return None
 
+    def cache_result(self, sembol, s):
+        """Özeti önbelleğe yazar, sinyal satırını döndürür"""
+        if self.scan_cache is not None:
+            self.scan_cache.put(sembol, s)
+        return self.make_result(sembol, s)
+
+    def cached_results(self, kriptolar):
+        """
+        Son kapanmış mumu değişmemiş semboller: saklı özet + tek toplu istekle
+        güncel fiyat. Fiyatı alınamayan semboller yeniden taranır.
+
+        Returns:
+            ([(sembol, satır, None), ...], taranacak semboller)
+        """
+        if self.scan_cache is None:
+            return [], kriptolar
+        cached = {}
+        for sym in kriptolar:
+            s = self.scan_cache.get(sym)
+            if s is not None:
+                cached[sym] = s
+        if not cached:
+            return [], kriptolar
+        prices = self.refresher.refresh(self.exchange, [sym.split('/')[0] for sym in cached],
+                                        fallback=False)
+        hits = []
+        for sym, s in cached.items():
+            px = prices.get(sym.split('/')[0])
+            if px:
+                hits.append((sym, self.make_result(sym, reprice(s, px)), None))
+        done = {h[0] for h in hits}
+        return hits, [sym for sym in kriptolar if sym not in done]
+
+    def make_result(self, sembol, s):
+        """scan_pool özeti → sinyal satırı (eşikler ve durum metinleri burada)"""
+        son_buy, son_sell = s['buy9'], s['sell9']
+        son_price, ha_close, ha_open = s['price'], s['ha_c'], s['ha_o']
+        buy_wr,  buy_tot,  buy_wins  = s['bwr'], s['btot'], s['bwins']
+        sell_wr, sell_tot, sell_wins = s['swr'], s['stot'], s['swins']
+        support_price,    support_touches,    support_dist_pct    = s['sup'], s['stc'], s['sdist']
+        resistance_price, resistance_touches, resistance_dist_pct = s['res'], s['rtc'], s['rdist']
+
+        total_bars = s['n']
+        days_back  = round(total_bars / 24, 1)
+        date_from  = pd.to_datetime(s['ts0'], unit='ms').strftime('%Y-%m-%d')
+        date_to    = pd.to_datetime(s['ts1'], unit='ms').strftime('%Y-%m-%d')
+
+        wr_ok_buy  = buy_wr  >= self.WINRATE_THRESHOLD
+        wr_ok_sell = sell_wr >= self.WINRATE_THRESHOLD
+        supp_ok    = 0.0 < support_dist_pct    <= self.SUPPORT_MAX_DIST
+        res_ok     = 0.0 < resistance_dist_pct <= self.SUPPORT_MAX_DIST
+        buy_passed  = wr_ok_buy  and supp_ok
+        sell_passed = wr_ok_sell and res_ok
+
+        if support_dist_pct < 0:
+            supp_status = f'DESTEK KIRILMIŞ ({support_dist_pct:+.1f}%)'
+        elif support_dist_pct <= self.SUPPORT_MAX_DIST:
+            supp_status = f'DESTEĞE YAKIN (+{support_dist_pct:.1f}%)'
+        else:
+            supp_status = f'DESTEK UZAK (+{support_dist_pct:.1f}%)'
+
+        if resistance_dist_pct < 0:
+            res_status = f'DİRENÇ KIRILMIŞ ({resistance_dist_pct:+.1f}%)'
+        elif resistance_dist_pct <= self.SUPPORT_MAX_DIST:
+            res_status = f'DİRENCE YAKIN (+{resistance_dist_pct:.1f}%)'
+        else:
+            res_status = f'DİRENÇ UZAK (+{resistance_dist_pct:.1f}%)'
+
+        return {
+            'sembol': sembol.split('/')[0],
+            'full_symbol': sembol,
+            'price': son_price,
+            'buy_setup': son_buy,   'sell_setup': son_sell,
+            'buy_9': son_buy == 9,  'sell_9': son_sell == 9,
+            'ha_color': 'HAY' if ha_close > ha_open else 'AY',
+            'buy_winrate': buy_wr, 'buy_total_signals': buy_tot, 'buy_wins': buy_wins,
+            'buy_wr_ok':  wr_ok_buy,
+            'sell_winrate': sell_wr, 'sell_total_signals': sell_tot, 'sell_wins': sell_wins,
+            'sell_wr_ok': wr_ok_sell,
+            'support_price':    round(support_price, 8),
+            'support_touches':  support_touches,
+            'support_dist_pct': round(support_dist_pct, 2),
+            'support_ok':       supp_ok,
+            'support_status':   supp_status,
+            'resistance_price':    round(resistance_price, 8),
+            'resistance_touches':  resistance_touches,
+            'resistance_dist_pct': round(resistance_dist_pct, 2),
+            'resistance_ok':       res_ok,
+            'resistance_status':   res_status,
+            'buy_passed':  buy_passed,
+            'sell_passed': sell_passed,
+            'total_bars': total_bars, 'days_back': days_back,
+            'date_from':  date_from,  'date_to':   date_to,
+        }
+
     # ── Ana Tarama ────────────────────────────────────────────────
     def run_scan(self):
         # ── DÜZELTME: Çift tarama önleme ──────────────────────────
@@ -525,6 +708,25 @@ class Advanced500Scanner:
         finally:
             self._scan_lock.release()
 
+    def _thread_results(self, kriptolar, fn=None):
+        """Eski yol: 15 thread ile senkron fetch + hesap (fn verilirse yalnızca fn)"""
+        with ThreadPoolExecutor(max_workers=15) as executor:
+            futures = {executor.submit(fn or self.scan_crypto, s): s for s in kriptolar}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(timeout=15), None
+                except Exception as e:
+                    yield futures[future], None, e
+
+    def _pool_results(self, kriptolar):
+        """Süreç havuzu modu: çekme I/O aşamasında, analiz tüm çekirdeklerde"""
+        if self.ASYNC_FETCH and ASYNC_OK:
+            loaded = scan_iter(kriptolar, self.load_rows, '1h', 1000, store=self.store)
+        else:
+            loaded = self._thread_results(kriptolar, self.load_rows)
+        for sym, s, err in pool_iter(loaded, workers=self.POOL_WORKERS):
+            yield sym, (self.cache_result(sym, s) if s else None), err
+
     def _run_scan_internal(self):
         if not self.exchange:
             self.update_queue.put(('status', 'Binance API hatası')); return
@@ -548,66 +750,76 @@ class Advanced500Scanner:
 
         completed = failed = 0
 
-        with ThreadPoolExecutor(max_workers=15) as executor:
-            futures = {executor.submit(self.scan_crypto, s): s for s in kriptolar}
+        hits, todo = self.cached_results(kriptolar)
+        if hits:
+            self.update_queue.put(('coin_log',
+                f'Önbellek: {len(hits)} coinde yeni mum yok, yalnızca fiyat yenilendi'))
+        if not todo:
+            results = ()
+        elif self.PROCESS_POOL:
+            results = self._pool_results(todo)
+        elif self.ASYNC_FETCH and ASYNC_OK:
+            results = scan_iter(todo, self.scan_crypto, '1h', 1000, store=self.store)
+        else:
+            results = self._thread_results(todo)
 
-            for future in as_completed(futures):
-                raw_sym   = futures[future]
-                completed += 1
-                try:
-                    res = future.result(timeout=15)
-                    if res:
-                        coin = res['sembol']
-                        self.current_prices[coin] = res['price']
-                        signal_tag = ''
-
-                        if res['buy_9']:
-                            self.buy_signals[coin] = res
-                            self.total_signals += 1
-                            wr     = res['buy_winrate']
-                            sdist  = res['support_dist_pct']
-                            wr_ok  = res['buy_wr_ok']
-                            s_stat = res['support_status']
-                            verdict = ('GEÇTI-LONG' if res['buy_passed']
-                                       else (f'ATILDI-WR:{wr:.0f}%<{self.WINRATE_THRESHOLD:.0f}%' if not wr_ok
-                                             else f'ATILDI-{s_stat}'))
-                            signal_tag += (f'  ***BUY9 WR:{wr:.1f}%({res["buy_wins"]}/{res["buy_total_signals"]})'
-                                           f' | {s_stat} | {verdict}***')
-
-                        if res['sell_9']:
-                            self.sell_signals[coin] = res
-                            self.total_signals += 1
-                            wr     = res['sell_winrate']
-                            rdist  = res['resistance_dist_pct']
-                            wr_ok  = res['sell_wr_ok']
-                            r_stat = res['resistance_status']
-                            verdict = ('GEÇTI-SHORT' if res['sell_passed']
-                                       else (f'ATILDI-WR:{wr:.0f}%<{self.WINRATE_THRESHOLD:.0f}%' if not wr_ok
-                                             else f'ATILDI-{r_stat}'))
-                            signal_tag += (f'  ***SELL9 WR:{wr:.1f}%({res["sell_wins"]}/{res["sell_total_signals"]})'
-                                           f' | {r_stat} | {verdict}***')
-
-                        ha_sym = 'YUK' if res['ha_color'] == 'HAY' else 'DUS'
-                        self.update_queue.put(('coin_log',
-                            f'[{completed:>3}/{len(kriptolar)}] {coin:<12} '
-                            f'${res["price"]:>14.6f}  B:{res["buy_setup"]}  S:{res["sell_setup"]}  '
-                            f'{ha_sym}{signal_tag}'))
-                    else:
-                        failed += 1
-                        cn = raw_sym.split('/')[0]
-                        self.update_queue.put(('coin_log',
-                            f'[{completed:>3}/{len(kriptolar)}] {cn:<12} -- VERİ YOK'))
-                except Exception as e:
+        for raw_sym, res, err in chain(hits, results):
+            completed += 1
+            try:
+                if err is not None:
+                    raise err
+                if res:
+                    coin = res['sembol']
+                    self.current_prices[coin] = res['price']
+                    signal_tag = ''
+
+                    if res['buy_9']:
+                        self.buy_signals[coin] = res
+                        self.total_signals += 1
+                        wr     = res['buy_winrate']
+                        sdist  = res['support_dist_pct']
+                        wr_ok  = res['buy_wr_ok']
+                        s_stat = res['support_status']
+                        verdict = ('GEÇTI-LONG' if res['buy_passed']
+                                   else (f'ATILDI-WR:{wr:.0f}%<{self.WINRATE_THRESHOLD:.0f}%' if not wr_ok
+                                         else f'ATILDI-{s_stat}'))
+                        signal_tag += (f'  ***BUY9 WR:{wr:.1f}%({res["buy_wins"]}/{res["buy_total_signals"]})'
+                                       f' | {s_stat} | {verdict}***')
+
+                    if res['sell_9']:
+                        self.sell_signals[coin] = res
+                        self.total_signals += 1
+                        wr     = res['sell_winrate']
+                        rdist  = res['resistance_dist_pct']
+                        wr_ok  = res['sell_wr_ok']
+                        r_stat = res['resistance_status']
+                        verdict = ('GEÇTI-SHORT' if res['sell_passed']
+                                   else (f'ATILDI-WR:{wr:.0f}%<{self.WINRATE_THRESHOLD:.0f}%' if not wr_ok
+                                         else f'ATILDI-{r_stat}'))
+                        signal_tag += (f'  ***SELL9 WR:{wr:.1f}%({res["sell_wins"]}/{res["sell_total_signals"]})'
+                                       f' | {r_stat} | {verdict}***')
+
+                    ha_sym = 'YUK' if res['ha_color'] == 'HAY' else 'DUS'
+                    self.update_queue.put(('coin_log',
+                        f'[{completed:>3}/{len(kriptolar)}] {coin:<12} '
+                        f'${res["price"]:>14.6f}  B:{res["buy_setup"]}  S:{res["sell_setup"]}  '
+                        f'{ha_sym}{signal_tag}'))
+                else:
                     failed += 1
                     cn = raw_sym.split('/')[0]
                     self.update_queue.put(('coin_log',
-                        f'[{completed:>3}/{len(kriptolar)}] {cn:<12} -- HATA: {str(e)[:40]}'))
-
-                self.update_queue.put(('progress', completed / len(kriptolar) * 100))
-                if completed % 50 == 0:
-                    self.update_queue.put(('status',
-                        f'{completed}/{len(kriptolar)} tarandı | '
-                        f'BUY:{len(self.buy_signals)} SELL:{len(self.sell_signals)} | HATA:{failed}'))
+                        f'[{completed:>3}/{len(kriptolar)}] {cn:<12} -- VERİ YOK'))
+            except Exception as e:
+                failed += 1
+                cn = raw_sym.split('/')[0]
+                self.update_queue.put(('coin_log',
+                    f'[{completed:>3}/{len(kriptolar)}] {cn:<12} -- HATA: {str(e)[:40]}'))
+
+            self.update_queue.put(('progress', completed / len(kriptolar) * 100))
+            if completed % 50 == 0:
+                self.update_queue.put(('status',
+                    f'{completed}/{len(kriptolar)} tarandı | '
+                    f'BUY:{len(self.buy_signals)} SELL:{len(self.sell_signals)} | HATA:{failed}'))
 
         q_buys  = sorted([(s, g) for s, g in self.buy_signals.items()  if g['buy_passed']],
                           key=lambda x: x[1]['buy_winrate'], reverse=True)
@@ -653,12 +865,11 @@ class Advanced500Scanner:
 
         for i, (sembol, sig) in enumerate(q_buys[:MAX_NEW]):
             try:
-                open_count = sum(1 for p in self.paper_trading.positions.values() if p['status'] == 'open')
+                open_count = self.paper_trading.open_count()
                 if open_count >= MAX_POS:
                     sig['trade_result'] = 'MAX_POS'
                     break
-                key = f"{sembol}_long"
-                if key in self.paper_trading.positions and self.paper_trading.positions[key]['status'] == 'open':
+                if self.paper_trading.is_open(f"{sembol}_long"):
                     sig['trade_result'] = 'HATA:Zaten açık'
                     continue
                 ok, msg = self.paper_trading.open_trade(sembol, sig['price'], usdt_size=500, winrate=sig['buy_winrate'])
@@ -673,12 +884,11 @@ class Advanced500Scanner:
 
         for i, (sembol, sig) in enumerate(q_sells[:MAX_NEW]):
             try:
-                open_count = sum(1 for p in self.paper_trading.positions.values() if p['status'] == 'open')
+                open_count = self.paper_trading.open_count()
                 if open_count >= MAX_POS:
                     sig['trade_result'] = 'MAX_POS'
                     break
-                key = f"{sembol}_short"
-                if key in self.paper_trading.positions and self.paper_trading.positions[key]['status'] == 'open':
+                if self.paper_trading.is_open(f"{sembol}_short"):
                     sig['trade_result'] = 'HATA:Zaten short açık'
                     continue
                 ok, msg = self.paper_trading.open_trade(
@@ -703,57 +913,84 @@ class Advanced500Scanner:
         self.update_queue.put(('refresh_all', True))
         self._last_scan_time = time.time()
         self.is_scanning     = False
+        self.save_scan()
 
     # ── Canlı Fiyat ───────────────────────────────────────────────
     def fetch_live_prices(self):
-        symbols_to_check = set()
-        for key, pos in self.paper_trading.positions.items():
-            if pos['status'] == 'open':
-                symbols_to_check.add(pos['sembol'])
+        """Açık sembollerin fiyatları tek toplu istekle (hata olursa sembol başına)"""
+        self.current_prices.update(self.fetch_open_tickers())
 
-        if not symbols_to_check or not self.exchange:
-            return
+    def fetch_open_tickers(self):
+        return self.refresher.refresh(self.exchange, self.paper_trading.open_symbols())
 
-        for sym in symbols_to_check:
-            try:
-                ticker = self.exchange.fetch_ticker(f"{sym}/USDT")
-                self.current_prices[sym] = float(ticker['last'])
-            except Exception:
-                pass
+    def start_feed(self):
+        """Canlı fiyat akışını başlatır (PRICE_FEED=None → eski 30 sn yoklama)"""
+        if self.feed is not None or not self.PRICE_FEED:
+            return
+        self.feed = make_feed(self.PRICE_FEED, self.on_prices,
+                              fetch=self.fetch_open_tickers, interval=self.FEED_POLL_SEC,
+                              on_bars=self.on_bars, symbols=self.paper_trading.open_symbols)
+        if self.feed is None:
+            return
+        self.feed.start()
+        self.update_queue.put(('log', f'Canlı fiyat akışı: {self.feed.name}'))
+
+    def stop_feed(self):
+        if self.feed is not None:
+            self.feed.stop()
+            self.feed = None
+
+    def on_prices(self, prices):
+        """Akıştan gelen fiyatlar: açık pozisyonlar anında TP/SL kontrolünden geçer"""
+        self.current_prices.update(prices)
+        syms = [s for s in self.paper_trading.open_symbols() if s in prices]
+        if syms:
+            self.check_tpsl(syms)
+
+    def on_bars(self, bars):
+        """Kline akışından OHLC grupları: mum içi TP/SL tek vektörel geçişte"""
+        self.current_prices.update({s: b[3] for s, b in bars.items()})
+        self.report_closed(self.paper_trading.update_bars(bars))
+
+    def check_tpsl(self, syms=None):
+        """Açık pozisyonları bilinen son fiyatla günceller, TP/SL kapanışlarını loglar"""
+        if syms is None:
+            syms = self.paper_trading.open_symbols()
+        for sym in syms:
+            if sym not in self.current_prices:
+                continue
+            self.report_closed(self.paper_trading.update_price(sym, self.current_prices[sym]))
+
+    def report_closed(self, results):
+        for res in results or ():
+            icon    = 'KÂRZANÇ' if res['pnl'] > 0 else 'KAYIP'
+            dir_sym = 'LONG' if res['direction'] == 'long' else 'SHORT'
+            self.update_queue.put(('log',
+                f'{icon} {dir_sym} KAPANDI: {res["sembol"]} | '
+                f'{res["reason"]} | {res["pnl_percent"]:.2f}% | '
+                f'{res["usdt_size"]:.0f} USDT'))
+            self.update_queue.put(('refresh_closed', True))
 
     # ── Sürekli Döngü ─────────────────────────────────────────────
     def run_continuous(self):
         self.is_running = True
         self.update_queue.put(('status', 'Sistem aktif'))
         last_price_fetch = 0
+        self.start_feed()
 
         while self.is_running:
             now       = time.time()
             elapsed   = now - self._last_scan_time
             remaining = max(0, self.SCAN_INTERVAL_SEC - elapsed)
 
-            if now - last_price_fetch >= 30:
+            # Akış canlıysa TP/SL fiyat geldikçe on_prices'ta yapılır
+            feed_ok = self.feed is not None and self.feed.alive()
+            if now - last_price_fetch >= 30 and not feed_ok:
                 self.fetch_live_prices()
                 last_price_fetch = now
 
-            if not self.is_scanning:
-                symbols_to_check = set()
-                for key, pos in self.paper_trading.positions.items():
-                    if pos['status'] == 'open':
-                        symbols_to_check.add(pos['sembol'])
-
-                for sym in symbols_to_check:
-                    if sym in self.current_prices:
-                        results = self.paper_trading.update_price(sym, self.current_prices[sym])
-                        if results:
-                            for res in results:
-                                icon    = 'KÂRZANÇ' if res['pnl'] > 0 else 'KAYIP'
-                                dir_sym = 'LONG' if res['direction'] == 'long' else 'SHORT'
-                                self.update_queue.put(('log',
-                                    f'{icon} {dir_sym} KAPANDI: {sym} | '
-                                    f'{res["reason"]} | {res["pnl_percent"]:.2f}% | '
-                                    f'{res["usdt_size"]:.0f} USDT'))
-                                self.update_queue.put(('refresh_closed', True))
+            if not self.is_scanning and not feed_ok:
+                self.check_tpsl()
 
             if not self.is_scanning and self.scan_count > 0:
                 mins = int(remaining // 60)
@@ -881,6 +1118,7 @@ class AdvancedScannerGUI:
 
     def stop_system(self):
         self.scanner.is_running = False
+        self.scanner.stop_feed()
         self.start_btn.config(state=tk.NORMAL)
         self.stop_btn.config(state=tk.DISABLED)
         self.rescan_btn.config(state=tk.DISABLED)
@@ -933,7 +1171,7 @@ class AdvancedScannerGUI:
         pv  = pt.get_portfolio_value(self.scanner.current_prices)
         pnl = pv - pt.initial_balance
         pnl_pct = pnl / pt.initial_balance * 100
-        ops = {k: v for k, v in pt.positions.items() if v['status'] == 'open'}
+        ops = pt.open_positions()
         long_ops  = {k: v for k, v in ops.items() if v['direction'] == 'long'}
         short_ops = {k: v for k, v in ops.items() if v['direction'] == 'short'}
 
@@ -1167,12 +1405,12 @@ class AdvancedScannerGUI:
         else:
             L.append('  Henüz kapalı işlem yok.')
 
-        total_pnl = sum(t['pnl'] for t in trades)
-        wins      = sum(1 for t in trades if t['pnl'] > 0)
+        s = self.scanner.paper_trading.get_stats()
         L += [
             '-'*160,
-            f'  Toplam İşlem: {len(trades)}  |  Kârlı: {wins}  |  Zararlı: {len(trades)-wins}  |  '
-            f'Net P&L: {total_pnl:+.2f} USDT',
+            f'  Toplam İşlem: {s["toplam_islem"]}  |  Kârlı: {s["basarili_islem"]}  |  '
+            f'Zararlı: {s["toplam_islem"]-s["basarili_islem"]}  |  '
+            f'Net P&L: {s["toplam_pnl"]:+.2f} USDT',
         ]
         self._set(self.t_closed, '\n'.join(L))
 
@@ -1184,16 +1422,9 @@ class AdvancedScannerGUI:
         gain_pct = gain / pt.initial_balance * 100
 
         # Coin bazlı kâr/zarar tablosu
-        coin_stats = {}
-        for t in pt.closed_trades:
-            c = t['sembol']
-            if c not in coin_stats:
-                coin_stats[c] = {'pnl': 0, 'count': 0, 'wins': 0, 'usdt': 0}
-            coin_stats[c]['pnl']   += t['pnl']
-            coin_stats[c]['count'] += 1
-            coin_stats[c]['usdt']  += t.get('usdt_size', 500)
-            if t['pnl'] > 0:
-                coin_stats[c]['wins'] += 1
+        coin_stats = pt.coin_stats()
+        recent     = {w: pt.get_stats(w) for w in pt.tstats.windows}
+        rm         = self.scanner.refresher.metrics()
 
         L = [
             'TRADE İSTATİSTİKLERİ',
@@ -1202,6 +1433,8 @@ class AdvancedScannerGUI:
             f'Taranan Coin   : {len(self.scanner._valid_symbols) if self.scanner._valid_symbols else "-"}',
             f'Toplam Sinyal  : {self.scanner.total_signals}',
             f'WR Eşiği       : >= %{self.scanner.WINRATE_THRESHOLD:.0f}',
+            f'Fiyat Yenileme : {rm["avg_ms"]:.0f} ms ort. / {rm["last_ms"]:.0f} ms son  '
+            f'({rm["calls"]} tur, {rm["fallbacks"]} tekil)',
             '',
             f'Başlangıç      : {pt.initial_balance:>12,.2f} USDT',
             f'Güncel Portföy : {pv:>12,.2f} USDT',
@@ -1214,7 +1447,13 @@ class AdvancedScannerGUI:
             f'Win Rate: {s["win_rate"]:.1f}%',
             f'Ort Kaz : {s["ort_kazanc"]:+.2f}%',
             f'Kâr Fak : {s["kazanc_faktoru"]:.2f}',
+            f'Maks DD : {s["max_dusus"]:.2f} USDT ({s["max_dusus_pct"]:.2f}%)',
+            f'Ort Süre: {s["ort_sure"]/3600:.1f} sa',
         ]
+        for w, r in recent.items():
+            if r['toplam_islem']:
+                L.append(f'Son {w:<4}: WR {r["win_rate"]:.1f}%  |  '
+                         f'PnL {r["toplam_pnl"]:+.2f}$  |  KF {r["kazanc_faktoru"]:.2f}')
 
         # COİN BAZLI TABLO
         if coin_stats:
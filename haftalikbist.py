@@ -8,7 +8,8 @@ import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 import warnings
-import time
+import indicators
+from ohlcv_store import yf_history, yf_bulk_history
 warnings.filterwarnings('ignore')
 
 def bist_tum_hisseler_cek():
@@ -133,62 +134,14 @@ def heiken_ashi(df):
     """
     Heiken Ashi mumlarını hesaplar
     """
-    df = df.copy()
-    
-    df['HA_Close'] = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-    df['HA_Open'] = 0.0
-    df.loc[df.index[0], 'HA_Open'] = (df['Open'].iloc[0] + df['Close'].iloc[0]) / 2
-    
-    for i in range(1, len(df)):
-        df.loc[df.index[i], 'HA_Open'] = (df['HA_Open'].iloc[i-1] + df['HA_Close'].iloc[i-1]) / 2
-    
-    df['HA_High'] = df[['High', 'HA_Open', 'HA_Close']].max(axis=1)
-    df['HA_Low'] = df[['Low', 'HA_Open', 'HA_Close']].min(axis=1)
-    
-    return df
+    return indicators.heiken_ashi(df)
 
 def td_sequential_heiken_ashi(df):
     """
     Heiken Ashi mumları üzerinde TD Sequential hesaplama
     """
-    df = df.copy()
-    df = heiken_ashi(df)
-    
-    # Buy Setup
-    df['buy_setup'] = 0
-    buy_count = 0
-    
-    for i in range(4, len(df)):
-        if df['HA_Close'].iloc[i] < df['HA_Close'].iloc[i-4]:
-            buy_count += 1
-            df.loc[df.index[i], 'buy_setup'] = buy_count
-            if buy_count >= 9:
-                buy_count = 9
-        else:
-            buy_count = 0
-    
-    # Sell Setup
-    df['sell_setup'] = 0
-    sell_count = 0
-    
-    for i in range(4, len(df)):
-        if df['HA_Close'].iloc[i] > df['HA_Close'].iloc[i-4]:
-            sell_count += 1
-            df.loc[df.index[i], 'sell_setup'] = sell_count
-            if sell_count >= 9:
-                sell_count = 9
-        else:
-            sell_count = 0
-    
-    # Trend analizi
-    df['ha_trend'] = 'NÖTR'
-    for i in range(len(df)):
-        if df['HA_Close'].iloc[i] > df['HA_Open'].iloc[i]:
-            df.loc[df.index[i], 'ha_trend'] = 'YÜKSELİŞ'
-        elif df['HA_Close'].iloc[i] < df['HA_Open'].iloc[i]:
-            df.loc[df.index[i], 'ha_trend'] = 'DÜŞÜŞ'
-    
-    return df
+    # Eski sayaç 9'a sabitlenmeden önce yazılıyordu: 9'u aşan seriler 10 olarak kalır
+    return indicators.td_sequential_heiken_ashi(df, cap=10, labels=indicators.TREND_TR)
 
 def trend_gucu_hesapla(df):
     """
@@ -259,13 +212,14 @@ def buy_setup_basari_orani_analiz(df):
     
     return basari_orani, ortalama_kazanc, len(kazanc_listesi)
 
-def hisse_tara(sembol, periyot="3mo"):
+def hisse_tara(sembol, periyot="3mo", df=None):
     """
-    Tek bir hisse senedini tarar
+    Tek bir hisse senedini tarar (df verilirse indirme yapılmaz)
     """
     try:
-        hisse = yf.Ticker(sembol)
-        df = hisse.history(period=periyot, interval="1d")
+        if df is None:
+            hisse = yf.Ticker(sembol)
+            df = yf_history(hisse, period=periyot, interval="1d")
         
         if df.empty or len(df) < 10:
             return None
@@ -305,14 +259,53 @@ def hisse_tara(sembol, periyot="3mo"):
     except Exception as e:
         return None
 
-def buy_setup_gecmis_analiz(sembol):
+def hisse_tara_toplu(veriler):
+    """
+    hisse_tara'nın toplu hali: tüm hisseler tek N × T matriste
+    (indicators.batch_indicators) hesaplanır.
+
+    Returns:
+        {sembol: sonuç} — hisse_tara ile aynı alanlar; 10 bardan kısa
+        seriler yer almaz
+    """
+    syms, m = indicators.batch_indicators(veriler, cap=10, labels=indicators.TREND_TR)
+    if not syms:
+        return {}
+    trend = indicators.trend_strength(m['up'], m['down'], m['n'], labels=indicators.STRENGTH_TR)
+    sonuclar = {}
+    for i, sembol in enumerate(syms):
+        if m['n'][i] < 10:
+            continue
+        ha_close, ha_open = m['ha_close'][i], m['ha_open'][i]
+        buy_setup, sell_setup = int(m['buy'][i]), int(m['sell'][i])
+        sonuclar[sembol] = {
+            'sembol': sembol.replace('.IS', ''),
+            'son_fiyat': round(m['close'][i], 2),
+            'ha_close': round(ha_close, 2),
+            'ha_open': round(ha_open, 2),
+            'ha_renk': "🟢 YEŞİL" if ha_close > ha_open else "🔴 KIRMIZI",
+            'ha_trend': m['ha_trend'][i],
+            'trend_gucu': trend[i],
+            'buy_setup_9': buy_setup == 9,
+            'sell_setup_9': sell_setup == 9,
+            'buy_setup': buy_setup,
+            'sell_setup': sell_setup,
+            'tarih': veriler[sembol].index[-1].strftime('%Y-%m-%d'),
+            'basari_orani': None,
+            'ort_kazanc': None,
+            'sinyal_sayisi': 0
+        }
+    return sonuclar
+
+def buy_setup_gecmis_analiz(sembol, df=None):
     """
     Buy Setup 9 olan hisseler için daha uzun geçmiş veriyle detaylı analiz
     """
     try:
-        hisse = yf.Ticker(sembol)
-        # 2 yıllık veri al (daha iyi geçmiş analiz için)
-        df = hisse.history(period="2y", interval="1d")
+        if df is None:
+            hisse = yf.Ticker(sembol)
+            # 2 yıllık veri al (daha iyi geçmiş analiz için)
+            df = yf_history(hisse, period="2y", interval="1d")
         
         if df.empty or len(df) < 50:
             return None
@@ -373,13 +366,18 @@ def tum_hisseleri_tara():
     # İlerleme çubuğu için
     toplam = len(bist_hisseler)
     
+    # Tüm hisselerin verisi toplu indirilir (yf.download, gruplar halinde)
+    print("Veriler indiriliyor...")
+    veriler = yf_bulk_history(bist_hisseler, period="3mo", interval="1d")
+    sonuclar = hisse_tara_toplu(veriler)
+    
     # Her hisseyi tara
     for i, sembol in enumerate(bist_hisseler, 1):
         # İlerleme göster
         yuzde = (i / toplam) * 100
         print(f"İlerleme: [{i}/{toplam}] %{yuzde:.1f} - {sembol:15s}", end='\r')
         
-        sonuc = hisse_tara(sembol)
+        sonuc = sonuclar.get(sembol)
         
         if sonuc:
             if sonuc['buy_setup_9']:
@@ -390,10 +388,6 @@ def tum_hisseleri_tara():
                 diger_sinyaller.append(sonuc)
         else:
             basarisiz += 1
-        
-        # API rate limit için kısa bekleme
-        if i % 10 == 0:
-            time.sleep(0.5)
     
     print("\n" + "=" * 90)
     print(f"✓ Tarama tamamlandı!")
@@ -426,17 +420,15 @@ def tum_hisseleri_tara():
         print("Başarı = Sinyal sonrası 20 gün içinde fiyat %2'den fazla yükseldi\n")
         
         gecmis_sonuclar = []
+        gecmis_veriler = yf_bulk_history([h['sembol'] + '.IS' for h in buy_setup_9_list_sorted],
+                                         period="2y", interval="1d")
         
         for i, h in enumerate(buy_setup_9_list_sorted, 1):
             print(f"{h['sembol']} analiz ediliyor... [{i}/{len(buy_setup_9_list_sorted)}]", end='\r')
             
-            gecmis_veri = buy_setup_gecmis_analiz(h['sembol'] + '.IS')
+            gecmis_veri = buy_setup_gecmis_analiz(h['sembol'] + '.IS', df=gecmis_veriler[h['sembol'] + '.IS'])
             if gecmis_veri:
                 gecmis_sonuclar.append(gecmis_veri)
-            
-            # Kısa bekleme
-            if i % 5 == 0:
-                time.sleep(0.3)
         
         print("\n" + "-" * 90)
         
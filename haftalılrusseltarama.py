@@ -5,9 +5,11 @@ Amerikan küçük şirketlerini tarar
 
 import yfinance as yf
 import pandas as pd
+import numpy as np
 from datetime import datetime
 import warnings
-import time
+import indicators
+from ohlcv_store import yf_history, yf_bulk_history
 
 warnings.filterwarnings('ignore')
 
@@ -66,21 +68,8 @@ RUSSELL_2000_STOCKS = [
 
 def heiken_ashi(df):
     """Heiken Ashi hesapla"""
-    df = df.copy()
-    
-    df['HA_Close'] = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-    df['HA_Open'] = 0.0
-    df.iloc[0, df.columns.get_loc('HA_Open')] = (df['Open'].iloc[0] + df['Close'].iloc[0]) / 2
-    
-    for i in range(1, len(df)):
-        df.iloc[i, df.columns.get_loc('HA_Open')] = (
-            df['HA_Open'].iloc[i-1] + df['HA_Close'].iloc[i-1]
-        ) / 2
-    
-    df['HA_High'] = df[['High', 'HA_Open', 'HA_Close']].max(axis=1)
-    df['HA_Low'] = df[['Low', 'HA_Open', 'HA_Close']].min(axis=1)
+    df = indicators.heiken_ashi(df)
     df['HA_Yesil'] = df['HA_Close'] > df['HA_Open']
-    
     return df
 
 
@@ -88,25 +77,9 @@ def td_sequential(df):
     """TD Sequential + Heiken Ashi"""
     df = heiken_ashi(df)
     
-    # Buy Setup
-    df['Buy_Setup'] = 0
-    count = 0
-    for i in range(4, len(df)):
-        if df['HA_Close'].iloc[i] < df['HA_Close'].iloc[i-4]:
-            count += 1
-            df.iloc[i, df.columns.get_loc('Buy_Setup')] = min(count, 9)
-        else:
-            count = 0
-    
-    # Sell Setup
-    df['Sell_Setup'] = 0
-    count = 0
-    for i in range(4, len(df)):
-        if df['HA_Close'].iloc[i] > df['HA_Close'].iloc[i-4]:
-            count += 1
-            df.iloc[i, df.columns.get_loc('Sell_Setup')] = min(count, 9)
-        else:
-            count = 0
+    buy, sell = indicators.td_setup_counts(df['HA_Close'].values, cap=9)
+    df['Buy_Setup'] = buy
+    df['Sell_Setup'] = sell
     
     # Trend gücü
     if len(df) >= 5:
@@ -128,12 +101,13 @@ def td_sequential(df):
     return df, trend
 
 
-def hisse_tara(ticker):
-    """Tek bir hisse tarar"""
+def hisse_tara(ticker, df=None):
+    """Tek bir hisse tarar (df verilirse indirme yapılmaz)"""
     try:
-        # Haftalık veri çek (son 2 yıl)
-        stock = yf.Ticker(ticker)
-        df = stock.history(period='2y', interval='1d')
+        if df is None:
+            # Haftalık veri çek (son 2 yıl)
+            stock = yf.Ticker(ticker)
+            df = yf_history(stock, period='2y', interval='1d')
         
         if df.empty or len(df) < 20:
             return None
@@ -187,6 +161,44 @@ def hisse_tara(ticker):
         return None
 
 
+def hisse_tara_toplu(veriler):
+    """
+    hisse_tara'nın toplu hali: tüm hisseler tek N × T matriste
+    (indicators.batch_indicators) hesaplanır.
+
+    Returns:
+        {ticker: sonuç} — hisse_tara ile aynı alanlar; 20 bardan kısa
+        seriler yer almaz
+    """
+    syms, m = indicators.batch_indicators(veriler, cap=9)
+    if not syms:
+        return {}
+    up = m['up']
+    trend = np.select([up >= 4, up >= 3, up <= 1, up <= 2],
+                      ['GÜÇLÜ YÜKSELİŞ', 'ORTA YÜKSELİŞ', 'GÜÇLÜ DÜŞÜŞ', 'ORTA DÜŞÜŞ'],
+                      default='KARARSIZ')
+    sonuclar = {}
+    for i, ticker in enumerate(syms):
+        if m['n'][i] < 20:
+            continue
+        buy_setup, sell_setup = int(m['buy'][i]), int(m['sell'][i])
+        sonuclar[ticker] = {
+            'ticker': ticker,
+            'fiyat': round(m['close'][i], 2),
+            'buy_setup': buy_setup,
+            'sell_setup': sell_setup,
+            'ha_yesil': m['ha_close'][i] > m['ha_open'][i],
+            'trend': str(trend[i]),
+            'hacim_artis': round(m['volume_chg'][i], 1),
+            'week_52_konum': round(m['range_pos'][i], 1),
+            'buy_9_aktif': buy_setup == 9,
+            'buy_9_tamamlandi': int(m['buy_prev'][i]) == 9 and buy_setup != 9,
+            'sell_9_aktif': sell_setup == 9,
+            'sell_9_tamamlandi': int(m['sell_prev'][i]) == 9 and sell_setup != 9,
+        }
+    return sonuclar
+
+
 def tara():
     """Tüm Russell 2000 hisselerini tarar"""
     
@@ -206,10 +218,15 @@ def tara():
     yaklasan_list = []
     basarisiz = 0
     
+    # Tüm hisselerin verisi toplu indirilir (yf.download, gruplar halinde)
+    print("📥 Veriler indiriliyor...")
+    veriler = yf_bulk_history(RUSSELL_2000_STOCKS, period='2y', interval='1d')
+    sonuclar = hisse_tara_toplu(veriler)
+    
     for i, ticker in enumerate(RUSSELL_2000_STOCKS, 1):
         print(f"İlerleme: [{i}/{len(RUSSELL_2000_STOCKS)}] {ticker:8s}", end='\r')
         
-        sonuc = hisse_tara(ticker)
+        sonuc = sonuclar.get(ticker)
         
         if sonuc:
             if sonuc['buy_9_tamamlandi']:
@@ -224,10 +241,6 @@ def tara():
                 yaklasan_list.append(sonuc)
         else:
             basarisiz += 1
-        
-        # API rate limit
-        if i % 5 == 0:
-            time.sleep(0.2)
     
     print(f"\n\n✅ Tarama tamamlandı!")
     print(f"   • Başarılı: {len(RUSSELL_2000_STOCKS) - basarisiz}")
@@ -0,0 +1,396 @@
+"""
+Heiken Ashi + TD Sequential ortak hesaplama motoru
+Tüm tarayıcılar (spotscan, scanandbacktest, spotscanmail, haftalikbist,
+us_stock_scanner, Russell, BIST GUI, binance_web_scanner, doktor_ranking)
+HA / TD9 hesaplamasını buradan alır.
+
+Çekirdek fonksiyonlar NumPy dizileri üzerinde çalışır:
+- HA_Open   : özyineleme çekirdeği (satır satır df.loc yazımı yok)
+- Setup     : ardışık koşul uzunluğu (run-length) + üst sınır
+- ha_trend  : np.select ile tek geçişte
+
+Matris modu (batch_indicators): N sembol × T bar tek NaN dolgulu matriste;
+HA, TD sayaçları, trend gücü, volatilite ve 52 hafta konumu tüm evren
+için birkaç dizi işlemiyle hesaplanır.
+"""
+
+from itertools import accumulate
+
+import numpy as np
+
+TREND_TR = ('YÜKSELİŞ', 'DÜŞÜŞ', 'NÖTR')
+TREND_EN = ('BULLISH', 'BEARISH', 'NEUTRAL')
+
+# Trend gücü: (güçlü yük., güçlü düş., orta yük., orta düş., kararsız, belirsiz)
+STRENGTH_TR = ('GÜÇLÜ YÜKSELİŞ', 'GÜÇLÜ DÜŞÜŞ', 'ORTA YÜKSELİŞ', 'ORTA DÜŞÜŞ', 'KARARSIZ', 'BELİRSİZ')
+STRENGTH_EN = ('STRONG BULLISH', 'STRONG BEARISH', 'MODERATE BULLISH', 'MODERATE BEARISH',
+               'INDECISIVE', 'UNCLEAR')
+
+
+# ============================================================================
+# NUMPY ÇEKİRDEK
+# ============================================================================
+def heiken_ashi_arrays(o, h, l, c):
+    """
+    Heiken Ashi dizilerini hesaplar
+
+    Returns:
+        (ha_open, ha_close, ha_high, ha_low) float64 dizileri
+    """
+    o = np.asarray(o, dtype=float)
+    h = np.asarray(h, dtype=float)
+    l = np.asarray(l, dtype=float)
+    c = np.asarray(c, dtype=float)
+    n = len(c)
+
+    ha_close = (o + h + l + c) / 4
+    if n == 0:
+        return ha_close.copy(), ha_close, ha_close.copy(), ha_close.copy()
+
+    # HA_Open[i] = (HA_Open[i-1] + HA_Close[i-1]) / 2 — eski döngüyle bire bir aynı
+    seed = (o[0] + c[0]) / 2
+    ha_open = np.fromiter(
+        accumulate(ha_close[:-1].tolist(), lambda prev, hc: (prev + hc) / 2, initial=seed),
+        dtype=float, count=n)
+
+    ha_high = np.fmax(np.fmax(h, ha_open), ha_close)
+    ha_low  = np.fmin(np.fmin(l, ha_open), ha_close)
+    return ha_open, ha_close, ha_high, ha_low
+
+
+def run_length(cond, cap=None):
+    """Her bar için koşulun o bara kadar kaç bar üst üste sağlandığı"""
+    cond = np.asarray(cond, dtype=bool)
+    idx  = np.arange(len(cond))
+    last_false = np.maximum.accumulate(np.where(cond, -1, idx))
+    runs = idx - last_false
+    if cap is not None:
+        np.minimum(runs, cap, out=runs)
+    return runs.astype(np.int64)
+
+
+def td_setup_counts(ha_close, cap=9, lookback=4):
+    """
+    TD Sequential buy/sell setup sayaçları
+
+    Buy  : HA_Close[i] < HA_Close[i-4] ardışık bar sayısı
+    Sell : HA_Close[i] > HA_Close[i-4] ardışık bar sayısı
+    İlk `lookback` bar her zaman 0'dır.
+
+    Returns:
+        (buy, sell) int64 dizileri, `cap` ile sınırlı
+    """
+    ha   = np.asarray(ha_close, dtype=float)
+    buy  = np.zeros(len(ha), dtype=bool)
+    sell = np.zeros(len(ha), dtype=bool)
+    if len(ha) > lookback:
+        buy[lookback:]  = ha[lookback:] < ha[:-lookback]
+        sell[lookback:] = ha[lookback:] > ha[:-lookback]
+    return run_length(buy, cap), run_length(sell, cap)
+
+
+def ha_trend(ha_open, ha_close, labels=TREND_TR):
+    """Mum bazında trend etiketi (yükseliş, düşüş, nötr)"""
+    up, down, neutral = labels
+    ha_open  = np.asarray(ha_open, dtype=float)
+    ha_close = np.asarray(ha_close, dtype=float)
+    return np.select([ha_close > ha_open, ha_close < ha_open], [up, down],
+                     default=neutral).astype(object)
+
+
+# ============================================================================
+# MATRİS (ÇOK SEMBOL) ÇEKİRDEK — satır = sembol, sütun = bar
+# ============================================================================
+def align_frames(frames, columns=('Open', 'High', 'Low', 'Close', 'Volume'), bars=None):
+    """
+    {sembol: DataFrame} → (semboller, {sütun: N × T matris}, uzunluklar)
+
+    Seriler sağa hizalanır (son bar son sütunda), kısa geçmişlerin başı
+    NaN ile doldurulur. Hizalama tarihe değil konuma göredir; böylece her
+    satır tek sembol hesabıyla aynı sonucu verir. Boş seriler atlanır;
+    bars verilirse yalnızca son `bars` bar alınır.
+    """
+    syms, cols = [], {c: [] for c in columns}
+    for sym, df in frames.items():
+        if df is None or len(df) == 0:
+            continue
+        syms.append(sym)
+        for c in columns:
+            v = df[c].values
+            cols[c].append(v[-bars:] if bars else v)
+    n = np.array([len(v) for v in cols[columns[0]]], dtype=np.int64)
+    T = int(n.max()) if len(n) else 0
+    mats = {}
+    for c in columns:
+        m = np.full((len(syms), T), np.nan)
+        for i, v in enumerate(cols[c]):
+            m[i, T - len(v):] = v
+        mats[c] = m
+    return syms, mats, n
+
+
+def heiken_ashi_matrix(o, h, l, c):
+    """
+    heiken_ashi_arrays'in matris hali: özyineleme bar (sütun) üzerinden,
+    her adım tüm sembollerde tek vektör işlemi.
+
+    Fark: her satır ilk geçerli (NaN olmayan kapanış) barından tohumlanır,
+    heiken_ashi_arrays ise 0. indeksten. align_frames kısa geçmişleri
+    soldan NaN ile doldurduğu için bilerek böyledir; satır row[first:]
+    üzerinde heiken_ashi_arrays ile bire bir aynıdır, öncesi NaN kalır.
+    Doldurulmuş satırın tamamı heiken_ashi_arrays'e verilirse tohum NaN
+    olur ve ha_open baştan sona NaN çıkar. Aradaki NaN barlar iki yolda
+    da özyinelemeyi aynı şekilde bozar.
+    """
+    o, h, l, c = (np.asarray(x, dtype=float) for x in (o, h, l, c))
+    ha_close = (o + h + l + c) / 4
+    N, T = c.shape
+    valid = ~np.isnan(c)
+    first = np.where(valid.any(axis=1), valid.argmax(axis=1), T)
+    rows  = np.arange(N)
+    seed  = np.full(N, np.nan)
+    ok    = first < T
+    seed[ok] = (o[rows[ok], first[ok]] + c[rows[ok], first[ok]]) / 2
+
+    ha_open = np.full((N, T), np.nan)
+    prev    = np.full(N, np.nan)
+    for j in range(T):
+        start = first == j
+        prev[start] = seed[start]
+        ha_open[:, j] = prev
+        prev = (prev + ha_close[:, j]) / 2
+
+    ha_high = np.fmax(np.fmax(h, ha_open), ha_close)
+    ha_low  = np.fmin(np.fmin(l, ha_open), ha_close)
+    return ha_open, ha_close, ha_high, ha_low
+
+
+def run_length_matrix(cond, cap=None):
+    """run_length, her satır için ayrı (axis=1)"""
+    cond = np.asarray(cond, dtype=bool)
+    idx  = np.arange(cond.shape[1])
+    last_false = np.maximum.accumulate(np.where(cond, -1, idx), axis=1)
+    runs = idx - last_false
+    if cap is not None:
+        np.minimum(runs, cap, out=runs)
+    return runs.astype(np.int64)
+
+
+def td_setup_matrix(ha_close, cap=9, lookback=4):
+    """td_setup_counts'un matris hali (NaN karşılaştırmaları koşulu bozar)"""
+    ha   = np.asarray(ha_close, dtype=float)
+    buy  = np.zeros(ha.shape, dtype=bool)
+    sell = np.zeros(ha.shape, dtype=bool)
+    if ha.shape[1] > lookback:
+        buy[:, lookback:]  = ha[:, lookback:] < ha[:, :-lookback]
+        sell[:, lookback:] = ha[:, lookback:] > ha[:, :-lookback]
+    return run_length_matrix(buy, cap), run_length_matrix(sell, cap)
+
+
+def trend_strength(up, down, n, k=5, labels=STRENGTH_TR):
+    """Son k mumdaki yükseliş / düşüş sayılarından trend gücü etiketi"""
+    strong_up, strong_down, mid_up, mid_down, mixed, unclear = labels
+    up, down = np.asarray(up), np.asarray(down)
+    return np.select([np.asarray(n) < k, up >= 4, down >= 4, up >= 3, down >= 3],
+                     [unclear, strong_up, strong_down, mid_up, mid_down],
+                     default=mixed).astype(object)
+
+
+def batch_indicators(frames, cap=9, lookback=4, trend_k=5, vol_k=12, range_k=52, volume_k=20,
+                     labels=TREND_TR, bars=None):
+    """
+    Tüm evren için son bar göstergeleri
+
+    Returns:
+        (semboller, {ad: N uzunluklu dizi}) — n, close, ha_open, ha_close,
+        ha_trend, buy / sell (+ _prev: bir önceki bar), up / down (son
+        trend_k HA mumunda yükseliş / düşüş), volatility (son vol_k kapanışın
+        % getiri std'si), range_pos (son range_k barın aralığında kapanış
+        konumu %), volume_chg (son hacmin son volume_k ortalamasına göre %)
+    """
+    syms, m, n = align_frames(frames, bars=bars)
+    if not syms:
+        return syms, {}
+    o, h, l, c, v = m['Open'], m['High'], m['Low'], m['Close'], m['Volume']
+    ha_o, ha_c, _, _ = heiken_ashi_matrix(o, h, l, c)
+    buy, sell = td_setup_matrix(ha_c, cap, lookback)
+    prev = -2 if c.shape[1] > 1 else -1
+
+    green = ha_c[:, -trend_k:] > ha_o[:, -trend_k:]
+    red   = ha_c[:, -trend_k:] < ha_o[:, -trend_k:]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cw  = c[:, -vol_k:]
+        ret = (cw[:, 1:] - cw[:, :-1]) / cw[:, :-1]
+        cnt = np.sum(~np.isnan(ret), axis=1)
+        vol = np.full(len(syms), np.nan)
+        ok  = cnt > 1
+        if ok.any():
+            vol[ok] = np.nanstd(ret[ok], axis=1, ddof=1) * 100
+
+        hi, lo = np.nanmax(h[:, -range_k:], axis=1), np.nanmin(l[:, -range_k:], axis=1)
+        last   = c[:, -1]
+        pos    = (last - lo) / (hi - lo) * 100
+
+        avg_v  = np.nanmean(v[:, -volume_k:], axis=1)
+        vchg   = np.where(avg_v > 0, (v[:, -1] - avg_v) / avg_v * 100, 0.0)
+
+    return syms, {
+        'n': n, 'close': last, 'ha_open': ha_o[:, -1], 'ha_close': ha_c[:, -1],
+        'ha_trend': ha_trend(ha_o[:, -1], ha_c[:, -1], labels),
+        'buy': buy[:, -1], 'sell': sell[:, -1], 'buy_prev': buy[:, prev], 'sell_prev': sell[:, prev],
+        'up': green.sum(axis=1), 'down': red.sum(axis=1),
+        'volatility': vol, 'range_pos': pos, 'volume_chg': vchg,
+    }
+
+
+# ============================================================================
+# DATAFRAME YARDIMCILARI (Open/High/Low/Close sütunlu veriler)
+# ============================================================================
+def heiken_ashi(df):
+    """HA_Open / HA_Close / HA_High / HA_Low sütunlarını ekler"""
+    df = df.copy()
+    ha_o, ha_c, ha_h, ha_l = heiken_ashi_arrays(df['Open'].values, df['High'].values,
+                                                df['Low'].values, df['Close'].values)
+    df['HA_Close'] = ha_c
+    df['HA_Open']  = ha_o
+    df['HA_High']  = ha_h
+    df['HA_Low']   = ha_l
+    return df
+
+
+def td_sequential_heiken_ashi(df, cap=9, labels=TREND_TR):
+    """
+    Heiken Ashi mumları üzerinde TD Sequential hesaplama
+    buy_setup / sell_setup / ha_trend sütunlarını ekler
+    """
+    df = heiken_ashi(df)
+    buy, sell = td_setup_counts(df['HA_Close'].values, cap=cap)
+    df['buy_setup']  = buy
+    df['sell_setup'] = sell
+    df['ha_trend']   = ha_trend(df['HA_Open'].values, df['HA_Close'].values, labels)
+    return df
+
+
+def _continue_run(cond, prev, cap):
+    """run_length, baştaki kesintisiz seri önceki sayaçtan devam ederek"""
+    runs = run_length(cond)
+    lead = int(np.argmin(cond)) if not cond.all() else len(cond)
+    runs[:lead] += prev
+    np.minimum(runs, cap, out=runs)
+    return runs
+
+
+# ============================================================================
+# ARTIMLI (APPEND-ONLY) TD9 DURUMU
+# ============================================================================
+class TDState:
+    """
+    Sembol başına artımlı Heiken Ashi + TD Sequential durumu
+
+    ccxt OHLCV satırlarını ([ts, open, high, low, close, volume]) saklar.
+    Yeni mumlar geldiğinde yalnızca yeni barlar hesaplanır (O(yeni bar)):
+    son HA_Open/HA_Close, son `lookback` HA kapanışı ve son buy/sell
+    sayaçları önceki durumdan devam ettirilir. Son saklanan bar (henüz
+    kapanmamış mum) yeni veriyle değiştirilir. Kapanmış barlar farklı
+    gelirse geçmiş yeniden yazılmış demektir: durum sıfırlanır ve
+    `update` False döner (çağıran tam geçmişi yeniden çekmelidir).
+    """
+
+    FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, cap=9, lookback=4, maxlen=None):
+        self.cap      = cap
+        self.lookback = lookback
+        self.maxlen   = maxlen
+        self.reset()
+
+    def reset(self):
+        self.ts   = np.empty(0, dtype=np.int64)
+        self.ohlcv = np.empty((0, 5), dtype=float)
+        self.ha_o = np.empty(0, dtype=float)
+        self.ha_c = np.empty(0, dtype=float)
+        self.buy  = np.empty(0, dtype=np.int64)
+        self.sell = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.ts)
+
+    @property
+    def last_ts(self):
+        return int(self.ts[-1]) if len(self.ts) else None
+
+    def update(self, rows):
+        """
+        Yeni OHLCV satırlarını ekler
+
+        Returns:
+            True  → durum güncellendi
+            False → kapanmış barlar değişmiş, durum sıfırlandı
+        """
+        rows = np.asarray(rows, dtype=float)
+        if rows.ndim != 2 or len(rows) == 0:
+            return True
+        ts, vals = rows[:, 0].astype(np.int64), rows[:, 1:6]
+
+        n   = len(self.ts)
+        pos = int(np.searchsorted(self.ts, ts[0])) if n else 0
+        if n and ts[0] < self.ts[0]:
+            # Yeni veri saklanandan daha eskiye uzanıyor: baştan hesapla
+            self.reset()
+            pos = 0
+        elif n and pos < n:
+            if self.ts[pos] != ts[0]:
+                self.reset()
+                return False
+            # Örtüşen kapanmış barlar (son bar hariç) aynı olmalı
+            m = min(n - 1 - pos, len(ts))
+            if m > 0 and (not np.array_equal(self.ts[pos:pos + m], ts[:m])
+                          or not np.array_equal(self.ohlcv[pos:pos + m], vals[:m])):
+                self.reset()
+                return False
+            ts, vals = ts[m:], vals[m:]
+            pos += m
+            if len(ts) == 0:
+                return True
+
+        self._append(pos, ts, vals)
+        return True
+
+    def _append(self, pos, ts, vals):
+        """`pos` sonrasını atıp yeni barları önceki durumdan devam ettirerek ekler"""
+        lb = self.lookback
+        ha_c_new = (vals[:, 0] + vals[:, 1] + vals[:, 2] + vals[:, 3]) / 4
+
+        if pos > 0:
+            seed      = (self.ha_o[pos - 1] + self.ha_c[pos - 1]) / 2
+            tail      = self.ha_c[max(0, pos - lb):pos]
+            prev_buy  = int(self.buy[pos - 1])
+            prev_sell = int(self.sell[pos - 1])
+        else:
+            seed      = (vals[0, 0] + vals[0, 3]) / 2
+            tail      = np.empty(0)
+            prev_buy  = prev_sell = 0
+
+        k = len(ha_c_new)
+        ha_o_new = np.fromiter(
+            accumulate(ha_c_new[:-1].tolist(), lambda prev, hc: (prev + hc) / 2, initial=seed),
+            dtype=float, count=k)
+
+        # Karşılaştırma penceresi: eksik geçmiş NaN (koşul sağlanmaz)
+        ext = np.concatenate([np.full(lb - len(tail), np.nan), tail, ha_c_new])
+        buy  = _continue_run(ext[lb:] < ext[:-lb], prev_buy, self.cap)
+        sell = _continue_run(ext[lb:] > ext[:-lb], prev_sell, self.cap)
+
+        self.ts    = np.concatenate([self.ts[:pos], ts])
+        self.ohlcv = np.concatenate([self.ohlcv[:pos], vals])
+        self.ha_o  = np.concatenate([self.ha_o[:pos], ha_o_new])
+        self.ha_c  = np.concatenate([self.ha_c[:pos], ha_c_new])
+        self.buy   = np.concatenate([self.buy[:pos], buy])
+        self.sell  = np.concatenate([self.sell[:pos], sell])
+
+        if self.maxlen and len(self.ts) > self.maxlen:
+            cut = len(self.ts) - self.maxlen
+            self.ts, self.ohlcv = self.ts[cut:], self.ohlcv[cut:]
+            self.ha_o, self.ha_c = self.ha_o[cut:], self.ha_c[cut:]
+            self.buy, self.sell  = self.buy[cut:], self.sell[cut:]
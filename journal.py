@@ -0,0 +1,160 @@
+"""
+Kağıt hesap günlüğü (SQLite WAL)
+
+Hesap durumu (bakiye, açık pozisyonlar, kapalı işlemler) yalnızca
+eklenen olay kayıtlarıyla kalıcı hale gelir: open / update / close.
+Her SNAPSHOT_EVERY olayda bakiye ve açık pozisyonların anlık görüntüsü
+yazılır ve ondan eski olaylar silinir; yalnızca geçmiş taşıyan türler
+(varsayılan 'close') silinmez. Kapalı işlemler böylece yalnızca eklenen
+kayıtlar olarak kalır ve görüntü maliyeti işlem geçmişiyle büyümez.
+Açılışta geçmiş olaylar + son görüntü + sonraki olaylar okunur.
+
+Son tarama sonuçları gibi tek parça durumlar `meta` tablosunda
+anahtar → JSON olarak tutulur, böylece yeniden başlatma tam tarama
+gerektirmez. Değerler JSON'dur; datetime alanları geri dönüştürülür.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+DEFAULT_PATH = os.environ.get(
+    'PAPER_JOURNAL',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.paper_journal.sqlite'))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq     INTEGER PRIMARY KEY AUTOINCREMENT,
+    account TEXT NOT NULL,
+    kind    TEXT NOT NULL,
+    ts      REAL NOT NULL,
+    data    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_account ON events (account, seq);
+CREATE TABLE IF NOT EXISTS snapshots (
+    account TEXT PRIMARY KEY,
+    seq     INTEGER NOT NULL,
+    ts      REAL NOT NULL,
+    data    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    ts    REAL NOT NULL,
+    data  TEXT NOT NULL
+);
+"""
+
+
+def _default(o):
+    if isinstance(o, datetime):
+        return {'$dt': o.isoformat()}
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    if hasattr(o, 'item'):          # NumPy skalerleri
+        return o.item()
+    raise TypeError(f'JSON\'a çevrilemiyor: {type(o).__name__}')
+
+
+def _hook(d):
+    if len(d) == 1 and '$dt' in d:
+        return datetime.fromisoformat(d['$dt'])
+    return d
+
+
+def dumps(obj):
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':'))
+
+
+def loads(s):
+    return json.loads(s, object_hook=_hook)
+
+
+class Journal:
+    """Hesap adı anahtarlı, yalnızca eklenen olay günlüğü + anlık görüntüler"""
+
+    SNAPSHOT_EVERY = 500
+
+    def __init__(self, path=DEFAULT_PATH, snapshot_every=None):
+        self.path  = path
+        self.every = snapshot_every or self.SNAPSHOT_EVERY
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(_SCHEMA)
+        self._lock  = threading.Lock()
+        self._since = {}                # hesap → son görüntüden beri olay sayısı
+
+    # ── Olaylar ──
+    def append(self, account, kind, data):
+        """
+        Olayı ekler.
+
+        Returns:
+            True → anlık görüntü zamanı geldi (çağıran snapshot() yazmalı)
+        """
+        with self._lock:
+            self._db.execute('INSERT INTO events (account, kind, ts, data) VALUES (?, ?, ?, ?)',
+                             (account, kind, time.time(), dumps(data)))
+            n = self._since[account] = self._since.get(account, 0) + 1
+        return n >= self.every
+
+    def snapshot(self, account, state, keep=('close',)):
+        """
+        Durumu yazar ve kapsadığı olayları siler; `keep` türleri geçmiş
+        olarak kalır (hesabın lock'u altında çağrılmalı)
+        """
+        data = dumps(state)
+        with self._lock:
+            db = self._db
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                seq = db.execute('SELECT COALESCE(MAX(seq), 0) FROM events WHERE account = ?',
+                                 (account,)).fetchone()[0]
+                db.execute('INSERT OR REPLACE INTO snapshots (account, seq, ts, data) VALUES (?, ?, ?, ?)',
+                           (account, seq, time.time(), data))
+                db.execute(f'DELETE FROM events WHERE account = ? AND seq <= ? '
+                           f'AND kind NOT IN ({",".join("?" * len(keep))})', (account, seq, *keep))
+                db.execute('COMMIT')
+            except Exception:
+                db.execute('ROLLBACK')
+                raise
+            self._since[account] = 0
+
+    def load(self, account):
+        """
+        Returns:
+            (görüntü ya da None,
+             [(tür, veri), ...] görüntünün kapsadığı, saklanan geçmiş olaylar,
+             [(tür, veri), ...] görüntüden sonraki olaylar)
+        """
+        with self._lock:
+            row = self._db.execute('SELECT seq, data FROM snapshots WHERE account = ?',
+                                   (account,)).fetchone()
+            seq, state = (row[0], loads(row[1])) if row else (0, None)
+            rows = self._db.execute('SELECT seq, kind, data FROM events WHERE account = ? ORDER BY seq',
+                                    (account,)).fetchall()
+            history = [(k, loads(d)) for q, k, d in rows if q <= seq]
+            events  = [(k, loads(d)) for q, k, d in rows if q > seq]
+            self._since[account] = len(events)
+        return state, history, events
+
+    # ── Tek parça durum ──
+    def put(self, key, value):
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO meta (key, ts, data) VALUES (?, ?, ?)',
+                             (key, time.time(), dumps(value)))
+
+    def get(self, key, default=None):
+        with self._lock:
+            row = self._db.execute('SELECT data FROM meta WHERE key = ?', (key,)).fetchone()
+        return loads(row[0]) if row else default
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,194 @@
+"""
+Destek / direnç seviyesi tespiti
+
+Pivotlar vektörel karşılaştırmalarla bulunur (5 barlık: iki yanındaki
+ikişer bardan daha düşük / yüksek). Her pivotun "dokunma" sayısı, yani
+|l - ref| / ref <= tol koşulunu sağlayan pivot adedi, sıralı dizide iki
+ikili arama ile O(n log n)'de hesaplanır (eski O(n²) sayım yerine).
+
+Rectangle tarayıcısı için swing noktaları da burada: merkezli kayan
+max/min ile indeks dizileri, birden çok pencere tek geçişte.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# ============================================================================
+# PİVOTLAR
+# ============================================================================
+def pivot_lows(lows):
+    """İki yanındaki ikişer bardan kesin düşük olan barların indeksleri"""
+    x = np.asarray(lows, dtype=float)
+    if len(x) < 5:
+        return np.empty(0, dtype=np.int64)
+    m = x[2:-2]
+    mask = (m < x[1:-3]) & (m < x[:-4]) & (m < x[3:-1]) & (m < x[4:])
+    return np.flatnonzero(mask) + 2
+
+
+def pivot_highs(highs):
+    """İki yanındaki ikişer bardan kesin yüksek olan barların indeksleri"""
+    x = np.asarray(highs, dtype=float)
+    if len(x) < 5:
+        return np.empty(0, dtype=np.int64)
+    m = x[2:-2]
+    mask = (m > x[1:-3]) & (m > x[:-4]) & (m > x[3:-1]) & (m > x[4:])
+    return np.flatnonzero(mask) + 2
+
+
+# ============================================================================
+# KÜMELEME
+# ============================================================================
+def _bisect(srt, ref, tol, upper):
+    """
+    Sıralı `srt` içinde |l - ref| / ref <= tol koşulunun sol (upper=False)
+    ya da sağ (upper=True) sınırı. Koşul ref'in iki yanında monoton olduğu
+    için eski sayım ile aynı float karşılaştırması kullanılarak aranır.
+    """
+    lo, hi = 0, len(srt)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        v = srt[mid]
+        if upper:
+            inside = v <= ref or abs(v - ref) / ref <= tol
+        else:
+            inside = v >= ref or abs(v - ref) / ref <= tol
+        if inside == upper:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def touch_counts(pivots, tol=0.015):
+    """
+    Her pivot için tolerans bandındaki pivot sayısı (kendisi dahil).
+    ref == 0 için eski NumPy sayımında oran inf / NaN olur ve hiçbir
+    pivot (kendisi de) banda girmez: sayı 0.
+    """
+    pivots = [float(p) for p in pivots]
+    srt = sorted(pivots)
+    return np.array([0 if ref == 0 else _bisect(srt, ref, tol, True) - _bisect(srt, ref, tol, False)
+                     for ref in pivots], dtype=np.int64)
+
+
+def best_level(pivots, tol=0.015):
+    """
+    En çok dokunulan pivot (eşitlikte zamanca ilki) ve dokunma sayısı.
+    Eski döngü gibi 1'den başlar: hiçbir pivot 1'i geçmezse ilk pivot, 1.
+    """
+    counts = touch_counts(pivots, tol)
+    i = int(np.argmax(counts)) if counts.max() > 1 else 0
+    return float(pivots[i]), max(int(counts[i]), 1)
+
+
+def top_levels(pivots, tol=0.015, k=3):
+    """
+    En çok dokunulan `k` ayrık seviye: [(seviye, dokunma), ...]
+    Seçilen bir seviyenin bandındaki pivotlar sonraki seviyelere aday olmaz.
+    """
+    pivots = np.asarray(pivots, dtype=float)
+    counts = touch_counts(pivots, tol)
+    order  = np.argsort(-counts, kind='stable')
+    levels = []
+    for i in order:
+        ref = pivots[i]
+        if any(abs(ref - lv) / lv <= tol for lv, _ in levels):
+            continue
+        levels.append((float(ref), int(counts[i])))
+        if len(levels) == k:
+            break
+    return levels
+
+
+# ============================================================================
+# SEVİYELER
+# ============================================================================
+def support(lows, lb=100, tol=0.015, k=1):
+    """
+    Son `lb` barın destek seviyesi
+
+    Returns:
+        k=1 → (seviye, dokunma); k>1 → [(seviye, dokunma), ...]
+        Pivot yoksa en düşük değer, 1 dokunma
+    """
+    lows = np.asarray(lows, dtype=float)[-lb:]
+    pivs = lows[pivot_lows(lows)]
+    if len(pivs) == 0:
+        fallback = (float(min(lows)), 1)
+        return fallback if k == 1 else [fallback]
+    return best_level(pivs, tol) if k == 1 else top_levels(pivs, tol, k)
+
+
+def resistance(highs, lb=100, tol=0.015, k=1):
+    """Son `lb` barın direnç seviyesi (support ile aynı dönüş biçimi)"""
+    highs = np.asarray(highs, dtype=float)[-lb:]
+    pivs  = highs[pivot_highs(highs)]
+    if len(pivs) == 0:
+        fallback = (float(max(highs)), 1)
+        return fallback if k == 1 else [fallback]
+    return best_level(pivs, tol) if k == 1 else top_levels(pivs, tol, k)
+
+
+# ============================================================================
+# SWING NOKTALARI (RECTANGLE TARAYICI)
+# ============================================================================
+def _centered_extreme(x, window, fn):
+    """Her bar için [i-window, i+window] penceresinin max/min'i (kenarlar hariç)"""
+    return fn(sliding_window_view(x, 2 * window + 1), axis=1)
+
+
+def swing_points(highs, lows, window=5):
+    """
+    Swing high / swing low indeksleri
+
+    Swing high: high[i], i'nin iki yanındaki `window` barın hepsinden
+    büyük ya da eşit (yani merkezli pencerenin maksimumu). Swing low simetrik.
+    Pencerede NaN varsa swing sayılmaz.
+
+    Returns:
+        (high_idx, low_idx) int64 dizileri, artan sırada
+    """
+    highs = np.asarray(highs, dtype=float)
+    lows  = np.asarray(lows, dtype=float)
+    n = len(highs)
+    if n < 2 * window + 1:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    core = slice(window, n - window)
+    hi = np.flatnonzero(highs[core] == _centered_extreme(highs, window, np.max)) + window
+    lo = np.flatnonzero(lows[core] == _centered_extreme(lows, window, np.min)) + window
+    return hi, lo
+
+
+def multi_swing_points(highs, lows, windows=(5,)):
+    """
+    Birden çok pencere için swing noktaları tek geçişte
+
+    Pencereler küçükten büyüğe işlenir; büyük pencerenin merkezli
+    ekstremumu, bir önceki pencerenin ekstremumunun daha geniş bir
+    pencere üzerindeki kayan max/min'i olarak türetilir.
+
+    Returns:
+        {window: (high_idx, low_idx)}
+    """
+    highs = np.asarray(highs, dtype=float)
+    lows  = np.asarray(lows, dtype=float)
+    n = len(highs)
+    out = {}
+    prev_w, prev_hi, prev_lo = 0, highs, lows
+    for w in sorted(set(int(x) for x in windows)):
+        if n < 2 * w + 1:
+            empty = np.empty(0, dtype=np.int64)
+            out[w] = (empty, empty)
+            continue
+        # prev_*[j], bar j+prev_w'nin ±prev_w ekstremumu; ±d genişletince ±w olur
+        d = w - prev_w
+        ext_hi = _centered_extreme(prev_hi, d, np.max) if d else prev_hi
+        ext_lo = _centered_extreme(prev_lo, d, np.min) if d else prev_lo
+        core = slice(w, n - w)
+        out[w] = (np.flatnonzero(highs[core] == ext_hi) + w,
+                  np.flatnonzero(lows[core] == ext_lo) + w)
+        prev_w, prev_hi, prev_lo = w, ext_hi, ext_lo
+    return out
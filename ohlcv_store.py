@@ -0,0 +1,421 @@
+"""
+Yerel OHLCV mum deposu (ccxt / Binance klines / yfinance)
+Her (kaynak, sembol, zaman dilimi) için tek bir .npy dosyası tutar:
+satırlar [ts_ms, open, high, low, close, volume] (float64, ts'ye göre sıralı).
+
+Taramalar artık tüm geçmişi her seferinde indirmez:
+- Depoda veri varsa yalnızca son saklanan bardan sonrası çekilir
+  (son bar da tekrar çekilir, çünkü henüz kapanmamış olabilir)
+- İstenen pencere depodakinden eskiye uzanıyorsa bir kez tam çekilir
+- Artımlı çekimde örtüşen kapanmış barlar saklananlardan farklıysa
+  (yfinance auto_adjust: bölünme / temettü sonrası geçmiş yeniden
+  düzeltilir) pencere tam çekilip depodaki satırların yerine yazılır
+- Dosyalar np.load(mmap_mode='r') ile belleğe eşlenebilir
+- yf_bulk_history çok sembolü yf.download ile gruplar halinde indirir
+
+Zaman damgaları yerel duvar saati (tz'siz) milisaniyedir; yfinance'in
+tz'li indeksleri tz bilgisi atılarak saklanır, böylece tarih gösterimi
+değişmez.
+"""
+
+import json
+import os
+import re
+import threading
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from rate_limit import limiter, call, observe_ccxt, KLINES_WEIGHT
+
+DEFAULT_ROOT = os.environ.get(
+    'OHLCV_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.ohlcv_store'))
+
+CAPS  = ['Open', 'High', 'Low', 'Close', 'Volume']
+LOWER = ['open', 'high', 'low', 'close', 'volume']
+
+_EPOCH = pd.Timestamp('1970-01-01')
+_MS    = pd.Timedelta(milliseconds=1)
+
+
+# ============================================================================
+# DÖNÜŞÜMLER
+# ============================================================================
+def to_ms(index):
+    """DatetimeIndex → tz'siz duvar saati milisaniye dizisi"""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return np.asarray((index - _EPOCH) // _MS, dtype=np.int64)
+
+
+def period_start(period, now=None):
+    """yfinance period metni ('3mo', '2y', '5d', '1wk', 'max') → başlangıç ms"""
+    if period in (None, 'max'):
+        return None
+    now = pd.Timestamp.now() if now is None else now
+    if period == 'ytd':
+        return int(to_ms([pd.Timestamp(year=now.year, month=1, day=1)])[0])
+    m = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+    if not m:
+        return None
+    n, unit = int(m.group(1)), m.group(2)
+    offset = {'d': pd.DateOffset(days=n), 'wk': pd.DateOffset(weeks=n),
+              'mo': pd.DateOffset(months=n), 'y': pd.DateOffset(years=n)}[unit]
+    return int(to_ms([(now - offset).normalize()])[0])
+
+
+def frame_to_rows(df):
+    """Open/High/Low/Close/Volume sütunlu DataFrame → OHLCV satırları"""
+    if df is None or df.empty:
+        return np.empty((0, 6))
+    cols = CAPS if 'Open' in df.columns else LOWER
+    return np.column_stack([to_ms(df.index), df[cols].to_numpy(dtype=float)])
+
+
+def _as_rows(rows):
+    """fetch çıktısı (liste / dizi / None) → (n, 6) float dizi"""
+    if rows is None or len(rows) == 0:
+        return np.empty((0, 6))
+    return np.asarray(rows, dtype=float).reshape(-1, 6)
+
+
+def rows_to_frame(rows, columns=CAPS, index_name=None):
+    """OHLCV satırları → tz'siz DatetimeIndex'li DataFrame"""
+    rows = np.asarray(rows, dtype=float).reshape(-1, 6)
+    df = pd.DataFrame(rows[:, 1:6], columns=list(columns),
+                      index=pd.to_datetime(rows[:, 0].astype(np.int64), unit='ms'))
+    df.index.name = index_name
+    return df
+
+
+# ============================================================================
+# FETCH FONKSİYONLARI
+# fetch(since) → OHLCV satırları; since=None ise çağıranın tam penceresi
+# ============================================================================
+def ccxt_fetcher(exchange, symbol, timeframe, limit=1000, endpoint='binance', weight=KLINES_WEIGHT):
+    """ccxt fetch_ohlcv için fetch fonksiyonu (uç noktanın ağırlık kovası üzerinden)"""
+    bucket = limiter(endpoint)
+
+    def fetch(since):
+        kwargs = {'limit': limit} if since is None else {'since': int(since), 'limit': limit}
+        rows = call(bucket, exchange.fetch_ohlcv, symbol, timeframe, weight=weight, **kwargs)
+        observe_ccxt(bucket, exchange)
+        return rows
+    return fetch
+
+
+def _yf_start(since):
+    """
+    Artımlı yfinance çekiminin başlangıç tarihi: haftalık/aylık barlar
+    hizalı kalsın diye bir hafta geriden başlanır; örtüşen barlar
+    birleştirmede ts ile tekilleşir
+    """
+    return (pd.to_datetime(since, unit='ms') - pd.Timedelta(days=7)).strftime('%Y-%m-%d')
+
+
+def yf_fetcher(ticker, period, interval='1d'):
+    """yfinance Ticker.history için fetch fonksiyonu"""
+    bucket = limiter('yfinance')
+
+    def fetch(since):
+        if since is None:
+            df = call(bucket, ticker.history, period=period, interval=interval)
+        else:
+            df = call(bucket, ticker.history, start=_yf_start(since), interval=interval)
+        return frame_to_rows(df)
+    return fetch
+
+
+# ============================================================================
+# DEPO
+# ============================================================================
+class OHLCVStore:
+    """(kaynak, sembol, zaman dilimi) anahtarlı yerel mum deposu"""
+
+    MAX_PAGES = 50
+    ADJ_RTOL  = 1e-4        # örtüşen barlarda bu göreli farktan büyüğü yeniden düzeltme sayılır
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root   = root
+        self._locks = defaultdict(threading.Lock)
+        self._guard = threading.Lock()
+
+    def path(self, source, symbol, timeframe):
+        safe = re.sub(r'[^A-Za-z0-9._-]', '_', symbol)
+        return os.path.join(self.root, source, timeframe, safe + '.npy')
+
+    def _lock(self, key):
+        with self._guard:
+            return self._locks[key]
+
+    def load(self, source, symbol, timeframe, mmap=False):
+        """Saklanan satırlar (yoksa boş dizi)"""
+        p = self.path(source, symbol, timeframe)
+        if not os.path.exists(p):
+            return np.empty((0, 6))
+        try:
+            return np.load(p, mmap_mode='r' if mmap else None)
+        except (OSError, ValueError):
+            return np.empty((0, 6))
+
+    def _meta(self, p):
+        try:
+            with open(p + '.json', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self, source, symbol, timeframe, rows, meta=None):
+        p = self.path(source, symbol, timeframe)
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        tmp = p + '.tmp.npy'
+        np.save(tmp, np.ascontiguousarray(rows, dtype=float))
+        os.replace(tmp, p)
+        if meta is not None:
+            with open(p + '.json', 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+
+    @staticmethod
+    def merge(old, new):
+        """İki satır kümesini birleştirir; aynı ts'de yeni veri kazanır"""
+        if len(old) == 0:
+            rows = new
+        elif len(new) == 0:
+            return np.asarray(old)
+        else:
+            keep = ~np.isin(old[:, 0], new[:, 0])
+            rows = np.concatenate([old[keep], new])
+        order = np.argsort(rows[:, 0], kind='stable')
+        return rows[order]
+
+    @classmethod
+    def rebased(cls, stored, page):
+        """
+        Örtüşen kapanmış barların (son saklanan bardan önceki) OHLC'si
+        saklananlardan farklı mı — geçmiş başka bir düzeltme tabanında
+        """
+        if len(stored) < 2 or len(page) == 0:
+            return False
+        old = stored[:-1]
+        new = page[page[:, 0] < stored[-1, 0]]
+        common, i, j = np.intersect1d(old[:, 0], new[:, 0], return_indices=True)
+        if len(common) == 0:
+            return False
+        return not np.allclose(old[i, 1:5], new[j, 1:5], rtol=cls.ADJ_RTOL, atol=0, equal_nan=True)
+
+    @staticmethod
+    def _covered(rows, meta):
+        return meta.get('from', int(rows[0, 0]) if len(rows) else None)
+
+    @staticmethod
+    def _needs_full(rows, covered, start):
+        return len(rows) == 0 or (start is not None and covered is not None and start < covered)
+
+    def pending_since(self, source, symbol, timeframe, start=None):
+        """update()'in fetch başlangıcı: None → tam pencere, aksi halde son bar ts'i"""
+        rows = self.load(source, symbol, timeframe, mmap=True)
+        if self._needs_full(rows, self._covered(rows, self._meta(self.path(source, symbol, timeframe))), start):
+            return None
+        return int(rows[-1, 0])
+
+    def last_ts(self, source, symbol, timeframe):
+        """Son saklanan barın ts'i (yoksa None) — dış fetch'in başlangıcı"""
+        rows = self.load(source, symbol, timeframe)
+        return int(rows[-1, 0]) if len(rows) else None
+
+    def ingest(self, source, symbol, timeframe, rows):
+        """Başka yerde (ör. asyncio) çekilmiş satırları ekler, tüm satırları döndürür"""
+        key = (source, symbol, timeframe)
+        with self._lock(key):
+            stored = self.load(*key)
+            meta   = self._meta(self.path(*key))
+            merged = self.merge(stored, _as_rows(rows))
+            if len(merged):
+                covered = meta.get('from', int(merged[0, 0]))
+                self.save(*key, merged, meta={'from': covered})
+            return merged
+
+    def update(self, source, symbol, timeframe, fetch, start=None, page_size=None):
+        """
+        Depoyu günceller ve tüm saklanan satırları döndürür
+
+        Args:
+            fetch: fetch(since) → OHLCV satırları
+            start: istenen en eski bar (ms); depo bu kadar eskiye
+                   uzanmıyorsa bir kez tam pencere çekilir
+            page_size: fetch bu kadar satır döndürdükçe sayfalamaya devam et
+        """
+        key = (source, symbol, timeframe)
+        with self._lock(key):
+            rows    = self.load(*key)
+            meta    = self._meta(self.path(*key))
+            covered = self._covered(rows, meta)
+
+            if self._needs_full(rows, covered, start):
+                rows = self.merge(rows, _as_rows(fetch(None)))
+                if len(rows):
+                    covered = start if start is not None else int(rows[0, 0])
+            else:
+                since = int(rows[-1, 0])
+                for n in range(self.MAX_PAGES):
+                    page = _as_rows(fetch(since))
+                    if n == 0 and self.rebased(rows, page):
+                        # Eski barlar yeni düzeltme tabanıyla uyuşmuyor: pencere baştan
+                        full = _as_rows(fetch(None))
+                        if len(full):
+                            rows    = self.merge(np.empty((0, 6)), full)
+                            covered = start if start is not None else int(rows[0, 0])
+                            break
+                    rows = self.merge(rows, page)
+                    if len(page) == 0:
+                        break
+                    if not page_size or len(page) < page_size or int(page[-1, 0]) <= since:
+                        break
+                    since = int(page[-1, 0])
+
+            if len(rows):
+                self.save(*key, rows, meta={'from': covered})
+            return rows
+
+    def get_frame(self, source, symbol, timeframe, fetch, period=None, limit=None,
+                  columns=CAPS, page_size=None, index_name=None):
+        """
+        Depodan (gerekirse güncelleyerek) DataFrame döndürür
+
+        Args:
+            period: yfinance period metni; yalnızca bu pencere döner
+            limit:  yalnızca son `limit` bar döner
+        """
+        start = period_start(period)
+        rows  = self.update(source, symbol, timeframe, fetch, start=start, page_size=page_size)
+        if start is not None and len(rows):
+            rows = rows[rows[:, 0] >= start]
+        if limit:
+            rows = rows[-limit:]
+        return rows_to_frame(rows, columns, index_name)
+
+
+_default = None
+
+
+def default_store():
+    """Süreç genelinde paylaşılan depo"""
+    global _default
+    if _default is None:
+        _default = OHLCVStore()
+    return _default
+
+
+def yf_history(ticker, period, interval='1d', store=None):
+    """
+    yf.Ticker.history(period=..., interval=...) yerine depodan okur
+    Yalnızca son saklanan bardan sonrası indirilir.
+    """
+    store = store or default_store()
+    return store.get_frame('yfinance', ticker.ticker, interval,
+                           yf_fetcher(ticker, period, interval), period=period)
+
+
+# ============================================================================
+# TOPLU İNDİRME (yf.download)
+# ============================================================================
+YF_CHUNK_SIZE  = 100    # yf.download çağrısı başına sembol
+YF_CHUNK_RETRY = 2      # eksik gelen semboller için tekrar deneme
+
+
+def _yf_split(data, tickers):
+    """yf.download çıktısı → {TICKER: Open..Volume DataFrame}; boş gelenler atlanır"""
+    out = {}
+    if data is None or data.empty:
+        return out
+    multi = isinstance(data.columns, pd.MultiIndex)
+    for t in tickers:
+        if multi:
+            if t not in data.columns.get_level_values(0):
+                continue
+            df = data[t]
+        elif len(tickers) == 1:
+            df = data
+        else:
+            continue
+        if not set(CAPS).issubset(df.columns):
+            continue
+        df = df[CAPS].dropna(how='all')
+        if len(df):
+            out[t] = df
+    return out
+
+
+def _yf_download_chunk(tickers, retries=YF_CHUNK_RETRY, **kwargs):
+    """
+    Bir grup sembolü tek yf.download ile indirir. Hata alan ya da eksik
+    gelen semboller kova geri çekildikten sonra tekrar denenir; son
+    denemeden sonra da gelmeyenler sonuçta yer almaz.
+    """
+    import yfinance as yf
+
+    bucket  = limiter('yfinance')
+    frames  = {}
+    pending = list(tickers)
+    for attempt in range(retries + 1):
+        if attempt:
+            bucket.penalize()
+        try:
+            data = call(bucket, yf.download, pending, weight=min(len(pending), bucket.capacity),
+                        group_by='ticker', threads=True, progress=False,
+                        auto_adjust=True, actions=False, **kwargs)
+        except Exception:
+            continue
+        frames.update(_yf_split(data, pending))
+        pending = [t for t in pending if t not in frames]
+        if not pending:
+            break
+    return frames
+
+
+def yf_bulk_history(symbols, period, interval='1d', store=None,
+                    chunk_size=YF_CHUNK_SIZE, retries=YF_CHUNK_RETRY):
+    """
+    Çok sembol için yf_history: depoda eksik kalan pencereler sembol
+    başına Ticker.history yerine yf.download ile `chunk_size`'lık
+    gruplar halinde (threads=True) indirilir, sonra depoya işlenir.
+
+    Returns:
+        {sembol: DataFrame} — yf_history ile aynı biçim;
+        veri gelmeyen ve depoda da olmayan semboller boş DataFrame
+    """
+    store   = store or default_store()
+    start   = period_start(period)
+    symbols = list(dict.fromkeys(symbols))
+
+    # Aynı başlangıçtan çekilecek semboller aynı yf.download'a girer
+    groups = defaultdict(list)
+    for sym in symbols:
+        since = store.pending_since('yfinance', sym.upper(), interval, start)
+        groups[None if since is None else _yf_start(since)].append(sym.upper())
+
+    fetched = {}
+    tails   = {t for begin, ts in groups.items() if begin is not None for t in ts}
+    for begin, tickers in groups.items():
+        window = {'period': period} if begin is None else {'start': begin}
+        for i in range(0, len(tickers), chunk_size):
+            fetched.update(_yf_download_chunk(tickers[i:i + chunk_size], retries,
+                                              interval=interval, **window))
+
+    def fetch(since, sym, rows):
+        # Artımlı çekilmiş sembolde tam pencere isteği: düzeltme tabanı değişmiş
+        if since is None and sym in tails:
+            rows = frame_to_rows(_yf_download_chunk([sym], retries, interval=interval,
+                                                    period=period).get(sym))
+        return rows
+
+    out = {}
+    for sym in symbols:
+        rows = frame_to_rows(fetched.get(sym.upper()))
+        out[sym] = store.get_frame('yfinance', sym.upper(), interval,
+                                   lambda since, s=sym.upper(), rows=rows: fetch(since, s, rows),
+                                   period=period)
+    return out
@@ -0,0 +1,345 @@
+"""
+Canlı fiyat akışı (açık pozisyonların TP/SL takibi)
+
+Sembol başına 30 sn'de bir fetch_ticker yerine fiyatlar arka plan
+thread'inden geldikçe on_prices({baz: fiyat}) ile iletilir:
+
+- MiniTickerFeed : Binance !miniTicker@arr websocket akışı, tek bağlantı,
+                   tüm USDT çiftleri saniyede bir (websocket-client gerekir)
+- TickerPollFeed : websocket yoksa / bağlanamıyorsa tek toplu
+                   fetch_tickers çağrısıyla kısa aralıklı yoklama
+- KlineFeed      : yalnızca açık sembollerin 1m kline akışı (dinamik
+                   SUBSCRIBE); kısa gruplar halinde {baz: (o, h, l, c)}
+                   verir, böylece mum içi TP/SL kesişmeleri kaçmaz
+- ReplayFeed     : kaydedilmiş (ts, {baz: değer}) akışını oynatır; test ve
+                   deneme için ağsız yerel karşılık (depodaki mumlardan
+                   fiyat ya da OHLC grupları üretilebilir)
+
+PriceRefresher, akışsız yollarda (30 sn döngü, TickerPollFeed) açık
+sembollerin fiyatlarını tek toplu istekle tazeler.
+
+Baz sembol: 'BTCUSDT' / 'BTC/USDT' → 'BTC' (tarayıcıların kullandığı ad).
+"""
+
+import json
+import threading
+import time
+
+from rate_limit import (binance_bucket, call, observe_ccxt, ticker_24hr_weight,
+                        TICKER_WEIGHT, TICKER_PRICES_WEIGHT)
+
+try:
+    import websocket            # websocket-client
+    WS_OK = True
+except ImportError:
+    WS_OK = False
+
+MINI_TICKER_URL = 'wss://stream.binance.com:9443/ws/!miniTicker@arr'
+STREAM_URL      = 'wss://stream.binance.com:9443/ws'
+
+
+def parse_mini_tickers(msg, quote='USDT'):
+    """miniTicker mesajı (tek nesne ya da dizi) → {baz: kapanış}"""
+    data = json.loads(msg) if isinstance(msg, (str, bytes)) else msg
+    if isinstance(data, dict):
+        data = [data]
+    n = len(quote)
+    out = {}
+    for t in data:
+        s = t.get('s', '')
+        if s.endswith(quote) and len(s) > n:
+            out[s[:-n]] = float(t['c'])
+    return out
+
+
+def merge_kline(batch, msg, quote='USDT'):
+    """kline olayını gruba katar: açılış ilk, yüksek/düşük birikimli, kapanış son"""
+    data = json.loads(msg) if isinstance(msg, (str, bytes)) else msg
+    data = data.get('data', data)                    # birleşik akış zarfı
+    if not isinstance(data, dict) or data.get('e') != 'kline':
+        return batch
+    s = data.get('s', '')
+    if not s.endswith(quote):
+        return batch
+    k = data['k']
+    o, h, l, c = float(k['o']), float(k['h']), float(k['l']), float(k['c'])
+    base = s[:-len(quote)]
+    prev = batch.get(base)
+    batch[base] = (o, h, l, c) if prev is None else (prev[0], max(prev[1], h), min(prev[2], l), c)
+    return batch
+
+
+class PriceFeed:
+    """
+    Fiyat akışı tabanı: _run() arka plan thread'inde çalışır, gelen
+    fiyatları _emit() ile on_prices'a verir. `last` son fiyatlar, `stamp`
+    son güncelleme zamanı, `error` son bağlantı hatası.
+    """
+    name = 'base'
+
+    def __init__(self, on_prices):
+        self.on_prices = on_prices
+        self.last      = {}
+        self.stamp     = 0.0
+        self.error     = None
+        self._stop     = threading.Event()
+        self._thread   = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def alive(self, max_age=30):
+        """Thread çalışıyor ve son `max_age` sn içinde fiyat geldi mi"""
+        return (self._thread is not None and self._thread.is_alive()
+                and time.time() - self.stamp <= max_age)
+
+    def _emit(self, prices):
+        if not prices:
+            return
+        self.last.update(prices)
+        self.stamp = time.time()
+        self.on_prices(prices)
+
+    def _run(self):
+        raise NotImplementedError
+
+
+class MiniTickerFeed(PriceFeed):
+    """Binance tüm piyasa miniTicker akışı; kopunca artan beklemeyle yeniden bağlanır"""
+    name = 'miniTicker'
+
+    def __init__(self, on_prices, url=MINI_TICKER_URL, quote='USDT', timeout=30):
+        super().__init__(on_prices)
+        self.url     = url
+        self.quote   = quote
+        self.timeout = timeout
+
+    def _run(self):
+        backoff = 1
+        while not self._stop.is_set():
+            try:
+                ws = websocket.create_connection(self.url, timeout=self.timeout)
+                try:
+                    backoff = 1
+                    while not self._stop.is_set():
+                        self._emit(parse_mini_tickers(ws.recv(), self.quote))
+                finally:
+                    ws.close()
+            except Exception as e:
+                self.error = e
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 60)
+
+
+class KlineFeed(PriceFeed):
+    """
+    `symbols()` (açık pozisyon bazları) için kline akışı. Sembol kümesi
+    değiştikçe aynı bağlantı üzerinden SUBSCRIBE / UNSUBSCRIBE gönderilir;
+    olaylar `flush` sn'lik gruplarda birleştirilip on_bars'a verilir.
+    """
+    name = 'kline'
+
+    def __init__(self, on_bars, symbols, interval='1m', url=STREAM_URL, quote='USDT', flush=0.25):
+        super().__init__(on_bars)
+        self.symbols  = symbols
+        self.interval = interval
+        self.url      = url
+        self.quote    = quote
+        self.flush    = flush
+
+    def _streams(self):
+        q = self.quote.lower()
+        return {f"{s.lower()}{q}@kline_{self.interval}" for s in self.symbols()}
+
+    def _run(self):
+        backoff = 1
+        timeout = getattr(websocket, 'WebSocketTimeoutException', TimeoutError)
+        while not self._stop.is_set():
+            try:
+                ws = websocket.create_connection(self.url, timeout=self.flush)
+                try:
+                    backoff, subs, batch, sent, msg_id = 1, set(), {}, time.time(), 0
+                    while not self._stop.is_set():
+                        want = self._streams()
+                        for method, streams in (('SUBSCRIBE', want - subs), ('UNSUBSCRIBE', subs - want)):
+                            if streams:
+                                msg_id += 1
+                                ws.send(json.dumps({'method': method, 'params': sorted(streams), 'id': msg_id}))
+                        subs = want
+                        try:
+                            merge_kline(batch, ws.recv(), self.quote)
+                        except timeout:
+                            pass
+                        if batch and time.time() - sent >= self.flush:
+                            self._emit(batch)
+                            batch, sent = {}, time.time()
+                finally:
+                    ws.close()
+            except Exception as e:
+                self.error = e
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 60)
+
+
+class TickerPollFeed(PriceFeed):
+    """fetch() → {baz: fiyat} toplu çağrısını `interval` sn'de bir yoklar"""
+    name = 'fetch_tickers'
+
+    def __init__(self, on_prices, fetch, interval=5):
+        super().__init__(on_prices)
+        self.fetch    = fetch
+        self.interval = interval
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._emit(self.fetch())
+                self.error = None
+            except Exception as e:
+                self.error = e
+            self._stop.wait(self.interval)
+
+
+class ReplayFeed(PriceFeed):
+    """
+    Kayıtlı akış: [(ts_sn, {baz: fiyat}), ...] sırayla oynatılır.
+    speed=None → beklemeden; speed=k → gerçek zamanın k katı hızla.
+    run() aynı thread'de oynatır (testler için), start() arka planda.
+    """
+    name = 'replay'
+
+    def __init__(self, on_prices, ticks, speed=None):
+        super().__init__(on_prices)
+        self.ticks = ticks
+        self.speed = speed
+
+    @staticmethod
+    def ticks_from_rows(rows_by_sym, col=4):
+        """{baz: [ts_ms, o, h, l, c, v] satırları} → zamana göre birleşik tikler"""
+        merged = {}
+        for sym, rows in rows_by_sym.items():
+            for r in rows:
+                merged.setdefault(float(r[0]) / 1000.0, {})[sym] = float(r[col])
+        return sorted(merged.items())
+
+    @staticmethod
+    def bars_from_rows(rows_by_sym):
+        """Aynı birleştirme, değerler (o, h, l, c) grupları (on_bars için)"""
+        merged = {}
+        for sym, rows in rows_by_sym.items():
+            for r in rows:
+                merged.setdefault(float(r[0]) / 1000.0, {})[sym] = tuple(float(x) for x in r[1:5])
+        return sorted(merged.items())
+
+    def run(self):
+        prev = None
+        for ts, prices in self.ticks:
+            if self._stop.is_set():
+                break
+            if self.speed and prev is not None and ts > prev:
+                self._stop.wait((ts - prev) / self.speed)
+            prev = ts
+            self._emit(dict(prices))
+
+    def _run(self):
+        self.run()
+
+
+class PriceRefresher:
+    """
+    Açık sembollerin fiyatları tek istekle: ccxt fetch_last_prices
+    (/api/v3/ticker/price, symbols listesi), yoksa fetch_tickers. Toplu
+    çağrı hata verirse yalnızca o turda sembol başına fetch_ticker'a düşer.
+
+    Liste BULK_ALL'dan uzunsa (ör. taramanın tüm sembolleri) sembol listesi
+    yerine tüm fiyatlar istenir (/ticker/price'ta aynı ağırlık, kısa URL).
+    fetch_tickers /ticker/24hr'a gider; kovadan sembol sayısına göre
+    kademeli ağırlık düşülür (tümü 80).
+
+    Ölçüm: `last_ms` son yenileme süresi, `avg_ms` üstel ortalama,
+    `calls` / `fallbacks` toplam ve sembol başına düşülen tur sayısı.
+    """
+
+    BULK_ALL = 100
+
+    def __init__(self, quote='USDT', bucket=None, alpha=0.2):
+        self.quote     = quote
+        self.bucket    = bucket or binance_bucket()
+        self.alpha     = alpha
+        self.last_ms   = 0.0
+        self.avg_ms    = 0.0
+        self.calls     = 0
+        self.fallbacks = 0
+        self.error     = None
+
+    def _bulk(self, exchange, pairs):
+        if getattr(exchange, 'has', {}).get('fetchLastPrices'):
+            data = call(self.bucket, exchange.fetch_last_prices, pairs, weight=TICKER_PRICES_WEIGHT)
+        else:
+            data = call(self.bucket, exchange.fetch_tickers, pairs,
+                        weight=ticker_24hr_weight(None if pairs is None else len(pairs)))
+        observe_ccxt(self.bucket, exchange)
+        return data
+
+    def refresh(self, exchange, syms, fallback=True):
+        """
+        [baz, ...] → {baz: son fiyat} (alınamayanlar atlanır)
+
+        fallback=False → toplu çağrı hata verirse boş döner (tekil çağrı yok)
+        """
+        if not syms or exchange is None:
+            return {}
+        t0    = time.perf_counter()
+        pairs = [f"{s}/{self.quote}" for s in syms]
+        want  = set(pairs)
+        out   = {}
+        try:
+            data = self._bulk(exchange, pairs if len(pairs) <= self.BULK_ALL else None)
+            for pair, v in data.items():
+                px = v.get('price') or v.get('last')
+                if px and pair in want:
+                    out[pair.split('/')[0]] = float(px)
+            self.error = None
+        except Exception as e:
+            self.error = e
+            if fallback:
+                self.fallbacks += 1
+                for s, pair in zip(syms, pairs):
+                    try:
+                        t = call(self.bucket, exchange.fetch_ticker, pair, weight=TICKER_WEIGHT)
+                        out[s] = float(t['last'])
+                    except Exception:
+                        pass
+        ms = (time.perf_counter() - t0) * 1000
+        self.avg_ms  = ms if not self.calls else self.avg_ms + self.alpha * (ms - self.avg_ms)
+        self.last_ms = ms
+        self.calls  += 1
+        return out
+
+    def metrics(self):
+        return {'last_ms': round(self.last_ms, 1), 'avg_ms': round(self.avg_ms, 1),
+                'calls': self.calls, 'fallbacks': self.fallbacks,
+                'error': str(self.error) if self.error else None}
+
+
+def make_feed(kind, on_prices, fetch=None, interval=5, on_bars=None, symbols=None):
+    """
+    kind='kline'  → açık sembollerin kline akışı, on_bars'a OHLC grupları
+                    (websocket-client yoksa 'stream' gibi davranır)
+    kind='stream' → miniTicker websocket (websocket-client yoksa toplu yoklama)
+    kind='poll'   → toplu fetch_tickers yoklaması
+    """
+    if kind == 'kline' and WS_OK and on_bars is not None and symbols is not None:
+        return KlineFeed(on_bars, symbols)
+    if kind in ('kline', 'stream') and WS_OK:
+        return MiniTickerFeed(on_prices)
+    if kind in ('kline', 'stream', 'poll') and fetch is not None:
+        return TickerPollFeed(on_prices, fetch, interval)
+    return None
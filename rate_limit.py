@@ -0,0 +1,226 @@
+"""
+Uç nokta (endpoint) bazlı, ağırlık farkında global hız sınırlayıcı
+
+Tarama döngülerindeki sabit time.sleep beklemeleri yerine kullanılır:
+- Her uç nokta (binance, yfinance) için süreç genelinde tek token-bucket
+- Binance yanıtlarındaki X-MBX-USED-WEIGHT-1M başlığı kovayı sunucu
+  tarafındaki gerçek kullanıma göre düzeltir
+- 429 (hız aşımı) / 418 (IP ban) yanıtlarında Retry-After'a ya da
+  katlanarak artan süreye göre tüm istekler durdurulur
+- Hem thread'lerden (acquire) hem asyncio'dan (acquire_async) kullanılabilir
+"""
+
+import asyncio
+import re
+import threading
+import time
+
+BINANCE_WEIGHT_PER_MIN = 1200
+KLINES_WEIGHT          = 2      # GET /api/v3/klines
+TICKER_WEIGHT          = 2      # GET /api/v3/ticker/price (tek sembol)
+TICKER_PRICES_WEIGHT   = 4      # GET /api/v3/ticker/price (symbols listesi ya da tümü)
+TICKER_24HR_WEIGHT     = 2      # GET /api/v3/ticker/24hr (1-20 sembol)
+TICKER_24HR_100_WEIGHT = 40     # GET /api/v3/ticker/24hr (21-100 sembol)
+TICKER_24HR_ALL_WEIGHT = 80     # GET /api/v3/ticker/24hr (101+ sembol ya da tümü; fetch_tickers(None))
+EXCHANGE_INFO_WEIGHT   = 20     # GET /api/v3/exchangeInfo (load_markets)
+
+FUTURE_WEIGHT_PER_MIN  = 2400   # USDⓈ-M vadeli (fapi) ayrı kota
+FUTURE_KLINES_WEIGHT   = 5      # GET /fapi/v1/klines (limit 1000)
+
+YFINANCE_REQ_PER_MIN   = 120    # resmi limit yok; eski 0.5 sn/10 sembol temposuna yakın
+
+RATE_LIMIT_STATUS = (418, 429)
+RATE_LIMIT_ERRORS = {'RateLimitExceeded', 'DDoSProtection', 'YFRateLimitError'}
+_STATUS_RE = re.compile(r'\b(?:HTTP(?:/[\d.]+)?|status(?:[ _]code)?)[\s:=]*(?:418|429)\b', re.I)
+
+BACKOFF_START = 1.0
+BACKOFF_MAX   = 120.0
+
+
+class RateLimited(Exception):
+    """Sunucu 429/418 döndü; limiter geri çekildi, istek tekrar denenebilir"""
+
+
+class TokenBucket:
+    """
+    `capacity` ağırlık, `per_seconds` sürede tamamen dolar.
+    Yetmeyen ağırlık için bekleme süresi hesaplanır; kilit yalnızca
+    hesap sırasında tutulur, bekleme kilit dışında yapılır.
+    Sunucu geri bildirimi (kullanılan ağırlık, 429/418) kovayı düzeltir.
+    """
+
+    def __init__(self, capacity, per_seconds=60.0, name=''):
+        self.name     = name
+        self.capacity = float(capacity)
+        self.rate     = self.capacity / per_seconds
+        self.tokens   = self.capacity
+        self.updated  = time.monotonic()
+        self.blocked_until = 0.0
+        self.backoff  = BACKOFF_START
+        self._lock    = threading.Lock()
+
+    def _take(self, weight):
+        """Ağırlık alınabildiyse 0, değilse beklenecek süre (sn)"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            self.tokens  = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= weight:
+                self.tokens -= weight
+                return 0.0
+            return (weight - self.tokens) / self.rate
+
+    def acquire(self, weight=1):
+        while True:
+            wait = self._take(weight)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, weight=1):
+        while True:
+            wait = self._take(weight)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    # ── Sunucu geri bildirimi ─────────────────────────────────────
+    def observe_used(self, used):
+        """Sunucunun bildirdiği son 1 dk kullanımına göre kalan payı düşürür"""
+        with self._lock:
+            self.tokens = min(self.tokens, self.capacity - float(used))
+
+    def penalize(self, retry_after=None):
+        """429/418: Retry-After kadar (yoksa katlanan süre) tüm istekleri durdurur"""
+        with self._lock:
+            wait = float(retry_after) if retry_after else self.backoff
+            self.backoff = min(self.backoff * 2, BACKOFF_MAX)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + wait)
+            self.tokens = 0.0
+
+    def ok(self):
+        """Başarılı yanıt: geri çekilme süresini sıfırlar"""
+        self.backoff = BACKOFF_START
+
+    def observe_headers(self, status, headers):
+        """HTTP durum kodu + başlıklardan geri bildirim; 429/418'de RateLimited"""
+        headers = headers or {}
+        used = None
+        for k, v in headers.items():
+            if k.lower() in ('x-mbx-used-weight-1m', 'x-mbx-used-weight'):
+                used = v
+        if used is not None:
+            try:
+                self.observe_used(used)
+            except ValueError:
+                pass
+        if status in (418, 429):
+            retry = None
+            for k, v in headers.items():
+                if k.lower() == 'retry-after':
+                    retry = v
+            self.penalize(retry)
+            raise RateLimited(f'{self.name}: HTTP {status}')
+        self.ok()
+
+
+# ============================================================================
+# GLOBAL KAYIT
+# ============================================================================
+_LIMITS = {
+    'binance':        (BINANCE_WEIGHT_PER_MIN, 60.0),
+    'binance_future': (FUTURE_WEIGHT_PER_MIN,  60.0),
+    'yfinance':       (YFINANCE_REQ_PER_MIN,   60.0),
+}
+_buckets = {}
+_guard   = threading.Lock()
+
+
+def limiter(endpoint):
+    """Uç nokta için süreç genelinde paylaşılan kova"""
+    with _guard:
+        if endpoint not in _buckets:
+            capacity, per = _LIMITS[endpoint]
+            _buckets[endpoint] = TokenBucket(capacity, per, name=endpoint)
+        return _buckets[endpoint]
+
+
+def binance_bucket():
+    return limiter('binance')
+
+
+# ============================================================================
+# İSTEMCİ YARDIMCILARI
+# ============================================================================
+def ticker_24hr_weight(count=None):
+    """/ticker/24hr ağırlığı: sembol sayısına göre kademeli (None → tüm semboller)"""
+    if count is None or count > 100:
+        return TICKER_24HR_ALL_WEIGHT
+    return TICKER_24HR_WEIGHT if count <= 20 else TICKER_24HR_100_WEIGHT
+
+
+def observe_response(bucket, response):
+    """requests yanıtı için geri bildirim (429/418'de RateLimited)"""
+    bucket.observe_headers(response.status_code, response.headers)
+
+
+def observe_ccxt(bucket, exchange):
+    """ccxt çağrısı sonrası son yanıt başlıklarından kullanılan ağırlığı okur"""
+    headers = getattr(exchange, 'last_response_headers', None)
+    if headers:
+        bucket.observe_headers(200, headers)
+
+
+def is_rate_limit_error(exc):
+    """
+    ccxt / yfinance / requests hız aşımı istisnalarını tanır.
+    Yalnızca istisna türü, gerçek HTTP durum kodu ya da mesajda "HTTP" /
+    "status" sözcüğüne bitişik 418/429 sayılır; mesajdaki zaman damgası,
+    fiyat ya da URL parametresi içindeki rakamlar eşleşmez.
+    """
+    names = {t.__name__ for t in type(exc).__mro__}
+    if names & RATE_LIMIT_ERRORS:
+        return True
+    response = getattr(exc, 'response', None)
+    for status in (getattr(exc, 'status', None), getattr(exc, 'http_status', None),
+                   getattr(exc, 'status_code', None), getattr(response, 'status_code', None)):
+        if status in RATE_LIMIT_STATUS:
+            return True
+    text = str(exc)
+    return 'Too Many Requests' in text or _STATUS_RE.search(text) is not None
+
+
+def call(bucket, fn, *args, weight=1, retries=3, **kwargs):
+    """
+    Senkron çağrıyı kova üzerinden yapar; hız aşımında geri çekilip tekrar dener
+    """
+    for attempt in range(retries + 1):
+        bucket.acquire(weight)
+        try:
+            result = fn(*args, **kwargs)
+            bucket.ok()
+            return result
+        except Exception as e:
+            if attempt < retries and (isinstance(e, RateLimited) or is_rate_limit_error(e)):
+                if not isinstance(e, RateLimited):
+                    bucket.penalize()
+                continue
+            raise
+
+
+async def call_async(bucket, coro_fn, *args, weight=1, retries=3, **kwargs):
+    """call() ile aynı, asyncio için"""
+    for attempt in range(retries + 1):
+        await bucket.acquire_async(weight)
+        try:
+            result = await coro_fn(*args, **kwargs)
+            bucket.ok()
+            return result
+        except Exception as e:
+            if attempt < retries and (isinstance(e, RateLimited) or is_rate_limit_error(e)):
+                if not isinstance(e, RateLimited):
+                    bucket.penalize()
+                continue
+            raise
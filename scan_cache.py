@@ -0,0 +1,109 @@
+"""
+Tarama sonucu önbelleği (son kapanmış muma göre)
+
+1h mumlarla 30 dk'lık taramalar arasında çoğu sembolde yeni mum kapanmaz;
+TD9, iki backtest ve destek/direnç aynı sonucu verir. scan_pool özeti
+(sembol, zaman dilimi, son kapanmış mum ts, parametre özeti) anahtarıyla
+LRU'da tutulur. Mum ilerlemediyse sembol yeniden analiz edilmez, yalnızca
+fiyata bağlı alanlar (price, sdist, rdist) güncel fiyatla yenilenir.
+
+Son kapanmış mum saatten hesaplanır; isabet kontrolü ağ gerektirmez.
+"""
+
+import hashlib
+import inspect
+import threading
+import time
+from collections import OrderedDict
+
+from scan_pool import analyze_rows, summarize
+
+TF_MS = {
+    '1m': 60_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '4h': 14_400_000, '1d': 86_400_000,
+}
+
+
+def default_params():
+    """analyze_rows + summarize varsayılanları (değişirse anahtar da değişir)"""
+    out = {}
+    for fn in (analyze_rows, summarize):
+        for name, p in inspect.signature(fn).parameters.items():
+            if p.default is not inspect.Parameter.empty:
+                out[name] = p.default
+    return out
+
+
+def param_key(**params):
+    return hashlib.sha1(repr(sorted(params.items())).encode()).hexdigest()[:12]
+
+
+def closed_ts(ts1, tf_ms, now_ms):
+    """Son barın açılış ts'i → son kapanmış barın açılış ts'i"""
+    return ts1 if ts1 + tf_ms <= now_ms else ts1 - tf_ms
+
+
+def expected_closed(tf_ms, now_ms):
+    """Saate göre son kapanmış barın açılış ts'i"""
+    return now_ms // tf_ms * tf_ms - tf_ms
+
+
+def reprice(s, price):
+    """Özetin fiyata bağlı alanlarını yeni fiyatla yeniden hesaplar (kopya)"""
+    return {**s, 'price': price,
+            'sdist': (price - s['sup']) / s['sup'] * 100,
+            'rdist': (s['res'] - price) / price * 100}
+
+
+class ScanCache:
+    """
+    Sembol özeti LRU önbelleği
+
+    Args:
+        timeframe: mum aralığı ('1h')
+        maxsize:   en fazla kayıt; aşılınca en eski kullanılan atılır
+        params:    analiz parametreleri (varsayılan: default_params())
+    """
+
+    MAXSIZE = 2048
+
+    def __init__(self, timeframe='1h', maxsize=None, **params):
+        self.timeframe = timeframe
+        self.tf_ms     = TF_MS[timeframe]
+        self.maxsize   = maxsize or self.MAXSIZE
+        self.pkey      = param_key(**(params or default_params()))
+        self.hits      = 0
+        self.misses    = 0
+        self._data     = OrderedDict()
+        self._lock     = threading.Lock()
+
+    def _now(self, now_ms):
+        return int(time.time() * 1000) if now_ms is None else now_ms
+
+    def get(self, sym, now_ms=None):
+        """Son kapanmış mum değişmediyse saklı özet, değilse None"""
+        key = (sym, self.timeframe, expected_closed(self.tf_ms, self._now(now_ms)), self.pkey)
+        with self._lock:
+            s = self._data.get(key)
+            if s is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return s
+
+    def put(self, sym, s, now_ms=None):
+        """Özeti, verisinin son kapanmış mumu anahtarıyla saklar"""
+        key = (sym, self.timeframe, closed_ts(s['ts1'], self.tf_ms, self._now(now_ms)), self.pkey)
+        with self._lock:
+            self._data[key] = s
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
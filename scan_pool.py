@@ -0,0 +1,173 @@
+"""
+Süreç havuzlu tarama modu (Binance 500 sembol)
+
+Ağ aşaması (asyncio hattı ya da I/O thread'leri) mumları depoya yazar ve
+her sembol için kompakt bir OHLCV dizisi (n × 6, float64) üretir. HA/TD9,
+backtest ve destek/direnç hesabı GIL dışında, ProcessPoolExecutor'da
+DataFrame'siz yapılır; işçiden yalnızca düz sayılardan oluşan bir özet döner.
+
+Sonuçlar tamamlanma sırasıyla akar: (sembol, özet, hata) — thread ve
+asenkron yolların ürettiği üçlülerle aynı biçim, böylece SSE / Tk
+ilerlemesi değişmeden çalışır.
+
+Havuz süreç başına bir kez kurulur ve taramalar arasında yeniden
+kullanılır. İşçiler fork ile değil forkserver (yoksa spawn) ile başlar:
+Flask / SSE / websocket / fiyat akışı thread'leri çalışırken fork
+edilmiş çocuk, kilitleri tutulu halde kopyalayabilir.
+
+İşçiler durumsuzdur: artımlı TD9 durumu (indicators.TDState) yalnızca
+tarayıcıların thread / asenkron yolunda tutulur; bu mod her taramada
+son 1000 barı baştan analiz eder.
+"""
+
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from indicators import heiken_ashi_arrays, td_setup_counts
+from backtest import td9_backtest
+import levels
+
+MIN_BARS = 50
+
+
+def summarize(ts, o, h, l, c, ha_o, ha_c, buy, sell, tp=0.20, sl=0.05, fwd=20, lb=100, tol=0.015):
+    """
+    Hazır HA/TD9 dizilerinden tarama özeti (son bar sinyali, backtest,
+    destek/direnç). Backtest yalnızca son barda setup 9 varsa çalışır.
+    """
+    price = float(c[-1])
+    buy9, sell9 = int(buy[-1]), int(sell[-1])
+
+    bwr = btot = bwins = swr = stot = swins = 0
+    if buy9 == 9:
+        bwr, btot, bwins = td9_backtest(c, h, l, buy, 'buy', tp, sl, fwd)
+    if sell9 == 9:
+        swr, stot, swins = td9_backtest(c, h, l, sell, 'sell', tp, sl, fwd)
+
+    sup, stc = levels.support(l, lb, tol)
+    res, rtc = levels.resistance(h, lb, tol)
+    return {
+        'n': len(c), 'ts0': int(ts[0]), 'ts1': int(ts[-1]),
+        'price': price, 'ha_o': float(ha_o[-1]), 'ha_c': float(ha_c[-1]),
+        'buy9': buy9, 'sell9': sell9,
+        'bwr': bwr, 'btot': btot, 'bwins': bwins,
+        'swr': swr, 'stot': stot, 'swins': swins,
+        'sup': sup, 'stc': stc, 'sdist': (price - sup) / sup * 100,
+        'res': res, 'rtc': rtc, 'rdist': (res - price) / price * 100,
+    }
+
+
+def analyze_rows(rows, cap=9, bars=1000, **params):
+    """
+    İşçi süreç: [ts, o, h, l, c, v] satırları → summarize() özeti
+    (son `bars` bar; MIN_BARS'tan kısa seride None)
+    """
+    rows = np.asarray(rows, dtype=float)[-bars:]
+    if len(rows) < MIN_BARS:
+        return None
+    ts, o, h, l, c = rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3], rows[:, 4]
+    ha_o, ha_c, _, _ = heiken_ashi_arrays(o, h, l, c)
+    buy, sell = td_setup_counts(ha_c, cap=cap)
+    return summarize(ts, o, h, l, c, ha_o, ha_c, buy, sell, **params)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def shared_pool(workers=None):
+    """Süreç genelinde paylaşılan, uzun ömürlü havuz (işçi sayısı başına bir tane)"""
+    with _pools_lock:
+        ex = _pools.get(workers)
+        if ex is None:
+            ex = _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=_context())
+        return ex
+
+
+def _discard_pool(workers, ex):
+    """Bozulan havuzu bırakır; sonraki shared_pool() yenisini kurar"""
+    with _pools_lock:
+        if _pools.get(workers) is ex:
+            del _pools[workers]
+    ex.shutdown(wait=False, cancel_futures=True)
+
+
+def pool_iter(loaded, fn=analyze_rows, workers=None, **params):
+    """
+    I/O aşamasının (sembol, satırlar, hata) akışını paylaşılan süreç
+    havuzunda işler. Besleme ayrı bir thread'de yapılır; ağ beklerken
+    işçiler hesaplar. `fn` modül düzeyinde (içe aktarılabilir) olmalı.
+
+    Yields:
+        (sembol, fn(satırlar, **params), hata) — tamamlanma sırasıyla
+    """
+    out     = queue.Queue()
+    done    = object()
+    pending = set()
+    lock    = threading.Lock()
+    ex      = shared_pool(workers)
+
+    def finished(sym, fut):
+        with lock:
+            pending.discard(fut)
+        if fut.cancelled():         # başka taramanın _discard_pool'u iptal etti
+            out.put((sym, None, CancelledError()))
+            return
+        err = fut.exception()
+        out.put((sym, None, err) if err else (sym, fut.result(), None))
+
+    def submit(rows):
+        nonlocal ex
+        try:
+            return ex.submit(fn, rows, **params)
+        except (BrokenProcessPool, RuntimeError):
+            # Bozulmuş ya da başka bir taramanın kapattığı havuz: bir kez yenisiyle
+            _discard_pool(workers, ex)
+            ex = shared_pool(workers)
+            return ex.submit(fn, rows, **params)
+
+    def feed():
+        n = 0
+        try:
+            for sym, rows, err in loaded:
+                n += 1
+                if err is not None or rows is None:
+                    out.put((sym, None, err))
+                    continue
+                # Her sembol tam bir sonuç üretir; yoksa tüketici total'e hiç ulaşmaz
+                try:
+                    fut = submit(np.ascontiguousarray(rows, dtype=float))
+                except Exception as e:
+                    out.put((sym, None, e))
+                    continue
+                with lock:
+                    pending.add(fut)
+                fut.add_done_callback(lambda f, sym=sym: finished(sym, f))
+        finally:
+            out.put((done, n))
+
+    threading.Thread(target=feed, daemon=True).start()
+    total, seen = None, 0
+    try:
+        while total is None or seen < total:
+            item = out.get()
+            if item[0] is done:
+                total = item[1]
+                continue
+            seen += 1
+            yield item
+    finally:
+        # Havuz paylaşılıyor: kapatılmaz, yalnızca bu taramanın bekleyen işleri iptal edilir
+        with lock:
+            for fut in pending:
+                fut.cancel()
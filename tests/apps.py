@@ -0,0 +1,41 @@
+"""
+Tarayıcı modüllerini testlerde içe aktarır (binance_web_scanner, doktor_ranking)
+
+ccxt / flask kurulu değilse yalnızca modül düzeyindeki içe aktarma ve
+Flask(...) / @app.route için boş yer tutucular konur; ağ ya da HTTP
+kullanan yollar testlerde çağrılmaz. Günlük ve OHLCV deposu conftest'te
+geçici dizine yönlendirilir, böylece modül düzeyindeki Scanner() depoya
+yazmaz.
+"""
+
+import importlib
+import importlib.util
+import sys
+import types
+
+
+class _App:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def route(self, *args, **kwargs):
+        return lambda f: f
+
+
+def _optional(name, **attrs):
+    if name in sys.modules or importlib.util.find_spec(name) is not None:
+        return
+    mod = types.ModuleType(name)
+    mod.__dict__.update(attrs)
+    sys.modules[name] = mod
+
+
+def web():
+    _optional('ccxt')
+    _optional('flask', Flask=_App, Response=None, render_template_string=None, request=None)
+    return importlib.import_module('binance_web_scanner')
+
+
+def doktor():
+    _optional('ccxt')
+    return importlib.import_module('doktor_ranking')
@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for p in (ROOT, os.path.join(ROOT, 'app'), os.path.dirname(os.path.abspath(__file__))):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+# Modül düzeyinde günlük / depo açan tarayıcılar depo dizinine yazmasın
+_TMP = tempfile.mkdtemp(prefix='paper-tests-')
+os.environ.setdefault('PAPER_JOURNAL', os.path.join(_TMP, 'journal.sqlite'))
+os.environ.setdefault('OHLCV_STORE_DIR', os.path.join(_TMP, 'ohlcv'))
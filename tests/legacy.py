@@ -0,0 +1,447 @@
+"""
+Vektörleştirilmeden önceki döngülü uygulamalar (betiklerden aynen alındı)
+Yalnızca eşdeğerlik testleri ve benchmark'lar için referans olarak kullanılır.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# ============================================================================
+# HEIKEN ASHI + TD SEQUENTIAL (spotscan, scanandbacktest, haftalikbist, ...)
+# ============================================================================
+def heiken_ashi(df):
+    """spotscan / us_stock_scanner / BIST: satır satır df.loc yazımı"""
+    df = df.copy()
+    df['HA_Close'] = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
+    df['HA_Open'] = 0.0
+    df.loc[df.index[0], 'HA_Open'] = (df['Open'].iloc[0] + df['Close'].iloc[0]) / 2
+    for i in range(1, len(df)):
+        df.loc[df.index[i], 'HA_Open'] = (df['HA_Open'].iloc[i-1] + df['HA_Close'].iloc[i-1]) / 2
+    df['HA_High'] = df[['High', 'HA_Open', 'HA_Close']].max(axis=1)
+    df['HA_Low'] = df[['Low', 'HA_Open', 'HA_Close']].min(axis=1)
+    return df
+
+
+def td_sequential_clamp_after(df, labels=('YÜKSELİŞ', 'DÜŞÜŞ', 'NÖTR')):
+    """
+    spotscan / scanandbacktest / haftalikbist / us_stock_scanner / BIST GUI:
+    sayaç 9'a sabitlenmeden önce yazılır (→ cap=10)
+    """
+    df = heiken_ashi(df)
+    for col, better in (('buy_setup', lambda a, b: a < b), ('sell_setup', lambda a, b: a > b)):
+        df[col] = 0
+        count = 0
+        for i in range(4, len(df)):
+            if better(df['HA_Close'].iloc[i], df['HA_Close'].iloc[i-4]):
+                count += 1
+                df.loc[df.index[i], col] = count
+                if count >= 9:
+                    count = 9
+            else:
+                count = 0
+    up, down, neutral = labels
+    df['ha_trend'] = neutral
+    for i in range(len(df)):
+        if df['HA_Close'].iloc[i] > df['HA_Open'].iloc[i]:
+            df.loc[df.index[i], 'ha_trend'] = up
+        elif df['HA_Close'].iloc[i] < df['HA_Open'].iloc[i]:
+            df.loc[df.index[i], 'ha_trend'] = down
+    return df
+
+
+def td_sequential_min(df, labels=('YÜKSELİŞ', 'DÜŞÜŞ', 'NÖTR')):
+    """spotscanmail / Russell: min(count, 9) yazılır (→ cap=9)"""
+    df = heiken_ashi(df)
+    for col, better in (('buy_setup', lambda a, b: a < b), ('sell_setup', lambda a, b: a > b)):
+        df[col] = 0
+        count = 0
+        for i in range(4, len(df)):
+            if better(df['HA_Close'].iloc[i], df['HA_Close'].iloc[i-4]):
+                count += 1
+                df.loc[df.index[i], col] = min(count, 9)
+            else:
+                count = 0
+    up, down, neutral = labels
+    df['ha_trend'] = neutral
+    for i in range(len(df)):
+        if df['HA_Close'].iloc[i] > df['HA_Open'].iloc[i]:
+            df.loc[df.index[i], 'ha_trend'] = up
+        elif df['HA_Close'].iloc[i] < df['HA_Open'].iloc[i]:
+            df.loc[df.index[i], 'ha_trend'] = down
+    return df
+
+
+def ha_td9_lists(o, h, l, c):
+    """binance_web_scanner / doktor_ranking: liste özyinelemesi + min(bc + 1, 9)"""
+    o, h, l, c = (pd.Series(np.asarray(x, dtype=float)) for x in (o, h, l, c))
+    ha_c = (o + h + l + c) / 4
+    ha_o = [(o.iloc[0] + c.iloc[0]) / 2]
+    for i in range(1, len(c)):
+        ha_o.append((ha_o[-1] + ha_c.iloc[i - 1]) / 2)
+    ha = ha_c.values
+    n = len(ha)
+    buy = [0] * n
+    sell = [0] * n
+    bc = sc = 0
+    for i in range(n):
+        bc = min(bc + 1, 9) if i >= 4 and ha[i] < ha[i - 4] else 0
+        sc = min(sc + 1, 9) if i >= 4 and ha[i] > ha[i - 4] else 0
+        buy[i] = bc
+        sell[i] = sc
+    return np.array(ha_o), ha, np.array(buy), np.array(sell)
+
+
+# ============================================================================
+# TD9 TP/SL BACKTEST (Scanner.backtest / Advanced500Scanner.backtest_td9)
+# ============================================================================
+def td9_loop(closes, highs, lows, setups, sig_type='buy', tp=0.20, sl=0.05, fwd=20):
+    """binance_web_scanner.Scanner.backtest iç döngüsü"""
+    n = len(closes)
+    total = wins = 0
+    for i in range(4, n - fwd - 1):
+        if int(setups[i]) != 9: continue
+        entry = closes[i]
+        if entry <= 0: continue
+        tp_p = entry * (1 + tp) if sig_type == 'buy' else entry * (1 - tp)
+        sl_p = entry * (1 - sl) if sig_type == 'buy' else entry * (1 + sl)
+        total += 1; outcome = None
+        for j in range(i + 1, min(i + fwd + 1, n)):
+            h, l = highs[j], lows[j]
+            if sig_type == 'buy':
+                if h >= tp_p: outcome = 'win';  break
+                if l <= sl_p: outcome = 'loss'; break
+            else:
+                if l <= tp_p: outcome = 'win';  break
+                if h >= sl_p: outcome = 'loss'; break
+        if outcome == 'win': wins += 1
+        elif outcome is None:
+            fin = closes[min(i + fwd, n - 1)]
+            if sig_type == 'buy'  and fin > entry: wins += 1
+            if sig_type == 'sell' and fin < entry: wins += 1
+    return float(wins / total * 100 if total else 0.0), int(total), int(wins)
+
+
+# ============================================================================
+# DESTEK / DİRENÇ (Scanner.support_resistance)
+# ============================================================================
+def support_loop(lows, lb=100, tol=0.015):
+    """binance_web_scanner destek döngüsü (O(n²) dokunma sayımı)"""
+    lows = np.asarray(lows, dtype=float)[-lb:]
+    n = len(lows)
+    pivs = [lows[i] for i in range(2, n - 2)
+            if lows[i] < lows[i-1] and lows[i] < lows[i-2]
+            and lows[i] < lows[i+1] and lows[i] < lows[i+2]]
+    if not pivs:
+        return float(min(lows)), 1
+    best = pivs[0]; btc = 1
+    for ref in pivs:
+        tc = sum(1 for l in pivs if abs(l - ref) / ref <= tol)
+        if tc > btc: btc = tc; best = ref
+    return float(best), btc
+
+
+# ============================================================================
+# HEIKIN-ASHI SİNYAL HATTI (app/aitrade.py HeikinAshiTrader)
+# ============================================================================
+def aitrade_heikin_ashi(df):
+    """calculate_heikin_ashi: iloc ile satır satır HA_Open"""
+    ha_df = df.copy()
+
+    # Heikin-Ashi formülleri
+    ha_df['ha_close'] = (df['open'] + df['high'] + df['low'] + df['close']) / 4
+
+    ha_df['ha_open'] = 0.0
+    ha_df.iloc[0, ha_df.columns.get_loc('ha_open')] = (df['open'].iloc[0] + df['close'].iloc[0]) / 2
+
+    for i in range(1, len(ha_df)):
+        ha_df.iloc[i, ha_df.columns.get_loc('ha_open')] = (
+            ha_df['ha_open'].iloc[i-1] + ha_df['ha_close'].iloc[i-1]
+        ) / 2
+
+    ha_df['ha_high'] = ha_df[['high', 'ha_open', 'ha_close']].max(axis=1)
+    ha_df['ha_low'] = ha_df[['low', 'ha_open', 'ha_close']].min(axis=1)
+
+    # Mum rengi
+    ha_df['ha_color'] = np.where(ha_df['ha_close'] > ha_df['ha_open'], 'green', 'red')
+
+    # Mum gövde büyüklüğü
+    ha_df['ha_body'] = abs(ha_df['ha_close'] - ha_df['ha_open'])
+
+    # Üst ve alt fitil
+    ha_df['ha_upper_shadow'] = ha_df['ha_high'] - ha_df[['ha_open', 'ha_close']].max(axis=1)
+    ha_df['ha_lower_shadow'] = ha_df[['ha_open', 'ha_close']].min(axis=1) - ha_df['ha_low']
+
+    return ha_df
+
+
+def aitrade_trend_strength(df, period=10):
+    """calculate_trend_strength: ardışık yeşil/kırmızı sayaç döngüsü"""
+    df = df.copy()
+
+    # Ardışık yeşil/kırmızı mumları say
+    df['consecutive_green'] = 0
+    df['consecutive_red'] = 0
+
+    green_count = 0
+    red_count = 0
+
+    for i in range(len(df)):
+        if df['ha_color'].iloc[i] == 'green':
+            green_count += 1
+            red_count = 0
+        else:
+            red_count += 1
+            green_count = 0
+
+        df.iloc[i, df.columns.get_loc('consecutive_green')] = green_count
+        df.iloc[i, df.columns.get_loc('consecutive_red')] = red_count
+
+    # Hareketli ortalama ile trend
+    df['ha_ema_20'] = df['ha_close'].ewm(span=20, adjust=False).mean()
+    df['ha_ema_50'] = df['ha_close'].ewm(span=50, adjust=False).mean()
+
+    # Trend yönü
+    df['trend'] = np.where(df['ha_ema_20'] > df['ha_ema_50'], 'up', 'down')
+
+    return df
+
+
+def aitrade_patterns(df):
+    """detect_patterns: bar başına if/elif zinciri"""
+    df = df.copy()
+    df['pattern'] = ''
+
+    for i in range(5, len(df)):
+        # Güçlü yükseliş trendi (3+ ardışık yeşil mum)
+        if df['consecutive_green'].iloc[i] >= 3 and df['trend'].iloc[i] == 'up':
+            # Düşük alt fitil = güçlü alıcı baskısı
+            avg_body = df['ha_body'].iloc[i-3:i+1].mean()
+            if df['ha_lower_shadow'].iloc[i] < avg_body * 0.3:
+                df.iloc[i, df.columns.get_loc('pattern')] = 'Strong Uptrend'
+
+        # Güçlü düşüş trendi (3+ ardışık kırmızı mum)
+        elif df['consecutive_red'].iloc[i] >= 3 and df['trend'].iloc[i] == 'down':
+            # Düşük üst fitil = güçlü satıcı baskısı
+            avg_body = df['ha_body'].iloc[i-3:i+1].mean()
+            if df['ha_upper_shadow'].iloc[i] < avg_body * 0.3:
+                df.iloc[i, df.columns.get_loc('pattern')] = 'Strong Downtrend'
+
+        # Dönüş sinyali: Kırmızıdan yeşile
+        elif (df['ha_color'].iloc[i] == 'green' and
+              df['consecutive_red'].iloc[i-1] >= 3):
+            # Büyük gövdeli yeşil mum
+            if df['ha_body'].iloc[i] > df['ha_body'].iloc[i-3:i].mean() * 1.5:
+                df.iloc[i, df.columns.get_loc('pattern')] = 'Bullish Reversal'
+
+        # Dönüş sinyali: Yeşilden kırmızıya
+        elif (df['ha_color'].iloc[i] == 'red' and
+              df['consecutive_green'].iloc[i-1] >= 3):
+            # Büyük gövdeli kırmızı mum
+            if df['ha_body'].iloc[i] > df['ha_body'].iloc[i-3:i].mean() * 1.5:
+                df.iloc[i, df.columns.get_loc('pattern')] = 'Bearish Reversal'
+
+        # Doji benzeri (kararsızlık)
+        elif df['ha_body'].iloc[i] < df['ha_body'].iloc[i-10:i].mean() * 0.3:
+            df.iloc[i, df.columns.get_loc('pattern')] = 'Indecision'
+
+    return df
+
+
+def aitrade_signals(df):
+    """generate_signals: bar başına alış/satış zinciri"""
+    df = df.copy()
+    df['signal'] = 0
+    df['signal_type'] = ''
+
+    for i in range(50, len(df)):
+        # ALIŞ SİNYALLERİ
+
+        # 1. Güçlü yükseliş reversal
+        if df['pattern'].iloc[i] == 'Bullish Reversal':
+            if df['ha_close'].iloc[i] > df['ha_ema_20'].iloc[i]:
+                df.iloc[i, df.columns.get_loc('signal')] = 1
+                df.iloc[i, df.columns.get_loc('signal_type')] = 'Bullish Reversal + EMA'
+
+        # 2. Güçlü yükseliş trendi devam
+        elif df['pattern'].iloc[i] == 'Strong Uptrend':
+            # Düzeltme sonrası devam
+            if (df['consecutive_green'].iloc[i] == 3 and
+                df['consecutive_red'].iloc[i-1] <= 2 and
+                df['ha_close'].iloc[i] > df['ha_ema_50'].iloc[i]):
+                df.iloc[i, df.columns.get_loc('signal')] = 1
+                df.iloc[i, df.columns.get_loc('signal_type')] = 'Uptrend Continuation'
+
+        # 3. Trend ve momentum birleşimi
+        elif (df['consecutive_green'].iloc[i] >= 2 and
+              df['ha_close'].iloc[i] > df['ha_ema_20'].iloc[i] and
+              df['ha_ema_20'].iloc[i] > df['ha_ema_50'].iloc[i] and
+              df['ha_body'].iloc[i] > df['ha_body'].iloc[i-10:i].mean()):
+            df.iloc[i, df.columns.get_loc('signal')] = 1
+            df.iloc[i, df.columns.get_loc('signal_type')] = 'Strong Momentum'
+
+        # SATIŞ SİNYALLERİ
+
+        # 1. Düşüş reversal
+        if df['pattern'].iloc[i] == 'Bearish Reversal':
+            if df['ha_close'].iloc[i] < df['ha_ema_20'].iloc[i]:
+                df.iloc[i, df.columns.get_loc('signal')] = -1
+                df.iloc[i, df.columns.get_loc('signal_type')] = 'Bearish Reversal'
+
+        # 2. Güçlü düşüş trendi
+        elif df['pattern'].iloc[i] == 'Strong Downtrend':
+            df.iloc[i, df.columns.get_loc('signal')] = -1
+            df.iloc[i, df.columns.get_loc('signal_type')] = 'Strong Downtrend'
+
+        # 3. Trend kırılması
+        elif (df['consecutive_red'].iloc[i] >= 2 and
+              df['ha_close'].iloc[i] < df['ha_ema_20'].iloc[i] and
+              df['ha_ema_20'].iloc[i] < df['ha_ema_50'].iloc[i]):
+            df.iloc[i, df.columns.get_loc('signal')] = -1
+            df.iloc[i, df.columns.get_loc('signal_type')] = 'Trend Break'
+
+    return df
+
+
+def aitrade_pipeline(df):
+    """backtest()'in dört aşaması sırayla"""
+    df = aitrade_heikin_ashi(df)
+    df = aitrade_trend_strength(df)
+    df = aitrade_patterns(df)
+    return aitrade_signals(df)
+
+
+
+def aitrade_backtest(trader, df, initial_balance=10000):
+    """
+    backtest: bar bazlı pozisyon döngüsü (sinyal hattından geçmiş df;
+    boyut trader.calculate_position_size, ilerleme çıktısı atıldı)
+
+    Returns:
+        (işlemler, equity listesi, son bakiye)
+    """
+    balance = initial_balance
+    position = None
+    trades = []
+    equity_curve = []
+
+    for i in range(len(df)):
+        current_price = df['close'].iloc[i]
+        ha_close = df['ha_close'].iloc[i]
+        signal = df['signal'].iloc[i]
+        current_equity = balance
+
+        # Açık pozisyon varsa equity güncelle
+        if position:
+            unrealized_pnl = (current_price - position['entry_price']) * position['position_size']
+            current_equity = balance + unrealized_pnl
+
+        equity_curve.append({
+            'date': df.index[i],
+            'equity': current_equity
+        })
+
+        # ALIŞ sinyali
+        if signal == 1 and position is None:
+            # Stop loss: Son 20 barın HA en düşüğü
+            stop_loss = df['ha_low'].iloc[max(0, i-20):i+1].min() * 0.98
+
+            position_size = trader.calculate_position_size(
+                current_price, stop_loss, balance
+            )
+
+            if position_size > 0:
+                # Take profit: ATR bazlı dinamik hedef
+                atr = df['ha_body'].iloc[i-14:i+1].mean()
+                take_profit = current_price + (atr * 2.5)
+
+                position = {
+                    'entry_price': current_price,
+                    'entry_date': df.index[i],
+                    'position_size': position_size,
+                    'stop_loss': stop_loss,
+                    'take_profit': take_profit,
+                    'signal_type': df['signal_type'].iloc[i],
+                    'entry_ha_color': df['ha_color'].iloc[i]
+                }
+
+        # Pozisyon çıkış kontrolü
+        elif position is not None:
+            # Stop loss
+            if df['low'].iloc[i] <= position['stop_loss']:
+                exit_price = position['stop_loss']
+                pnl = (exit_price - position['entry_price']) * position['position_size']
+                balance += pnl
+
+                trades.append({
+                    'entry_date': position['entry_date'],
+                    'exit_date': df.index[i],
+                    'entry_price': position['entry_price'],
+                    'exit_price': exit_price,
+                    'pnl': pnl,
+                    'pnl_percent': (pnl / (position['entry_price'] * position['position_size'])) * 100,
+                    'exit_reason': 'Stop Loss',
+                    'signal_type': position['signal_type'],
+                    'hold_days': (df.index[i] - position['entry_date']).days
+                })
+                position = None
+
+            # Take profit
+            elif df['high'].iloc[i] >= position['take_profit']:
+                exit_price = position['take_profit']
+                pnl = (exit_price - position['entry_price']) * position['position_size']
+                balance += pnl
+
+                trades.append({
+                    'entry_date': position['entry_date'],
+                    'exit_date': df.index[i],
+                    'entry_price': position['entry_price'],
+                    'exit_price': exit_price,
+                    'pnl': pnl,
+                    'pnl_percent': (pnl / (position['entry_price'] * position['position_size'])) * 100,
+                    'exit_reason': 'Take Profit',
+                    'signal_type': position['signal_type'],
+                    'hold_days': (df.index[i] - position['entry_date']).days
+                })
+                position = None
+
+            # Satış sinyali
+            elif signal == -1:
+                exit_price = current_price
+                pnl = (exit_price - position['entry_price']) * position['position_size']
+                balance += pnl
+
+                trades.append({
+                    'entry_date': position['entry_date'],
+                    'exit_date': df.index[i],
+                    'entry_price': position['entry_price'],
+                    'exit_price': exit_price,
+                    'pnl': pnl,
+                    'pnl_percent': (pnl / (position['entry_price'] * position['position_size'])) * 100,
+                    'exit_reason': 'Sell Signal',
+                    'signal_type': position['signal_type'],
+                    'hold_days': (df.index[i] - position['entry_date']).days
+                })
+                position = None
+
+            # Trailing stop (3+ kırmızı mum)
+            elif (df['consecutive_red'].iloc[i] >= 3 and
+                  position['entry_ha_color'] == 'green'):
+                exit_price = current_price
+                pnl = (exit_price - position['entry_price']) * position['position_size']
+                balance += pnl
+
+                trades.append({
+                    'entry_date': position['entry_date'],
+                    'exit_date': df.index[i],
+                    'entry_price': position['entry_price'],
+                    'exit_price': exit_price,
+                    'pnl': pnl,
+                    'pnl_percent': (pnl / (position['entry_price'] * position['position_size'])) * 100,
+                    'exit_reason': 'Trailing Stop',
+                    'signal_type': position['signal_type'],
+                    'hold_days': (df.index[i] - position['entry_date']).days
+                })
+                position = None
+
+    return trades, equity_curve, balance
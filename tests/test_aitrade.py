@@ -0,0 +1,240 @@
+"""app/aitrade.py HeikinAshiTrader sinyal hattı: eski iloc döngüleriyle bire bir"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import legacy
+from aitrade import (HeikinAshiTrader, HeikinAshiPortfolio, symbol_backtest, load_results,
+                     download_history, find_gaps, gap_windows)
+from ohlcv_store import OHLCVStore
+
+
+def candles(n, seed, doji_every=0):
+    """Rastgele 4s OHLCV; doji_every verilirse o barlar düz (open = close)"""
+    r = np.random.default_rng(seed)
+    c = 100 * np.exp(np.cumsum(r.normal(0, 0.01, n)))
+    o = np.r_[c[:1], c[:-1]] * (1 + r.normal(0, 0.002, n))
+    if doji_every:
+        o[::doji_every] = c[::doji_every]
+    h = np.maximum(o, c) * (1 + np.abs(r.normal(0, 0.004, n)))
+    l = np.minimum(o, c) * (1 - np.abs(r.normal(0, 0.004, n)))
+    return pd.DataFrame({'open': o, 'high': h, 'low': l, 'close': c,
+                         'volume': r.integers(1000, 10000, n)},
+                        index=pd.date_range('2023-01-01', periods=n, freq='4h'))
+
+
+def pipeline(df):
+    trader = HeikinAshiTrader()
+    df = trader.calculate_heikin_ashi(df)
+    df = trader.calculate_trend_strength(df)
+    df = trader.detect_patterns(df)
+    return trader.generate_signals(df)
+
+
+CASES = [
+    *[dict(n=k, seed=k) for k in (1, 2, 5, 6, 10, 11, 49, 50, 51, 69)],   # kısa / sınır uzunlukları
+    *[dict(n=500, seed=100 + s) for s in range(4)],
+    dict(n=500, seed=200, doji_every=3),                                    # düz gövdeler (eşitlikler)
+    dict(n=300, seed=201, doji_every=1),
+]
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_pipeline_matches_loops(case):
+    df = candles(**case)
+    pd.testing.assert_frame_equal(pipeline(df), legacy.aitrade_pipeline(df), check_exact=True)
+
+
+def test_demo_data_has_signals():
+    """Karşılaştırmanın boş sinyallerle geçmediğini sabitler"""
+    df = candles(2000, 7)
+    out = legacy.aitrade_pipeline(df)
+    assert (out['signal'] == 1).any() and (out['signal'] == -1).any()
+    assert (out['pattern'] != '').sum() > 10
+    pd.testing.assert_frame_equal(pipeline(df), out, check_exact=True)
+
+
+def backtest_both(df, initial_balance=10000):
+    """Sinyal hattından geçmiş df üzerinde backtest_core ve eski döngü"""
+    trader = HeikinAshiTrader()
+    trades, equity, balance, _ = trader.backtest_core(df, initial_balance)
+    old_trades, old_equity, old_balance = legacy.aitrade_backtest(trader, df, initial_balance)
+    return ((trader.trade_records(trades, df.index), list(equity), balance),
+            (old_trades, [e['equity'] for e in old_equity], old_balance))
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_backtest_matches_loop(case):
+    new, old = backtest_both(pipeline(candles(**case)))
+    assert new == old
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_backtest_nan_extremes(seed):
+    """NaN low/high barı tetiklemez; blok ekstremumu komşu barları görmeye devam eder"""
+    df = pipeline(candles(600, 300 + seed))
+    r = np.random.default_rng(seed)
+    df.loc[r.random(600) < 0.15, 'low'] = np.nan
+    df.loc[r.random(600) < 0.15, 'high'] = np.nan
+    new, old = backtest_both(df)
+    assert len(old[0]) > 5
+    assert new == old
+
+
+# ============================================================================
+# PORTFÖY (HeikinAshiPortfolio.merge — ağsız, symbol_backtest çıktılarıyla)
+# ============================================================================
+def to_rows(df):
+    ts = (df.index - pd.Timestamp('1970-01-01')) // pd.Timedelta(milliseconds=1)
+    return np.column_stack([ts, df[['open', 'high', 'low', 'close', 'volume']].to_numpy(float)])
+
+
+def test_open_position_keeps_signal_type():
+    found = 0
+    for seed in range(40):
+        r = symbol_backtest(to_rows(candles(300, 500 + seed)))
+        if r['open'] is None:
+            continue
+        found += 1
+        pf = HeikinAshiPortfolio(['X'])
+        pf.merge({'X': r})
+        assert len(pf.open_positions) == 1
+        assert pf.open_positions['signal_type'][0] == r['open'][5] != ''
+    assert found
+
+
+def runs(n_syms, bars=600, seed=0):
+    return {f'S{k}': symbol_backtest(to_rows(candles(bars, seed + k))) for k in range(n_syms)}
+
+
+def strip_symbol(trades):
+    return [{k: v for k, v in t.items() if k != 'symbol'} for t in trades]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_single_symbol_portfolio_matches_backtest(seed):
+    df = candles(800, 700 + seed)
+    trader = HeikinAshiTrader(timeframe='4h')
+    _, trades, balance = trader.backtest(df, 10000)
+    assert trades
+
+    pf = HeikinAshiPortfolio(['X'], initial_balance=10000, max_positions=1)
+    got, got_balance = pf.merge({'X': symbol_backtest(to_rows(df))})
+    assert strip_symbol(got) == trades
+    assert got_balance == balance
+    np.testing.assert_allclose(pf.equity, trader.equity_curve['equity'].values, rtol=1e-12)
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3])
+def test_position_limit_honoured(limit):
+    pf = HeikinAshiPortfolio([], max_positions=limit)
+    pf.merge(runs(8))
+    acc = np.concatenate([pf.trade_array, pf.open_positions])
+    n = len(pf.ts)
+    # [giriş, çıkış) aralıkları: çıkış barında boşalan yer aynı barda yeniden dolabilir
+    live = np.zeros(n + 1, dtype=int)
+    np.add.at(live, acc['entry_idx'], 1)
+    np.add.at(live, np.minimum(acc['exit_idx'], n), -1)
+    assert np.cumsum(live).max() <= limit
+    assert pf.skipped > 0
+
+
+def test_symbol_pnl_sums_to_portfolio():
+    pf = HeikinAshiPortfolio([], initial_balance=10000, max_positions=3)
+    trades, balance = pf.merge(runs(6, seed=40))
+    assert len(trades) > 10
+    by_symbol = sum(m['total_pnl'] for m in pf.symbol_metrics.values())
+    assert by_symbol == pytest.approx(pf.metrics['total_pnl'], rel=1e-12)
+    assert balance == pytest.approx(10000 + sum(t['pnl'] for t in trades), rel=1e-12)
+    # Sembol equity eğrilerinin başlangıç üstü payları portföy eğrisini verir
+    parts = sum(pf._equity(pf.trade_array[pf.trade_array['symbol'] == s]) - 10000 for s in pf.names)
+    opened = pf._equity(pf.open_positions) - 10000
+    np.testing.assert_allclose(pf.equity, 10000 + parts + opened, rtol=1e-12)
+
+
+def test_save_load_round_trip(tmp_path):
+    pf = HeikinAshiPortfolio([], max_positions=2)
+    pf.merge(runs(5, seed=80))
+    path = str(tmp_path / 'portfolio.npz')
+    pf.save(path)
+    back = load_results(path)
+    for key, value in (('ts', pf.ts), ('equity', pf.equity), ('trades', pf.trade_array),
+                       ('open_positions', pf.open_positions), ('symbols', pf.names)):
+        assert back[key].dtype == value.dtype and back[key].shape == value.shape
+        assert back[key].tobytes() == value.tobytes()      # açık pozisyonun NaN çıkışı dahil
+    assert back['metrics']['portfolio'] == pytest.approx(pf.metrics)
+    assert back['metrics']['skipped'] == pf.skipped
+    assert back['metrics']['max_positions'] == 2
+
+
+# ============================================================================
+# GEÇMİŞ İNDİRME (download_history / load_history — sahte borsa)
+# ============================================================================
+H4 = 4 * 3_600_000
+
+
+class FakeFutures:
+    """
+    fetch_ohlcv(since, limit): `holes` hiç gelmeyen barlar (borsa boşluğu),
+    `flaky` yalnızca ilk istekte eksik gelen barlar
+    """
+
+    def __init__(self, start, end, holes=(), flaky=()):
+        ts = np.arange(start // H4 * H4, end, H4)
+        ts = ts[~np.isin(ts, list(holes))]
+        r = np.random.default_rng(0)
+        c = 100 + np.cumsum(r.normal(0, 1, len(ts)))
+        self.rows = np.column_stack([ts, c, c + 1, c - 1, c, np.ones(len(ts))])
+        self.flaky = set(flaky)
+        self.calls = []
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=1000):
+        self.calls.append(since)
+        rows = self.rows[self.rows[:, 0] >= since][:limit]
+        served = rows[~np.isin(rows[:, 0], list(self.flaky))]
+        self.flaky -= set(rows[:, 0].tolist())
+        return served.tolist()
+
+
+def test_gap_windows_collapse_same_page():
+    gaps = [(0, 2 * H4), (5 * H4, 7 * H4), (999 * H4, 1001 * H4), (1003 * H4, 1005 * H4)]
+    assert gap_windows(gaps, H4) == [H4, 1004 * H4]
+    assert gap_windows([], H4) == []
+
+
+def test_download_dedupes_and_retries_gaps_once():
+    end = 1_700_000_000_000 // H4 * H4
+    start = end - 2500 * H4
+    ts = np.arange(start, end, H4)
+    holes = ts[[1200, 1210, 1220]]                  # kalıcı: tek sayfada üç boşluk
+    flaky = ts[[300, 1800]]                         # ilk istekte eksik
+    ex = FakeFutures(start, end, holes, flaky)
+    rows = download_history(ex, 'X/USDT', '4h', start, end)
+
+    # 3 sayfa + 2 yeniden istek: 1200-1220 boşlukları 300'ün penceresinde (boşluk başına değil)
+    assert len(ex.calls) == 3 + 2
+    assert np.all(np.diff(rows[:, 0]) > 0)          # örtüşen sayfalar tekilleşti
+    np.testing.assert_array_equal(rows, ex.rows)
+    assert find_gaps(rows[:, 0], H4) == [(int(ts[1199]), int(ts[1201])), (int(ts[1209]), int(ts[1211])),
+                                         (int(ts[1219]), int(ts[1221]))]
+
+
+def test_load_history_reports_gaps_and_fetches_tail(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    now = int(pd.Timestamp.now().timestamp() * 1000)
+    start = now - 400 * 86_400_000
+    ex = FakeFutures(start - 10 * H4, now)
+    hole = ex.rows[500, 0]
+    ex.rows = ex.rows[ex.rows[:, 0] != hole]
+    trader = HeikinAshiTrader(symbol='X/USDT', timeframe='4h')
+
+    rows = trader.load_history(1, ex, store)
+    assert rows[0, 0] >= now - 365 * 86_400_000
+    assert trader.gaps == [(int(hole - H4), int(hole + H4))]
+
+    ex.calls.clear()
+    again = trader.load_history(1, ex, store)
+    assert ex.calls == [int(rows[-1, 0])]           # yalnızca son saklanan bardan sonrası
+    np.testing.assert_array_equal(again, rows)
+    assert trader.gaps == [(int(hole - H4), int(hole + H4))]
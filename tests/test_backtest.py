@@ -0,0 +1,97 @@
+"""backtest.td9_backtest ile eski TP/SL döngüsünün bire bir eşdeğerliği"""
+
+import numpy as np
+import pytest
+
+import indicators
+import legacy
+from backtest import td9_backtest
+
+
+def series(n, seed, vol=0.02):
+    r = np.random.default_rng(seed)
+    c = 100 * np.exp(np.cumsum(r.normal(0, vol, n)))
+    o = np.r_[c[:1], c[:-1]]
+    h = np.maximum(o, c) * (1 + np.abs(r.normal(0, vol / 2, n)))
+    l = np.minimum(o, c) * (1 - np.abs(r.normal(0, vol / 2, n)))
+    _, ha_c, _, _ = indicators.heiken_ashi_arrays(o, h, l, c)
+    buy, sell = indicators.td_setup_counts(ha_c)
+    return c, h, l, buy, sell
+
+
+def both(c, h, l, setups, sig_type, **params):
+    return (td9_backtest(c, h, l, setups, sig_type, **params),
+            legacy.td9_loop(c, h, l, setups, sig_type, **params))
+
+
+PARAMS = [dict(), dict(tp=0.03, sl=0.02, fwd=5), dict(tp=0.5, sl=0.5, fwd=3), dict(tp=0.01, sl=0.01, fwd=1)]
+
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('params', PARAMS)
+def test_random_series_parity(seed, params):
+    c, h, l, buy, sell = series(400, seed)
+    for setups, sig_type in ((buy, 'buy'), (sell, 'sell')):
+        new, old = both(c, h, l, setups, sig_type, **params)
+        assert new == old
+        assert type(new[0]) is float and type(new[1]) is int and type(new[2]) is int
+
+
+def flat(n=40, price=100.0):
+    c = np.full(n, price)
+    return c, c.copy(), c.copy(), np.zeros(n, dtype=np.int64)
+
+
+@pytest.mark.parametrize('sig_type', ['buy', 'sell'])
+def test_tp_and_sl_on_same_bar_counts_as_win(sig_type):
+    c, h, l, setups = flat()
+    setups[10] = 9
+    h[13], l[13] = 130.0, 70.0              # tek barda hem TP hem SL
+    new, old = both(c, h, l, setups, sig_type)
+    assert new == old == (100.0, 1, 1)
+
+
+@pytest.mark.parametrize('sig_type', ['buy', 'sell'])
+def test_sl_before_tp_is_loss(sig_type):
+    c, h, l, setups = flat()
+    setups[10] = 9
+    if sig_type == 'buy':
+        l[12], h[14] = 90.0, 130.0
+    else:
+        h[12], l[14] = 110.0, 70.0
+    new, old = both(c, h, l, setups, sig_type)
+    assert new == old == (0.0, 1, 0)
+
+
+def test_no_hit_falls_back_to_close_after_fwd():
+    c, h, l, setups = flat()
+    setups[[5, 12]] = 9
+    c[5 + 20] = 101.0                       # kazanç
+    c[12 + 20] = 99.0                       # kayıp
+    h, l = np.maximum(h, c), np.minimum(l, c)
+    new, old = both(c, h, l, setups, 'buy')
+    assert new == old == (50.0, 2, 1)
+
+
+@pytest.mark.parametrize('fwd', [1, 5, 20])
+def test_signals_within_fwd_of_end_are_ignored(fwd):
+    n = 60
+    c, h, l, setups = flat(n)
+    edge = n - fwd - 1                      # döngü aralığının dışındaki ilk bar
+    setups[[edge - 1, edge, edge + 1, n - 1]] = 9
+    h[edge:] = 130.0
+    new, old = both(c, h, l, setups, 'buy', fwd=fwd)
+    assert new == old == (100.0, 1, 1)
+
+
+def test_non_positive_entries_and_short_series():
+    c, h, l, setups = flat()
+    setups[[8, 9, 10]] = 9
+    c[8], c[9] = 0.0, -1.0
+    new, old = both(c, h, l, setups, 'buy')
+    assert new == old and new[1] == 1
+    for n in (0, 3, 6, 25, 26):
+        c, h, l, setups = flat(n)
+        setups[:] = 9
+        new, old = both(c, h, l, setups, 'buy')
+        assert new == old
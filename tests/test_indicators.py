@@ -0,0 +1,204 @@
+"""indicators.py çekirdeklerinin eski betik döngüleriyle eşdeğerliği"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators
+import legacy
+
+
+def ohlc(n, seed=0, nan_every=0, tick=None):
+    """Rastgele OHLC; tick verilirse fiyatlar yuvarlanır (eşitlikler çoğalır)"""
+    r = np.random.default_rng(seed)
+    c = 100 * np.exp(np.cumsum(r.normal(0, 0.01, n)))
+    o = np.r_[c[:1], c[:-1]]
+    h = np.maximum(o, c) * (1 + np.abs(r.normal(0, 0.004, n)))
+    l = np.minimum(o, c) * (1 - np.abs(r.normal(0, 0.004, n)))
+    df = pd.DataFrame({'Open': o, 'High': h, 'Low': l, 'Close': c},
+                      index=pd.date_range('2024-01-01', periods=n, freq='D'))
+    if tick:
+        df = (df / tick).round() * tick
+    if nan_every:
+        df.iloc[nan_every::nan_every, :] = np.nan
+    df['Volume'] = 1.0
+    return df
+
+
+CASES = [
+    dict(n=300, seed=1),
+    dict(n=300, seed=2, tick=0.5),              # bol eşitlik
+    dict(n=300, seed=3, nan_every=37),          # ara NaN barları
+    dict(n=120, seed=4, tick=1.0, nan_every=11),
+    *[dict(n=k, seed=10 + k) for k in (1, 2, 3, 4, 5, 6, 9)],   # kısa seriler
+]
+
+
+def trend_run_df(n=40):
+    """Uzun tek yönlü seri: sayaç 9'u aşar (cap / sabitleme sırası testi)"""
+    c = np.r_[np.linspace(100, 60, n // 2), np.linspace(60, 120, n - n // 2)]
+    return pd.DataFrame({'Open': c, 'High': c * 1.01, 'Low': c * 0.99, 'Close': c, 'Volume': 1.0},
+                        index=pd.date_range('2024-01-01', periods=n, freq='D'))
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_heiken_ashi_matches_df_loop(case):
+    df = ohlc(**case)
+    ref = legacy.heiken_ashi(df)
+    got = indicators.heiken_ashi(df)
+    pd.testing.assert_frame_equal(got[ref.columns], ref)
+
+
+@pytest.mark.parametrize('case', CASES + [dict(df=trend_run_df())])
+def test_td_sequential_clamp_after_is_cap10(case):
+    df = case['df'] if 'df' in case else ohlc(**case)
+    ref = legacy.td_sequential_clamp_after(df)
+    got = indicators.td_sequential_heiken_ashi(df, cap=10, labels=indicators.TREND_TR)
+    pd.testing.assert_frame_equal(got[ref.columns], ref, check_dtype=False)
+
+
+@pytest.mark.parametrize('case', CASES + [dict(df=trend_run_df())])
+def test_td_sequential_min_is_cap9(case):
+    df = case['df'] if 'df' in case else ohlc(**case)
+    ref = legacy.td_sequential_min(df, labels=indicators.TREND_EN)
+    got = indicators.td_sequential_heiken_ashi(df, cap=9, labels=indicators.TREND_EN)
+    pd.testing.assert_frame_equal(got[ref.columns], ref, check_dtype=False)
+
+
+def test_clamp_order_difference_is_pinned():
+    """Eski sıralama farkı: sabitleme sonrası yazım 9'da, öncesi 10'da kalır"""
+    df = trend_run_df()
+    cap10 = legacy.td_sequential_clamp_after(df)['buy_setup'].values
+    cap9 = legacy.td_sequential_min(df)['buy_setup'].values
+    assert cap10.max() == 10 and cap9.max() == 9
+    assert list(cap10[cap10 > 0][:12]) == [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10]
+
+
+@pytest.mark.parametrize('case', CASES + [dict(df=trend_run_df())])
+def test_web_doktor_list_loop(case):
+    df = case['df'] if 'df' in case else ohlc(**case)
+    o, h, l, c = (df[k].values for k in ('Open', 'High', 'Low', 'Close'))
+    ref_o, ref_c, ref_buy, ref_sell = legacy.ha_td9_lists(o, h, l, c)
+    ha_o, ha_c, _, _ = indicators.heiken_ashi_arrays(o, h, l, c)
+    buy, sell = indicators.td_setup_counts(ha_c, cap=9)
+    np.testing.assert_array_equal(ha_o, ref_o)
+    np.testing.assert_array_equal(ha_c, ref_c)
+    np.testing.assert_array_equal(buy, ref_buy)
+    np.testing.assert_array_equal(sell, ref_sell)
+
+
+def test_empty_inputs():
+    ha_o, ha_c, ha_h, ha_l = indicators.heiken_ashi_arrays([], [], [], [])
+    assert len(ha_o) == len(ha_c) == len(ha_h) == len(ha_l) == 0
+    buy, sell = indicators.td_setup_counts(np.empty(0))
+    assert len(buy) == len(sell) == 0
+    assert len(indicators.run_length(np.empty(0, dtype=bool), cap=9)) == 0
+
+
+def test_run_length_and_trend_edges():
+    cond = np.array([1, 1, 0, 1, 1, 1, 1, 0, 0, 1], dtype=bool)
+    assert indicators.run_length(cond).tolist() == [1, 2, 0, 1, 2, 3, 4, 0, 0, 1]
+    assert indicators.run_length(cond, cap=2).tolist() == [1, 2, 0, 1, 2, 2, 2, 0, 0, 1]
+    # NaN karşılaştırmaları hem yükseliş hem düşüş için yanlış → nötr
+    trend = indicators.ha_trend([1.0, 2.0, np.nan, 1.0], [2.0, 1.0, 1.0, 1.0], indicators.TREND_EN)
+    assert trend.tolist() == ['BULLISH', 'BEARISH', 'NEUTRAL', 'NEUTRAL']
+
+
+def test_heiken_ashi_matrix_seeds_at_first_valid_bar():
+    """Soldan NaN dolgulu satır: matris ilk geçerli bardan, arrays 0. indeksten tohumlar"""
+    df = ohlc(60, seed=7, nan_every=13)
+    pad = 15
+    o, h, l, c = (np.r_[np.full(pad, np.nan), df[k].values] for k in ('Open', 'High', 'Low', 'Close'))
+    refs = [indicators.heiken_ashi_arrays(o[pad:], h[pad:], l[pad:], c[pad:]),
+            indicators.heiken_ashi_arrays(*(x[-30:] for x in (o, h, l, c)))]
+    mat = indicators.heiken_ashi_matrix(*(np.vstack([x, np.r_[np.full(len(x) - 30, np.nan), x[-30:]]])
+                                          for x in (o, h, l, c)))
+
+    for row, (start, ref) in enumerate(zip((pad, len(o) - 30), refs)):
+        for got, want in zip(mat, ref):
+            assert np.isnan(got[row, :start]).all()
+            np.testing.assert_array_equal(got[row, start:], want)
+
+    # Aynı dolgulu satır tek sembol yoluna verilirse tohum NaN: ha_open tümüyle NaN
+    assert np.isnan(indicators.heiken_ashi_arrays(o, h, l, c)[0]).all()
+
+
+# ============================================================================
+# ARTIMLI TDState: parça parça güncelleme = tam yeniden hesap
+# ============================================================================
+def ccxt_rows(n, seed=0, tick=None):
+    df = ohlc(n, seed=seed, tick=tick)
+    ts = 1_700_000_000_000 + np.arange(n, dtype=np.int64) * 3_600_000
+    return np.column_stack([ts, df[['Open', 'High', 'Low', 'Close', 'Volume']].to_numpy()])
+
+
+def assert_full_recompute(st, rows, cap=9):
+    """Durumun son len(st) barı, tüm satırlardan baştan hesaplananla aynı"""
+    ha_o, ha_c, _, _ = indicators.heiken_ashi_arrays(*rows[:, 1:5].T)
+    buy, sell = indicators.td_setup_counts(ha_c, cap=cap)
+    k = len(st)
+    np.testing.assert_array_equal(st.ts, rows[-k:, 0].astype(np.int64))
+    np.testing.assert_array_equal(st.ohlcv, rows[-k:, 1:6])
+    np.testing.assert_allclose(st.ha_o, ha_o[-k:], rtol=1e-12)
+    np.testing.assert_allclose(st.ha_c, ha_c[-k:], rtol=1e-12)
+    np.testing.assert_array_equal(st.buy, buy[-k:])
+    np.testing.assert_array_equal(st.sell, sell[-k:])
+
+
+@pytest.mark.parametrize('seed,tick,cap', [(1, None, 9), (2, 0.5, 9), (3, 1.0, 13)])
+def test_td_state_incremental_matches_full(seed, tick, cap):
+    """Rastgele parçalar, her biri son saklanan barı (kapanmamış mum) tekrar vererek"""
+    rows = ccxt_rows(400, seed, tick)
+    r = np.random.default_rng(seed)
+    st = indicators.TDState(cap=cap)
+    end = 0
+    while end < len(rows):
+        start = max(0, end - int(r.integers(1, 4)))        # son 1-3 bar örtüşür
+        end = min(len(rows), end + int(r.integers(1, 12)))
+        assert st.update(rows[start:end])
+        assert_full_recompute(st, rows[:end], cap)
+
+
+def test_td_state_open_bar_is_replaced():
+    rows = ccxt_rows(60, seed=5)
+    st = indicators.TDState()
+    live = rows[:40].copy()
+    live[-1, 2:5] *= 1.03                                  # kapanmamış mum sonradan değişir
+    assert st.update(live)
+    assert st.update(rows[39:45])
+    assert_full_recompute(st, rows[:45])
+
+
+def test_td_state_maxlen_keeps_continuity():
+    rows = ccxt_rows(300, seed=6)
+    st = indicators.TDState(maxlen=50)
+    assert st.update(rows[:60])
+    for end in range(100, 301, 40):
+        assert st.update(rows[end - 41:end])
+        assert len(st) == 50
+    assert_full_recompute(st, rows)
+
+
+@pytest.mark.parametrize('edit', ['price', 'timestamp'])
+def test_td_state_rewritten_history_resets(edit):
+    rows = ccxt_rows(100, seed=8)
+    st = indicators.TDState()
+    assert st.update(rows[:80])
+    again = rows[70:90].copy()
+    if edit == 'price':
+        again[3, 4] *= 0.9                                 # kapanmış bir barın kapanışı
+    else:
+        again[0, 0] += 60_000                              # saklı ts dizisiyle hizasız
+    assert st.update(again) is False
+    assert len(st) == 0 and st.last_ts is None
+    assert st.update(rows[:90])
+    assert_full_recompute(st, rows[:90])
+
+
+def test_td_state_older_rows_recompute():
+    rows = ccxt_rows(120, seed=9)
+    st = indicators.TDState()
+    assert st.update(rows[50:])
+    assert st.update(rows)                                 # daha eskiye uzanan tam geçmiş
+    assert_full_recompute(st, rows)
+    assert st.update(np.empty((0, 6))) and len(st) == 120
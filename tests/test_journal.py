@@ -0,0 +1,118 @@
+"""journal.Journal ve kağıt hesapların yeniden oynatması: görüntü + sonraki olaylar = canlı durum"""
+
+import numpy as np
+import pytest
+
+import apps
+from journal import Journal, dumps
+
+web = apps.web()
+doktor = apps.doktor()
+
+# Değerleme günlüğe yazılmaz; açılıştan sonraki ilk fiyatla yeniden hesaplanır
+MARKS = {'cur', 'pnl', 'pnl_pct', 'current_price', 'pnl_percent'}
+
+
+def trade(acct, seed, steps=120):
+    """Rastgele aç / fiyat / kapat akışı (TP/SL yakın: sık kapanış)"""
+    r = np.random.default_rng(seed)
+    syms = [f'S{i}' for i in range(6)]
+    px = dict.fromkeys(syms, 100.0)
+    for _ in range(steps):
+        sym = syms[r.integers(len(syms))]
+        if r.random() < 0.3:
+            acct.open_trade(sym, px[sym], 500, 60.0, 'long' if r.random() < 0.5 else 'short')
+        else:
+            px[sym] *= float(np.exp(r.normal(0, 0.04)))
+            if r.random() < 0.5:
+                acct.update_price(sym, px[sym])
+            else:
+                c = px[sym]
+                acct.update_bars({sym: (c, c * 1.03, c * 0.97, c)})
+    return acct
+
+
+def positions(acct):
+    return {k: {f: v for f, v in p.items() if f not in MARKS} for k, p in acct.positions.items()}
+
+
+def test_snapshot_keeps_history_kinds(tmp_path):
+    j = Journal(str(tmp_path / 'j.db'), snapshot_every=1000)
+    for i in range(3):
+        j.append('a', 'open', {'i': i})
+        j.append('a', 'close', {'i': i})
+        j.append('a', 'update', {'i': i})
+    j.snapshot('a', {'balance': 1}, keep=('close',))
+    j.append('a', 'open', {'i': 9})
+    state, history, events = j.load('a')
+    assert state == {'balance': 1}
+    assert history == [('close', {'i': i}) for i in range(3)]
+    assert events == [('open', {'i': 9})]
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_web_account_replay(tmp_path, seed):
+    path = str(tmp_path / 'j.db')
+    live = trade(web.PaperTrading(journal=Journal(path, snapshot_every=7)), seed)
+    assert len(live.closed) > 5 and live.positions
+    back = web.PaperTrading(journal=Journal(path))
+    assert back.balance == live.balance
+    assert positions(back) == positions(live)
+    assert back.closed == live.closed
+    assert back.stats() == live.stats()
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_doktor_account_replay(tmp_path, seed):
+    path = str(tmp_path / 'j.db')
+    live = doktor.AdvancedPaperTradingAccount(journal=Journal(path, snapshot_every=7))
+    live.MARK_JOURNAL_SEC = 0           # uç fiyatlar her adımda günlüğe
+    trade(live, seed)
+    assert len(live.closed_trades) > 5 and live.positions
+    back = doktor.AdvancedPaperTradingAccount(journal=Journal(path))
+    assert back.balance == live.balance
+    assert positions(back) == positions(live)
+    assert back.closed_trades == live.closed_trades
+    assert back.trade_history == live.trade_history
+    assert back.get_stats() == live.get_stats()
+    assert back.coin_stats() == live.coin_stats()
+
+
+def test_snapshot_size_does_not_grow_with_history(tmp_path):
+    acct = web.PaperTrading(journal=Journal(str(tmp_path / 'j.db'), snapshot_every=5))
+    sizes = []
+    for seed in range(6):
+        trade(acct, seed, steps=80)
+        for key in list(acct.positions):
+            with acct._lock:
+                acct._close(key, acct.positions[key]['entry'], 'MANUAL')
+        sizes.append(len(dumps(acct._state())))
+    assert len(acct.closed) > 30
+    assert max(sizes) - min(sizes) < 10     # yalnızca bakiye hanesi değişir
+
+
+def test_scan_meta_restored(tmp_path, monkeypatch):
+    path = str(tmp_path / 'j.db')
+    monkeypatch.setattr(web, 'Journal', lambda: Journal(path))
+    a = web.Scanner()
+    a.scan_count, a.last_scan = 7, 1234.5
+    row = {'sym': 'BTC', 'price': 1.0, 'bwr': 70.0}
+    a.buy_sigs['BTC'] = row
+    a.prices['BTC'] = 1.0
+    a.save_scan()
+    b = web.Scanner()
+    assert (b.scan_count, b.last_scan, b.prices) == (7, 1234.5, {'BTC': 1.0})
+    assert b.buy_sigs == {'BTC': row} and b.rows['BTC:BUY']['sym'] == 'BTC'
+
+
+def test_doktor_scan_meta_restored(tmp_path, monkeypatch):
+    path = str(tmp_path / 'j.db')
+    monkeypatch.setattr(doktor, 'Journal', lambda: Journal(path))
+    a = doktor.Advanced500Scanner()
+    a.scan_count, a.total_signals, a._last_scan_time = 3, 11, 99.0
+    a.sell_signals['ETH'] = {'sembol': 'ETH', 'fiyat': 2.0}
+    a.current_prices['ETH'] = 2.0
+    a.save_scan()
+    b = doktor.Advanced500Scanner()
+    assert (b.scan_count, b.total_signals, b._last_scan_time) == (3, 11, 99.0)
+    assert b.sell_signals == a.sell_signals and b.current_prices == {'ETH': 2.0}
@@ -0,0 +1,52 @@
+"""levels.support ile eski O(n²) sayımın eşdeğerliği (sıfır fiyat dahil)"""
+
+import warnings
+
+import numpy as np
+import pytest
+
+import legacy
+import levels
+
+
+def old_support(lows, lb=100, tol=0.015):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)     # ref == 0 → inf / NaN
+        return legacy.support_loop(lows, lb, tol)
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_support_matches_loop(seed):
+    r = np.random.default_rng(seed)
+    lows = np.round(100 + np.cumsum(r.normal(0, 1, 300)), 1)
+    assert levels.support(lows) == old_support(lows)
+
+
+@pytest.mark.parametrize('lows', [
+    [1, 1, 0, 1, 1, 1, 2, 1, 2, 2],            # tek pivot, sıfır
+    [1, 1, 0, 1, 1, 0, 1, 1, 0, 1, 1],         # yalnızca sıfır pivotlar
+    [3, 3, 0, 3, 3, 2, 3, 3, 2.01, 3, 3],      # sıfır + kümelenen pivotlar
+    [3, 3, 2, 3, 3, 0, 3, 3, 5, 6, 7],
+])
+def test_zero_reference_does_not_raise(lows):
+    lows = np.asarray(lows, dtype=float)
+    assert levels.support(lows) == old_support(lows)
+    assert all(c >= 0 for c in levels.touch_counts(lows[levels.pivot_lows(lows)]))
+
+
+def test_top_levels_are_disjoint_and_ranked():
+    pivots = [100, 100.5, 50, 101, 200, 50.2, 100.2]
+    assert levels.top_levels(pivots, 0.015, k=3) == [(100.0, 4), (50.0, 2), (200.0, 1)]
+    assert levels.top_levels(pivots, 0.015, k=10) == [(100.0, 4), (50.0, 2), (200.0, 1)]
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_top_k_starts_with_best_level(seed):
+    r = np.random.default_rng(seed)
+    lows = np.round(100 + np.cumsum(r.normal(0, 1, 300)), 1)
+    top = levels.support(lows, k=3)
+    assert top[0] == levels.support(lows)
+    assert [c for _, c in top] == sorted((c for _, c in top), reverse=True)
+    assert all(abs(b - a) / a > 0.015 for i, (a, _) in enumerate(top) for b, _ in top[i + 1:])
+    highs = -lows + 300
+    assert levels.resistance(highs, k=3)[0] == levels.resistance(highs)
@@ -0,0 +1,100 @@
+"""ohlcv_store: artımlı güncelleme ve düzeltme tabanı değişince tam yeniden çekim"""
+
+import numpy as np
+import pandas as pd
+
+import ohlcv_store
+from ohlcv_store import OHLCVStore
+
+DAY = 86_400_000
+
+
+def bars(n, scale=1.0, t0=1_700_000_000_000):
+    ts = t0 + np.arange(n) * DAY
+    c = (100 + np.arange(n, dtype=float)) * scale
+    return np.column_stack([ts, c, c * 1.01, c * 0.99, c, np.full(n, 1000.0)])
+
+
+class Source:
+    """fetch(since): since=None → tam pencere, yoksa since'den bir hafta geriden (yfinance gibi)"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def __call__(self, since):
+        self.calls.append(since)
+        if since is None:
+            return self.rows
+        return self.rows[self.rows[:, 0] >= since - 7 * DAY]
+
+
+def test_incremental_update_fetches_tail_only(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    src = Source(bars(30))
+    store.update('yfinance', 'X', '1d', src)
+    src.rows = bars(33)                         # yeni 3 bar, geçmiş aynı
+    rows = store.update('yfinance', 'X', '1d', src)
+    assert src.calls[1:] == [int(bars(30)[-1, 0])]
+    np.testing.assert_array_equal(rows, bars(33))
+
+
+def test_split_rebases_whole_window(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    src = Source(bars(30))
+    store.update('yfinance', 'X', '1d', src)
+    src.rows = bars(33, scale=0.5)              # 2:1 bölünme: tüm geçmiş yeniden düzeltildi
+    rows = store.update('yfinance', 'X', '1d', src)
+    assert src.calls[-1] is None
+    np.testing.assert_array_equal(rows, bars(33, scale=0.5))
+    np.testing.assert_array_equal(store.load('yfinance', 'X', '1d'), bars(33, scale=0.5))
+
+
+def test_last_stored_bar_may_change_without_rebase(tmp_path):
+    """Son saklanan bar henüz kapanmamış olabilir: yalnızca o farklıysa tam çekim yok"""
+    store = OHLCVStore(str(tmp_path))
+    store.update('yfinance', 'X', '1d', Source(bars(30)))
+    live = bars(31)
+    live[29, 4] *= 1.05
+    src = Source(live)
+    rows = store.update('yfinance', 'X', '1d', src)
+    assert None not in src.calls
+    np.testing.assert_array_equal(rows, live)
+
+
+def test_rebased_tolerance():
+    stored = bars(10)
+    assert not OHLCVStore.rebased(stored, bars(10) * [1, 1 + 1e-7, 1, 1, 1, 1])
+    assert OHLCVStore.rebased(stored, bars(10) * [1, 1, 1, 1, 0.99, 1])      # %1 temettü
+    assert not OHLCVStore.rebased(stored, bars(12)[10:])                     # örtüşme yok
+
+
+def test_bulk_history_refetches_rebased_symbol(tmp_path, monkeypatch):
+    store = OHLCVStore(str(tmp_path))
+    today = pd.Timestamp.now().normalize()
+    t0 = int(ohlcv_store.to_ms([today - pd.Timedelta(days=29)])[0])
+
+    def frame(rows):
+        return ohlcv_store.rows_to_frame(rows)
+
+    data = {'A': bars(30, t0=t0), 'B': bars(30, t0=t0)}
+    calls = []
+
+    def download(tickers, retries, **kw):
+        calls.append((tuple(tickers), 'period' in kw))
+        out = {}
+        for t in tickers:
+            rows = data[t]
+            if 'start' in kw:
+                rows = rows[rows[:, 0] >= ohlcv_store.to_ms([pd.Timestamp(kw['start'])])[0]]
+            out[t] = frame(rows)
+        return out
+
+    monkeypatch.setattr(ohlcv_store, '_yf_download_chunk', download)
+    ohlcv_store.yf_bulk_history(['A', 'B'], '3mo', store=store)
+    data['B'] = bars(30, t0=t0, scale=0.5)
+    calls.clear()
+    out = ohlcv_store.yf_bulk_history(['A', 'B'], '3mo', store=store)
+    assert calls == [(('A', 'B'), False), (('B',), True)]
+    np.testing.assert_array_equal(ohlcv_store.frame_to_rows(out['B']), data['B'])
+    np.testing.assert_array_equal(ohlcv_store.frame_to_rows(out['A']), data['A'])
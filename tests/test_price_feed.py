@@ -0,0 +1,125 @@
+"""price_feed: PriceRefresher ağırlıkları, ReplayFeed ile kağıt hesabın TP/SL dolumları"""
+
+import pytest
+
+import apps
+from journal import Journal
+from price_feed import PriceRefresher, ReplayFeed
+from rate_limit import TICKER_PRICES_WEIGHT, TICKER_24HR_ALL_WEIGHT, ticker_24hr_weight
+
+
+class Bucket:
+    def __init__(self):
+        self.spent = []
+
+    def acquire(self, weight=1):
+        self.spent.append(weight)
+
+    def ok(self):
+        pass
+
+
+class Exchange:
+    def __init__(self, last_prices):
+        self.has = {'fetchLastPrices': last_prices}
+        self.asked = []
+
+    def _prices(self, pairs, key):
+        self.asked.append(pairs)
+        return {p: {key: 1.0} for p in (pairs or ['BTC/USDT'])}
+
+    def fetch_last_prices(self, pairs):
+        return self._prices(pairs, 'price')
+
+    def fetch_tickers(self, pairs):
+        return self._prices(pairs, 'last')
+
+
+@pytest.mark.parametrize('count, weight', [
+    (1, 2), (20, 2), (21, 40), (100, 40), (101, 80), (None, TICKER_24HR_ALL_WEIGHT),
+])
+def test_ticker_24hr_weight(count, weight):
+    assert ticker_24hr_weight(count) == weight
+
+
+@pytest.mark.parametrize('last_prices, n, asked_all, weight', [
+    (True,  5,   False, TICKER_PRICES_WEIGHT),
+    (True,  150, True,  TICKER_PRICES_WEIGHT),
+    (False, 5,   False, 2),
+    (False, 50,  False, 40),
+    (False, 150, True,  TICKER_24HR_ALL_WEIGHT),
+])
+def test_bulk_weight(last_prices, n, asked_all, weight):
+    bucket, ex = Bucket(), Exchange(last_prices)
+    out = PriceRefresher(bucket=bucket).refresh(ex, ['BTC'] + [f'S{i}' for i in range(n - 1)])
+    assert out['BTC'] == 1.0
+    assert (ex.asked[0] is None) == asked_all
+    assert bucket.spent == [weight]
+
+
+# ============================================================================
+# ReplayFeed → PaperTrading (binance_web_scanner): tik ve mum içi TP/SL
+# ============================================================================
+MIN = 60_000
+
+
+def replay_bars(pt, bars_by_sym):
+    """{sym: [(o, h, l, c), ...]} dakikalık mumlar ReplayFeed ile update_bars'a"""
+    rows = {s: [[i * MIN, *b, 1.0] for i, b in enumerate(bs)] for s, bs in bars_by_sym.items()}
+    closed = []
+    ReplayFeed(lambda bars: closed.extend(pt.update_bars(bars)),
+               ReplayFeed.bars_from_rows(rows)).run()
+    return {c['sym']: c for c in closed}
+
+
+@pytest.fixture
+def pt(tmp_path):
+    web = apps.web()
+    acct = web.PaperTrading(journal=Journal(str(tmp_path / 'j.db')))
+    acct.open_trade('L', 100.0, 500, 60.0, 'long')      # TP 120, SL 95
+    acct.open_trade('S', 100.0, 500, 60.0, 'short')     # TP 80,  SL 105
+    return acct
+
+
+def test_ticks_close_at_tick_price(pt):
+    closed = []
+    rows = {'L': [[i * MIN, 0, 0, 0, c, 0] for i, c in enumerate((101.0, 119.0, 121.5, 130.0))],
+            'S': [[i * MIN, 0, 0, 0, c, 0] for i, c in enumerate((99.0, 104.0, 106.0))]}
+    feed = ReplayFeed(lambda prices: [closed.extend(pt.update_price(s, p)) for s, p in prices.items()],
+                      ReplayFeed.ticks_from_rows(rows))
+    feed.run()
+    got = {c['sym']: c for c in closed}
+    assert (got['L']['reason'], got['L']['exit']) == ('TAKE PROFIT', 121.5)
+    assert (got['S']['reason'], got['S']['exit']) == ('STOP LOSS', 106.0)
+    assert feed.last == {'L': 130.0, 'S': 106.0} and not pt.positions
+
+
+def test_bar_fills_at_trigger_level(pt):
+    got = replay_bars(pt, {'L': [(100, 101, 99, 100), (101, 121, 100, 118)],
+                           'S': [(100, 101, 99, 100), (101, 105.5, 100, 103)]})
+    assert (got['L']['reason'], got['L']['exit']) == ('TAKE PROFIT', pytest.approx(120.0))
+    assert (got['S']['reason'], got['S']['exit']) == ('STOP LOSS', pytest.approx(105.0))
+
+
+def test_bar_gapping_through_level_fills_at_open(pt):
+    got = replay_bars(pt, {'L': [(90, 91, 88, 89)],               # SL 95'in altında açıldı
+                           'S': [(75, 78, 70, 76)]})              # TP 80'in altında açıldı
+    assert (got['L']['reason'], got['L']['exit']) == ('STOP LOSS', 90.0)
+    assert (got['S']['reason'], got['S']['exit']) == ('TAKE PROFIT', 75.0)
+
+
+def test_bar_hitting_both_levels_counts_take_profit(pt):
+    got = replay_bars(pt, {'L': [(100, 125, 90, 100)], 'S': [(100, 110, 75, 100)]})
+    assert (got['L']['reason'], got['L']['exit']) == ('TAKE PROFIT', pytest.approx(120.0))
+    assert (got['S']['reason'], got['S']['exit']) == ('TAKE PROFIT', pytest.approx(80.0))
+
+
+def test_marks_are_not_journalled(pt):
+    """Değerleme tikleri günlüğe yazılmaz; yalnızca open / close olayları"""
+    kinds = []
+    append = pt.journal.append
+    pt.journal.append = lambda account, kind, data: kinds.append(kind) or append(account, kind, data)
+    replay_bars(pt, {'L': [(100, 101 + i % 3, 99, 100 + i % 3) for i in range(200)],
+                     'S': [(100, 101, 99, 100 - i % 2) for i in range(199)] + [(100, 106, 99, 104)]})
+    assert kinds == ['close']
+    assert pt.positions['L_long']['cur'] == 101.0
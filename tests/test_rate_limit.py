@@ -0,0 +1,44 @@
+"""rate_limit.is_rate_limit_error: yalnızca gerçek hız aşımı tanınır"""
+
+import pytest
+
+from rate_limit import is_rate_limit_error
+
+
+class RateLimitExceeded(Exception):
+    pass
+
+
+class ExchangeError(Exception):
+    pass
+
+
+class HTTPError(Exception):
+    def __init__(self, msg, status):
+        super().__init__(msg)
+        self.response = type('R', (), {'status_code': status})()
+
+
+@pytest.mark.parametrize('exc', [
+    RateLimitExceeded('binance {"code":-1003}'),
+    type('DDoSProtection', (Exception,), {})('418'),
+    ExchangeError('binance GET https://api.binance.com/api/v3/klines 429 Too Many Requests'),
+    ExchangeError('HTTP 418'),
+    ExchangeError('HTTP/1.1 429'),
+    ExchangeError('status code: 429'),
+    HTTPError('rate', 429),
+    type('E', (Exception,), {'http_status': 418})('x'),
+])
+def test_rate_limit_errors(exc):
+    assert is_rate_limit_error(exc)
+
+
+@pytest.mark.parametrize('exc', [
+    ExchangeError('binance GET https://fapi.binance.com/fapi/v1/klines?since=1700004180000&limit=1000'),
+    ExchangeError('price 0.0004291 below min notional'),
+    ExchangeError('Timestamp 1741843200 outside recvWindow'),
+    ExchangeError('symbol SOL/USDT bar 418 missing'),
+    HTTPError('server error', 500),
+])
+def test_digits_in_message_are_not_rate_limits(exc):
+    assert not is_rate_limit_error(exc)
@@ -0,0 +1,86 @@
+"""scan_cache: son kapanmış muma göre isabet / ıska ve LRU atma"""
+
+import pytest
+
+from scan_cache import ScanCache, closed_ts, expected_closed, reprice
+
+H = 3_600_000
+T0 = 1_700_002_800_000 // H * H                 # bir saat sınırı
+
+
+def summary(ts1, price=100.0):
+    return {'ts1': ts1, 'price': price, 'sup': 90.0, 'res': 110.0, 'sdist': 0.0, 'rdist': 0.0}
+
+
+@pytest.mark.parametrize('ts1,now,want', [
+    (T0, T0 + 1, T0 - H),                       # son bar henüz açık
+    (T0, T0 + H - 1, T0 - H),
+    (T0, T0 + H, T0),                           # sınırda kapandı
+    (T0 - H, T0 + 5, T0 - H),                   # borsa yeni barı henüz vermedi
+])
+def test_closed_ts(ts1, now, want):
+    assert closed_ts(ts1, H, now) == want
+
+
+def test_expected_closed():
+    assert expected_closed(H, T0) == T0 - H
+    assert expected_closed(H, T0 + H - 1) == T0 - H
+    assert expected_closed(H, T0 + H) == T0
+
+
+def test_hit_until_next_candle_closes():
+    cache = ScanCache('1h')
+    s = summary(T0)
+    cache.put('BTC', s, now_ms=T0 + 60_000)
+    assert cache.get('BTC', now_ms=T0 + 30 * 60_000) is s
+    assert cache.get('BTC', now_ms=T0 + H - 1) is s
+    assert cache.get('BTC', now_ms=T0 + H) is None           # T0 barı kapandı
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_rows_without_open_bar_hit():
+    """Son satır kapanmış bar ise (açık mum yok) anahtar yine saate göre son kapanmış bar"""
+    cache = ScanCache('1h')
+    cache.put('ETH', summary(T0 - H), now_ms=T0 + 5)
+    assert cache.get('ETH', now_ms=T0 + 10) is not None
+
+
+def test_stale_rows_miss():
+    cache = ScanCache('1h')
+    cache.put('ETH', summary(T0 - 3 * H), now_ms=T0 + 5)     # geride kalmış veri
+    assert cache.get('ETH', now_ms=T0 + 10) is None
+
+
+def test_params_and_timeframe_are_part_of_key():
+    a = ScanCache('1h', lookback=4)
+    b = ScanCache('1h', lookback=5)
+    assert a.pkey != b.pkey and a.pkey == ScanCache('1h', lookback=4).pkey
+    assert ScanCache('1h').pkey == ScanCache('1h').pkey
+    four = ScanCache('4h')
+    four.put('BTC', summary(T0 // (4 * H) * 4 * H), now_ms=T0 + 5)
+    assert four.get('BTC', now_ms=T0 + 10) is not None
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ScanCache('1h', maxsize=3)
+    now = T0 + 5
+    for sym in 'ABC':
+        cache.put(sym, summary(T0), now_ms=now)
+    assert cache.get('A', now_ms=now) is not None            # A en yeni kullanılan
+    cache.put('D', summary(T0), now_ms=now)
+    assert len(cache) == 3
+    assert cache.get('B', now_ms=now) is None
+    assert all(cache.get(sym, now_ms=now) is not None for sym in 'ACD')
+    cache.put('A', summary(T0, 5.0), now_ms=now)             # güncelleme yer açmaz
+    assert len(cache) == 3 and cache.get('A', now_ms=now)['price'] == 5.0
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_reprice_copies_price_fields():
+    s = summary(T0)
+    out = reprice(s, 99.0)
+    assert out is not s and s['price'] == 100.0
+    assert out['price'] == 99.0
+    assert out['sdist'] == pytest.approx(10.0)
+    assert out['rdist'] == pytest.approx(11 / 99 * 100)
@@ -0,0 +1,66 @@
+"""scan_pool.pool_iter: paylaşılan forkserver/spawn havuzu, sonuçlar analyze_rows ile aynı"""
+
+import threading
+
+import numpy as np
+
+import scan_pool
+
+
+def rows(seed, n=300):
+    r = np.random.default_rng(seed)
+    c = 100 * np.exp(np.cumsum(r.normal(0, 0.01, n)))
+    o = np.r_[c[:1], c[:-1]]
+    ts = 1_700_000_000_000 + np.arange(n) * 3_600_000
+    return np.column_stack([ts, o, np.maximum(o, c) * 1.002, np.minimum(o, c) * 0.998, c, np.ones(n)])
+
+
+def loaded(k):
+    for i in range(k):
+        yield f'S{i}', rows(i), None
+    yield 'BAD', None, ValueError('ağ hatası')
+
+
+def test_pool_results_match_and_pool_is_reused():
+    first = {s: (r, e) for s, r, e in scan_pool.pool_iter(loaded(6), workers=2)}
+    ex = scan_pool.shared_pool(2)
+    assert ex._mp_context.get_start_method() in ('forkserver', 'spawn')
+    second = {s: (r, e) for s, r, e in scan_pool.pool_iter(loaded(6), workers=2)}
+    assert scan_pool.shared_pool(2) is ex
+    for i in range(6):
+        assert first[f'S{i}'] == second[f'S{i}'] == (scan_pool.analyze_rows(rows(i)), None)
+    assert first['BAD'][0] is None and isinstance(first['BAD'][1], ValueError)
+
+
+def drain(gen, timeout=60):
+    """pool_iter'i ayrı thread'de tüketir; takılırsa test askıda kalmak yerine düşer"""
+    got = []
+    t = threading.Thread(target=lambda: got.extend(gen), daemon=True)
+    t.start()
+    t.join(timeout)
+    assert not t.is_alive(), 'pool_iter takıldı'
+    return {s: (r, e) for s, r, e in got}
+
+
+class FailingPool:
+    def submit(self, *args, **kwargs):
+        raise RuntimeError('cannot schedule new futures after shutdown')
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def test_submit_failure_reports_error_instead_of_hanging(monkeypatch):
+    monkeypatch.setattr(scan_pool, 'shared_pool', lambda workers=None: FailingPool())
+    got = drain(scan_pool.pool_iter(loaded(4), workers=2))
+    assert set(got) == {'S0', 'S1', 'S2', 'S3', 'BAD'}
+    for i in range(4):
+        res, err = got[f'S{i}']
+        assert res is None and isinstance(err, RuntimeError)
+
+
+def test_pool_shut_down_by_another_scan_is_replaced():
+    scan_pool.shared_pool(2).shutdown(wait=True)    # paylaşılan havuz dışarıda kapatıldı
+    got = drain(scan_pool.pool_iter(loaded(3), workers=2))
+    for i in range(3):
+        assert got[f'S{i}'] == (scan_pool.analyze_rows(rows(i)), None)
@@ -0,0 +1,110 @@
+"""
+Kağıt hesaplar için artımlı işlem istatistikleri
+
+Kapanan her işlem add() ile bir kez işlenir: sayılar, PnL toplamları,
+kazanç / kayıp toplamları, gerçekleşen PnL eğrisinin maksimum düşüşü,
+toplam tutma süresi ve işlem hacmi koşan toplamlarla tutulur.
+summary() işlem sayısından bağımsız O(1).
+
+İsteğe bağlı kayan pencereler (son N işlem) aynı toplamları bir deque
+ile tutar; pencereden düşen işlemin katkısı toplamlardan çıkarılır.
+"""
+
+from collections import deque
+
+
+class TradeSums:
+    """Bir işlem kümesinin koşan toplamları"""
+    __slots__ = ('n', 'wins', 'losses', 'pnl', 'pct', 'win_pnl', 'loss_pnl', 'hold', 'volume')
+
+    def __init__(self):
+        self.n = self.wins = self.losses = 0
+        self.pnl = self.pct = self.win_pnl = self.loss_pnl = self.hold = self.volume = 0.0
+
+    def add(self, pnl, pct=0.0, hold=0.0, size=0.0, sign=1):
+        """İşlemi ekler (sign=-1 ile geri çıkarır)"""
+        self.n += sign
+        if pnl > 0:
+            self.wins    += sign
+            self.win_pnl += sign * pnl
+        elif pnl < 0:
+            self.losses   += sign
+            self.loss_pnl -= sign * pnl
+        self.pnl    += sign * pnl
+        self.pct    += sign * pct
+        self.hold   += sign * hold
+        self.volume += sign * size
+        if sign < 0:
+            # Çıkarma artığı kalmasın: boşalan toplamlar tam sıfırlanır
+            if not self.wins:
+                self.win_pnl = 0.0
+            if not self.losses:
+                self.loss_pnl = 0.0
+            if not self.n:
+                self.pnl = self.pct = self.hold = self.volume = 0.0
+
+    def summary(self):
+        n = self.n
+        return {
+            'total':    n,
+            'wins':     self.wins,
+            'losses':   self.losses,
+            'wr':       self.wins / n * 100 if n else 0,
+            'pnl':      self.pnl,
+            'avg_pct':  self.pct / n if n else 0,
+            'win_pnl':  self.win_pnl,
+            'loss_pnl': self.loss_pnl,
+            'kf':       self.win_pnl / self.loss_pnl if self.loss_pnl > 0 else 0,
+            'avg_hold': self.hold / n if n else 0,
+            'volume':   self.volume,
+        }
+
+
+class RunningStats:
+    """
+    Tüm geçmiş + sembol bazlı + kayan pencere toplamları
+
+    Args:
+        base:    başlangıç bakiyesi (düşüş yüzdesi için)
+        windows: kayan pencere boyları (son N işlem), ör. (50,)
+    """
+
+    def __init__(self, base=0.0, windows=()):
+        self.base       = base
+        self.all        = TradeSums()
+        self.by_sym     = {}
+        self.windows    = {int(w): (TradeSums(), deque()) for w in windows}
+        self.peak       = 0.0
+        self.max_dd     = 0.0
+        self.max_dd_pct = 0.0
+
+    def add(self, pnl, pct=0.0, hold=0.0, size=0.0, sym=None):
+        trade = (pnl, pct, hold, size)
+        self.all.add(*trade)
+        if sym is not None:
+            s = self.by_sym.get(sym)
+            if s is None:
+                s = self.by_sym[sym] = TradeSums()
+            s.add(*trade)
+        for w, (s, q) in self.windows.items():
+            s.add(*trade)
+            q.append(trade)
+            if len(q) > w:
+                s.add(*q.popleft(), sign=-1)
+
+        # Gerçekleşen PnL eğrisinin tepeden düşüşü
+        eq = self.all.pnl
+        if eq > self.peak:
+            self.peak = eq
+        dd = self.peak - eq
+        if dd > self.max_dd:
+            self.max_dd = dd
+        eq_peak = self.base + self.peak
+        if eq_peak > 0 and dd / eq_peak * 100 > self.max_dd_pct:
+            self.max_dd_pct = dd / eq_peak * 100
+
+    def summary(self, window=None):
+        """Tüm geçmiş (window=None) ya da son `window` işlemin özeti"""
+        if window is None:
+            return {**self.all.summary(), 'max_dd': self.max_dd, 'max_dd_pct': self.max_dd_pct}
+        return self.windows[window][0].summary()
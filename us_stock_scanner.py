@@ -7,7 +7,8 @@ import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 import warnings
-import time
+import indicators
+from ohlcv_store import yf_history, yf_bulk_history
 warnings.filterwarnings('ignore')
 
 def get_nasdaq_100_stocks():
@@ -175,62 +176,14 @@ def heiken_ashi(df):
     """
     Calculate Heiken Ashi candles
     """
-    df = df.copy()
-    
-    df['HA_Close'] = (df['Open'] + df['High'] + df['Low'] + df['Close']) / 4
-    df['HA_Open'] = 0.0
-    df.loc[df.index[0], 'HA_Open'] = (df['Open'].iloc[0] + df['Close'].iloc[0]) / 2
-    
-    for i in range(1, len(df)):
-        df.loc[df.index[i], 'HA_Open'] = (df['HA_Open'].iloc[i-1] + df['HA_Close'].iloc[i-1]) / 2
-    
-    df['HA_High'] = df[['High', 'HA_Open', 'HA_Close']].max(axis=1)
-    df['HA_Low'] = df[['Low', 'HA_Open', 'HA_Close']].min(axis=1)
-    
-    return df
+    return indicators.heiken_ashi(df)
 
 def td_sequential_heiken_ashi(df):
     """
     TD Sequential calculation on Heiken Ashi candles
     """
-    df = df.copy()
-    df = heiken_ashi(df)
-    
-    # Buy Setup
-    df['buy_setup'] = 0
-    buy_count = 0
-    
-    for i in range(4, len(df)):
-        if df['HA_Close'].iloc[i] < df['HA_Close'].iloc[i-4]:
-            buy_count += 1
-            df.loc[df.index[i], 'buy_setup'] = buy_count
-            if buy_count >= 9:
-                buy_count = 9
-        else:
-            buy_count = 0
-    
-    # Sell Setup
-    df['sell_setup'] = 0
-    sell_count = 0
-    
-    for i in range(4, len(df)):
-        if df['HA_Close'].iloc[i] > df['HA_Close'].iloc[i-4]:
-            sell_count += 1
-            df.loc[df.index[i], 'sell_setup'] = sell_count
-            if sell_count >= 9:
-                sell_count = 9
-        else:
-            sell_count = 0
-    
-    # Trend analysis
-    df['ha_trend'] = 'NEUTRAL'
-    for i in range(len(df)):
-        if df['HA_Close'].iloc[i] > df['HA_Open'].iloc[i]:
-            df.loc[df.index[i], 'ha_trend'] = 'BULLISH'
-        elif df['HA_Close'].iloc[i] < df['HA_Open'].iloc[i]:
-            df.loc[df.index[i], 'ha_trend'] = 'BEARISH'
-    
-    return df
+    # The legacy counter was recorded before being clamped to 9, so runs past 9 read 10
+    return indicators.td_sequential_heiken_ashi(df, cap=10, labels=indicators.TREND_EN)
 
 def calculate_trend_strength(df):
     """
@@ -301,13 +254,14 @@ def analyze_buy_setup_success_rate(df):
     
     return success_rate, avg_gain, len(gains_list)
 
-def scan_stock(symbol, period="3mo"):
+def scan_stock(symbol, period="3mo", df=None):
     """
-    Scan a single stock
+    Scan a single stock (no download if df is given)
     """
     try:
-        stock = yf.Ticker(symbol)
-        df = stock.history(period=period, interval="1d")
+        if df is None:
+            stock = yf.Ticker(symbol)
+            df = yf_history(stock, period=period, interval="1d")
         
         if df.empty or len(df) < 10:
             return None
@@ -347,14 +301,53 @@ def scan_stock(symbol, period="3mo"):
     except Exception as e:
         return None
 
-def analyze_buy_setup_with_history(symbol):
+def scan_stocks_batch(data):
+    """
+    Batch version of scan_stock: every symbol goes into one N × T matrix
+    (indicators.batch_indicators).
+
+    Returns:
+        {symbol: result} with the same fields as scan_stock; series shorter
+        than 10 bars are left out
+    """
+    symbols, m = indicators.batch_indicators(data, cap=10, labels=indicators.TREND_EN)
+    if not symbols:
+        return {}
+    strength = indicators.trend_strength(m['up'], m['down'], m['n'], labels=indicators.STRENGTH_EN)
+    results = {}
+    for i, symbol in enumerate(symbols):
+        if m['n'][i] < 10:
+            continue
+        ha_close, ha_open = m['ha_close'][i], m['ha_open'][i]
+        buy_setup, sell_setup = int(m['buy'][i]), int(m['sell'][i])
+        results[symbol] = {
+            'symbol': symbol,
+            'last_price': round(m['close'][i], 2),
+            'ha_close': round(ha_close, 2),
+            'ha_open': round(ha_open, 2),
+            'ha_color': "🟢 GREEN" if ha_close > ha_open else "🔴 RED",
+            'ha_trend': m['ha_trend'][i],
+            'trend_strength': strength[i],
+            'buy_setup_9': buy_setup == 9,
+            'sell_setup_9': sell_setup == 9,
+            'buy_setup': buy_setup,
+            'sell_setup': sell_setup,
+            'date': data[symbol].index[-1].strftime('%Y-%m-%d'),
+            'success_rate': None,
+            'avg_gain': None,
+            'signal_count': 0
+        }
+    return results
+
+def analyze_buy_setup_with_history(symbol, df=None):
     """
     Detailed analysis with longer historical data for Buy Setup 9 stocks
     """
     try:
-        stock = yf.Ticker(symbol)
-        # Get 2 years of data for better historical analysis
-        df = stock.history(period="2y", interval="1d")
+        if df is None:
+            stock = yf.Ticker(symbol)
+            # Get 2 years of data for better historical analysis
+            df = yf_history(stock, period="2y", interval="1d")
         
         if df.empty or len(df) < 50:
             return None
@@ -427,13 +420,18 @@ def scan_all_stocks(index_name="NASDAQ"):
     # Progress tracking
     total = len(stocks)
     
+    # Download all stocks in bulk (yf.download, chunked)
+    print("Downloading data...")
+    data = yf_bulk_history(stocks, period="3mo", interval="1d")
+    results = scan_stocks_batch(data)
+    
     # Scan each stock
     for i, symbol in enumerate(stocks, 1):
         # Show progress
         percent = (i / total) * 100
         print(f"Progress: [{i}/{total}] {percent:.1f}% - {symbol:10s}", end='\r')
         
-        result = scan_stock(symbol)
+        result = results.get(symbol)
         
         if result:
             if result['buy_setup_9']:
@@ -444,10 +442,6 @@ def scan_all_stocks(index_name="NASDAQ"):
                 other_signals.append(result)
         else:
             failed += 1
-        
-        # Brief pause to respect API rate limits
-        if i % 10 == 0:
-            time.sleep(0.5)
     
     print("\n" + "=" * 100)
     print(f"✓ Scan completed!")
@@ -480,17 +474,14 @@ def scan_all_stocks(index_name="NASDAQ"):
         print("Success = Price increased >2% within 20 days after signal\n")
         
         historical_results = []
+        history = yf_bulk_history([s['symbol'] for s in buy_setup_9_sorted], period="2y", interval="1d")
         
         for i, s in enumerate(buy_setup_9_sorted, 1):
             print(f"Analyzing {s['symbol']}... [{i}/{len(buy_setup_9_sorted)}]", end='\r')
             
-            hist_data = analyze_buy_setup_with_history(s['symbol'])
+            hist_data = analyze_buy_setup_with_history(s['symbol'], df=history[s['symbol']])
             if hist_data:
                 historical_results.append(hist_data)
-            
-            # Brief pause
-            if i % 5 == 0:
-                time.sleep(0.3)
         
         print("\n" + "-" * 100)
         